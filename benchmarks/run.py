@@ -0,0 +1,231 @@
+import os
+import sys
+import csv
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import subprocess
+
+# The benchmarks never show a window
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SIZES = [1000, 10000, 100000]
+TAB_NAME = "Expenses"
+DATE = "2024-03-01"
+OPERATION_COUNT = 100
+CONFIG_ITEMS = 500
+
+def generate_month(path, rows, seed=0):
+    random.seed(seed)
+    categories = [f"Category{i}" for i in range(30)]
+    methods = ["Account1", "Account2", "Cash", "Card", "Other"]
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(["Date", "Category", "Method", "Description", "Amount"])
+        for i in range(rows):
+            writer.writerow([f"2024-03-{i % 28 + 1:02d}", random.choice(categories), random.choice(methods), f"Synthetic entry {i}", random.randint(1, 1000000)])
+
+def generate_config(path, tab_names):
+    with open(path, "w") as file:
+        json.dump({name: [f"Item{i}" for i in range(CONFIG_ITEMS)] for name in tab_names}, file)
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+class Benchmark:
+    def __init__(self, repeat) -> None:
+        self.repeat = repeat
+        self.results = []
+
+    def measure(self, name, rows, function, setup=None, operations=1):
+        # Times repeat runs, then runs once more under tracemalloc for the peak memory
+        timings = []
+        for _ in range(self.repeat):
+            if setup:
+                setup()
+            started = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - started)
+
+        if setup:
+            setup()
+        tracemalloc.start()
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        result = {
+            "name": name,
+            "rows": rows,
+            "operations": operations,
+            "seconds": min(timings),
+            "mean_seconds": sum(timings) / len(timings),
+            "seconds_per_operation": min(timings) / operations,
+            "peak_memory_bytes": peak,
+        }
+        self.results.append(result)
+        print(f"{name:<24} {rows:>8} rows  {result['seconds'] * 1000:10.2f} ms  {peak / 1024 / 1024:8.2f} MB", file=sys.stderr)
+        return result
+
+class NullLog:
+    def append(self, message, **fields):
+        pass
+
+def run(sizes, repeat):
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtCore import Qt
+    from src import MainWindow, MainController
+    from src.config import CATEGORY_FILE, METHOD_FILE, ConfigStore
+    from src.file_manager import TAB_NAMES, csv_path, journal_path, load_from_csv, save_to_csv
+    from src.sidecar import load_columns_from_csv
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    benchmark = Benchmark(repeat)
+    log = NullLog()
+    generate_config(CATEGORY_FILE, TAB_NAMES)
+    generate_config(METHOD_FILE, TAB_NAMES)
+
+    def startup():
+        MainController(MainWindow())
+
+    def load_config():
+        store = ConfigStore()
+        for name in TAB_NAMES:
+            store.items(CATEGORY_FILE, name)
+            store.items(METHOD_FILE, name)
+
+    benchmark.measure("startup", 0, startup)
+    benchmark.measure("config_load", CONFIG_ITEMS, load_config, operations=2 * len(TAB_NAMES))
+    controller = MainController(MainWindow()).tab_controller(TAB_NAME)
+    table = controller.table_obj
+    path = csv_path(TAB_NAME, DATE)
+
+    for size in sizes:
+        generate_month(path, size)
+
+        def load():
+            table.reset(load_from_csv(TAB_NAME, DATE, log))
+            table.model.mark_clean(path)
+
+        def load_cached():
+            table.reset_columns(*load_columns_from_csv(TAB_NAME, DATE, log))
+            table.model.mark_clean(path)
+
+        def write_cache():
+            load_cached()
+
+        def save_full():
+            save_to_csv(TAB_NAME, DATE, table.model, log)
+
+        def save_journal():
+            save_to_csv(TAB_NAME, DATE, table.model, log)
+            os.remove(journal_path(path))
+
+        def loaded_table():
+            load()
+
+        def unsaved_table():
+            # Without a source the whole month is written, as for a month that was never saved
+            load()
+            table.model.mark_clean(None)
+
+        def edited_table():
+            load()
+            table.add_rows([(DATE, "Category1", "Cash", f"Added entry {i}", i + 1) for i in range(OPERATION_COUNT)])
+
+        def add_rows():
+            for i in range(OPERATION_COUNT):
+                table.add_row(DATE, ["Category1"], "Cash", f"Added entry {i}", i + 1)
+
+        def delete_rows():
+            for _ in range(OPERATION_COUNT):
+                table.delete_row(0)
+
+        def delete_and_undo():
+            delete_rows()
+            for _ in range(OPERATION_COUNT):
+                table.undo()
+
+        def sort_columns():
+            # Every column both ways, with the keys computed once per column
+            for col in range(table.model.DELETE):
+                table.proxy.sort(col, Qt.AscendingOrder)
+                table.proxy.sort(col, Qt.DescendingOrder)
+            table.proxy.sort(-1)
+
+        def filter_rows():
+            table.proxy.set_filters(method="Cash", min_amount=100, text="entry")
+            table.proxy.set_filters()
+
+        benchmark.measure("load_and_reset", size, load)
+        benchmark.measure("load_columns_cached", size, load_cached, setup=write_cache)
+        benchmark.measure("save_full", size, save_full, setup=unsaved_table)
+        benchmark.measure("save_journal", size, save_journal, setup=edited_table, operations=OPERATION_COUNT)
+        benchmark.measure("add_row", size, add_rows, setup=loaded_table, operations=OPERATION_COUNT)
+        benchmark.measure("delete_row", size, delete_rows, setup=loaded_table, operations=OPERATION_COUNT)
+        benchmark.measure("delete_row_and_undo", size, delete_and_undo, setup=loaded_table, operations=2 * OPERATION_COUNT)
+        benchmark.measure("sort_columns", size, sort_columns, setup=loaded_table, operations=2 * table.model.DELETE)
+        benchmark.measure("filter_rows", size, filter_rows, setup=loaded_table)
+        table.clear()
+
+    app.processEvents()
+    return benchmark.results
+
+def compare(results, path):
+    # Prints the time of each benchmark relative to an earlier result file
+    with open(path, "r", encoding="utf-8") as file:
+        baseline = {(result["name"], result["rows"]): result for result in json.load(file)["results"]}
+    for result in results:
+        previous = baseline.get((result["name"], result["rows"]))
+        if previous and previous["seconds"]:
+            ratio = result["seconds"] / previous["seconds"]
+            print(f"{result['name']:<24} {result['rows']:>8} rows  {ratio:6.2f}x", file=sys.stderr)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description="Benchmarks for loading, saving and editing tables")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="rows per synthetic month")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per benchmark, the fastest is reported")
+    parser.add_argument("-o", "--output", default="benchmark.json", help="JSON result file")
+    parser.add_argument("--compare", help="earlier JSON result file to compare against")
+    args = parser.parse_args(argv)
+
+    output = os.path.abspath(args.output)
+    baseline = os.path.abspath(args.compare) if args.compare else None
+    sys.path.insert(0, REPO_ROOT)
+    started = time.perf_counter()
+
+    # Generated files go to a scratch directory so Result/ and the config files are left alone
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        try:
+            results = run(args.sizes, args.repeat)
+        finally:
+            os.chdir(cwd)
+
+    report = {
+        "revision": git_revision(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "seconds": time.perf_counter() - started,
+        "results": results,
+    }
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=4)
+    print(f"Results written to '{output}'", file=sys.stderr)
+    if baseline:
+        compare(results, baseline)
+
+if __name__ == "__main__":
+    main()
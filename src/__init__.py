@@ -1,2 +1,9 @@
-from .view import MainWindow
-from .controller import MainController
\ No newline at end of file
+# The GUI is imported on first use so the data layer and the CLI can run without PyQt
+def __getattr__(name):
+    if name == "MainWindow":
+        from .view import MainWindow
+        return MainWindow
+    if name == "MainController":
+        from .controller import MainController
+        return MainController
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
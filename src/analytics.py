@@ -0,0 +1,222 @@
+import time
+import threading
+from src.columns import StringPool
+from src.file_manager import TAB_NAMES, month_files, month_signature
+from src.sidecar import read_month_columns
+from src.utils import AddRowError, LoadError
+
+# NumPy is optional and imported on first use; without it the Analytics tab only shows how to install it
+np = None
+
+ANALYTICS_GROUPS = ["Day", "Week", "Month", "Category", "Method"]
+PERIOD_HEADER = ["Period", "Count", *TAB_NAMES, "Net", "Running Balance", "Moving Average", "Change"]
+NAME_HEADER = ["Tab", "Name", "Count", "Total", "Share", "Monthly Average"]
+INVALID_DAY = -2 ** 63
+
+def load_numpy():
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            return False
+        np = numpy
+    return True
+
+def date_days(values):
+    # Days since 1970-01-01 for each date string, with INVALID_DAY for dates that do not parse
+    try:
+        return np.array(values, dtype="datetime64[D]").astype(np.int64)
+    except ValueError:
+        days = []
+        for value in values:
+            try:
+                days.append(np.datetime64(value, "D").astype(np.int64))
+            except ValueError:
+                days.append(INVALID_DAY)
+        return np.array(days, dtype=np.int64)
+
+def group_sum(keys, *values):
+    # Sorted unique keys with the row count and the sum of each value array per key
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    if not len(keys):
+        return keys, np.zeros(0, dtype=np.int64), *(np.zeros(0, dtype=np.int64) for _ in values)
+    starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+    counts = np.diff(np.append(starts, len(keys)))
+    return keys[starts], counts, *(np.add.reduceat(value[order], starts) for value in values)
+
+def moving_average(values, window):
+    # Mean of the last window values, over fewer values at the start
+    sums = np.cumsum(values, dtype=np.float64)
+    averages = sums.copy()
+    averages[window:] = sums[window:] - sums[:-window]
+    return averages / np.minimum(np.arange(1, len(values) + 1), window)
+
+def selection_key(values):
+    return None if values is None else tuple(sorted(values))
+
+class MonthArrays:
+    def __init__(self, signature, tab, days, amounts, categories, methods) -> None:
+        self.signature = signature
+        self.tab = tab
+        self.days = days
+        self.amounts = amounts
+        self.categories = categories
+        self.methods = methods
+
+class AnalyticsStore:
+    # Month files as NumPy arrays: dates as days, int64 amounts and category and method codes shared by all months.
+    # A file is converted again only when its signature changes, and computed tables are cached until then.
+    def __init__(self, root="Result") -> None:
+        self.root = root
+        self.lock = threading.Lock()
+        self.months = {}
+        self.categories = StringPool()
+        self.methods = StringPool()
+        self.version = 0
+        self.datasets = {}
+        self.results = {}
+
+    def invalidate(self, path=None):
+        # Called after a month file is saved; without a path everything is reloaded
+        with self.lock:
+            if path is None:
+                self.months.clear()
+            else:
+                self.months.pop(path, None)
+            self.version += 1
+
+    def read_month(self, path, tab_name, signature):
+        strings, dates, categories, methods, descriptions, amounts = read_month_columns(path)
+        # The pool also holds categories and methods, so only the codes used as dates are converted
+        dates = np.frombuffer(dates, dtype=np.uint32)
+        codes = np.unique(dates)
+        code_days = np.full(len(strings.values), INVALID_DAY, dtype=np.int64)
+        code_days[codes] = date_days([strings.values[code] for code in codes.tolist()])
+        days = code_days[dates]
+        valid = days != INVALID_DAY
+        return MonthArrays(
+            signature,
+            TAB_NAMES.index(tab_name),
+            days[valid],
+            np.frombuffer(amounts, dtype=np.int64)[valid],
+            self.shared_codes(strings, np.frombuffer(categories, dtype=np.uint32), self.categories)[valid],
+            self.shared_codes(strings, np.frombuffer(methods, dtype=np.uint32), self.methods)[valid],
+        )
+
+    def shared_codes(self, strings, codes, pool):
+        # Maps the codes of a month file to the codes shared by all months
+        mapping = np.zeros(len(strings.values), dtype=np.int32)
+        for code in np.unique(codes).tolist():
+            mapping[code] = pool.code(strings.values[code])
+        return mapping[codes]
+
+    def refresh(self, years, tabs):
+        paths = set()
+        for year, month, tab_name, path in month_files(self.root):
+            if tab_name not in TAB_NAMES or (years is not None and year not in years):
+                continue
+            if tabs is not None and tab_name not in tabs:
+                continue
+            paths.add(path)
+            signature = month_signature(path)
+            cached = self.months.get(path)
+            if cached is not None and cached.signature == signature:
+                continue
+            try:
+                self.months[path] = self.read_month(path, tab_name, signature)
+            except (OSError, ValueError, LoadError, AddRowError):
+                self.months.pop(path, None)
+            self.version += 1
+        return sorted(paths)
+
+    def dataset(self, years=None, tabs=None):
+        # Concatenated arrays of the selected months: (tab, days, amounts, categories, methods)
+        paths = self.refresh(years, tabs)
+        key = (selection_key(years), selection_key(tabs))
+        cached = self.datasets.get(key)
+        if cached is not None and cached[0] == self.version:
+            return cached[1]
+
+        months = [self.months[path] for path in paths if path in self.months]
+        empty = np.zeros(0, dtype=np.int64)
+        data = (
+            np.concatenate([np.full(len(month.amounts), month.tab, dtype=np.int8) for month in months]) if months else empty.astype(np.int8),
+            np.concatenate([month.days for month in months]) if months else empty,
+            np.concatenate([month.amounts for month in months]) if months else empty,
+            np.concatenate([month.categories for month in months]) if months else empty.astype(np.int32),
+            np.concatenate([month.methods for month in months]) if months else empty.astype(np.int32),
+        )
+        self.datasets[key] = (self.version, data)
+        return data
+
+    def compute(self, group, years=None, tabs=None, window=7):
+        # Returns (header, rows, row count, seconds); rows are ready for a table widget
+        if not load_numpy():
+            raise LoadError("The analytics need NumPy.")
+        with self.lock:
+            started = time.perf_counter()
+            data = self.dataset(years, tabs)
+            key = (group, selection_key(years), selection_key(tabs), window)
+            cached = self.results.get(key)
+            if cached is None or cached[0] != self.version:
+                header, rows = (self.name_rows if group in ("Category", "Method") else self.period_rows)(group, data, window)
+                cached = self.results[key] = (self.version, header, rows)
+            return cached[1], cached[2], len(data[2]), time.perf_counter() - started
+
+    def period_rows(self, group, data, window):
+        tab, days, amounts, categories, methods = data
+        if group == "Day":
+            keys = days
+        elif group == "Week":
+            # Weeks start on Monday; 1970-01-01 was a Thursday
+            keys = days - (days + 3) % 7
+        else:
+            keys = days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+
+        per_tab = [np.where(tab == i, amounts, 0) for i in range(len(TAB_NAMES))]
+        keys, counts, income, expenses, savings = group_sum(keys, *per_tab)
+        net = income - expenses - savings
+        balance = np.cumsum(net)
+        average = moving_average(net, max(1, window))
+        change = np.diff(net, prepend=net[:1])
+
+        if group == "Month":
+            labels = np.datetime_as_string(keys.astype("datetime64[M]"))
+        else:
+            labels = np.datetime_as_string(keys.astype("datetime64[D]"))
+        columns = [labels.tolist(), counts.tolist(), income.tolist(), expenses.tolist(), savings.tolist(), net.tolist(), balance.tolist(), np.round(average, 1).tolist(), change.tolist()]
+        return PERIOD_HEADER, [list(row) for row in zip(*columns)]
+
+    def name_rows(self, group, data, window):
+        tab, days, amounts, categories, methods = data
+        codes, names = (categories, self.categories.values) if group == "Category" else (methods, self.methods.values)
+        keys, counts, totals = group_sum(tab.astype(np.int64) * len(names) + codes, amounts)
+        key_tabs, key_codes = np.divmod(keys, max(1, len(names)))
+
+        # Shares and averages are within each tab
+        tab_totals = np.bincount(key_tabs, weights=totals, minlength=len(TAB_NAMES)) if len(keys) else np.zeros(len(TAB_NAMES))
+        shares = np.divide(totals * 100.0, tab_totals[key_tabs], out=np.zeros(len(keys)), where=tab_totals[key_tabs] != 0)
+        month_counts = np.zeros(len(TAB_NAMES), dtype=np.int64)
+        if len(days):
+            # Months with entries per tab, from the distinct (tab, month) pairs
+            months = days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+            months -= months.min()
+            span = months.max() + 1
+            month_counts = np.bincount(np.unique(tab.astype(np.int64) * span + months) // span, minlength=len(TAB_NAMES))
+        averages = totals / np.maximum(month_counts[key_tabs], 1)
+
+        rows = [
+            [TAB_NAMES[tab_code], names[code], count, total, round(share, 1), round(average, 1)]
+            for tab_code, code, count, total, share, average in zip(key_tabs.tolist(), key_codes.tolist(), counts.tolist(), totals.tolist(), shares.tolist(), averages.tolist())
+        ]
+        return NAME_HEADER, rows
+
+_analytics_store = None
+
+def get_analytics_store():
+    global _analytics_store
+    if _analytics_store is None:
+        _analytics_store = AnalyticsStore()
+    return _analytics_store
@@ -0,0 +1,57 @@
+import os
+import json
+import threading
+from src.file_manager import atomic_write, month_signature
+
+AUTOSAVE_DIRECTORY = os.path.join("Result", ".autosave")
+
+def source_signature(source):
+    # Size and mtime of a month file and its journal; sources that are not files are not checked
+    return month_signature(source) if os.path.isfile(source or "") else None
+
+class AutosaveStore:
+    # One recovery file per tab holding the unsaved changes as journal records against the loaded month.
+    # Writes come from worker threads, so a write older than the latest write or removal is dropped.
+    def __init__(self, directory=AUTOSAVE_DIRECTORY) -> None:
+        self.directory = directory
+        self.lock = threading.Lock()
+        self.versions = {}
+
+    def path(self, tab_name):
+        return os.path.join(self.directory, f"{tab_name}.json")
+
+    def write(self, tab_name, version, data):
+        with self.lock:
+            if version < self.versions.get(tab_name, 0):
+                return False
+            self.versions[tab_name] = version
+            os.makedirs(self.directory, exist_ok=True)
+            with atomic_write(self.path(tab_name)) as file:
+                json.dump(data, file, ensure_ascii=False, separators=(",", ":"))
+            return True
+
+    def read(self, tab_name):
+        path = self.path(tab_name)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+        except (json.JSONDecodeError, IOError):
+            return None
+        return data if isinstance(data, dict) and "records" in data else None
+
+    def remove(self, tab_name, version):
+        with self.lock:
+            self.versions[tab_name] = max(version, self.versions.get(tab_name, 0))
+            path = self.path(tab_name)
+            if os.path.exists(path):
+                os.remove(path)
+
+_autosave_store = None
+
+def get_autosave_store():
+    global _autosave_store
+    if _autosave_store is None:
+        _autosave_store = AutosaveStore()
+    return _autosave_store
@@ -0,0 +1,211 @@
+import sys
+import csv
+import argparse
+from datetime import datetime
+from src.columns import HEADER, ColumnTable, validate_rows
+from src.expression import evaluate_amount
+from src.file_manager import TAB_NAMES, month_files
+from src.importer import DATE_FORMATS, import_csv, parse_date
+from src.sidecar import read_month_values
+from src.storage import get_storage
+from src.utils import AddRowError, DateError, ExpressionError, LoadError, SaveError
+
+class ConsoleLog:
+    # Stands in for the log widget; messages go to stderr so stdout stays machine readable
+    def __init__(self, quiet=False) -> None:
+        self.quiet = quiet
+
+    def append(self, message, **fields):
+        if not self.quiet:
+            print(message, file=sys.stderr)
+
+def parse_month(value):
+    # Accepts YYYY-MM or a full date
+    try:
+        return datetime.strptime(value[:7], "%Y-%m").strftime("%Y-%m-01")
+    except ValueError:
+        raise DateError(f"Invalid month: {value}")
+
+def require_csv(storage, command):
+    # These commands work on the month files under Result/, which other backends do not keep up to date
+    if storage.name != "csv":
+        raise LoadError(f"{command} the month files, so they need the csv storage backend.")
+
+def load_table(storage, tab_name, date, log):
+    table = ColumnTable()
+    table.set_columns(*storage.load_columns(tab_name, date, log))
+    table.mark_clean(storage.source(tab_name, date))
+    return table
+
+def read_entries(args):
+    # A single entry from the arguments, or CSV rows (date, category, method, description, amount) from a file or stdin
+    if args.file is None:
+        if None in (args.date, args.category, args.method, args.description, args.amount):
+            raise AddRowError("You must fill in all the fields.")
+        return [[args.date, args.category, args.method, args.description, args.amount]]
+    file = sys.stdin if args.file == "-" else open(args.file, "r", newline="", encoding="utf-8-sig")
+    try:
+        rows = [row for row in csv.reader(file) if row]
+    finally:
+        if file is not sys.stdin:
+            file.close()
+    if rows and rows[0][:5] == HEADER:
+        rows = rows[1:]
+    return rows
+
+def run_add(args, storage, log):
+    entries = read_entries(args)
+    if not entries:
+        log.append("There are no entries to add.")
+        return 0
+
+    rows = []
+    for entry in entries:
+        if len(entry) < 5 or not all(value.strip() for value in entry[:5]):
+            raise AddRowError(f"You must fill in all the fields: {entry}")
+        date, category, method, description, amount = (value.strip() for value in entry[:5])
+        rows.append([parse_date(date, DATE_FORMATS[:1]), category, method, description, evaluate_amount(amount)])
+
+    # Entries are grouped by month so each month file is loaded and saved once
+    months = {}
+    for row in rows:
+        months.setdefault(row[0][:7], []).append(row)
+    for month, month_rows in months.items():
+        date = month_rows[0][0]
+        table = load_table(storage, args.tab, date, log)
+        table.append_rows(validate_rows(month_rows, table.month_key))
+        storage.save_month(args.tab, date, table, log)
+    log.append(f"Added {len(rows)} entries to {args.tab}.")
+    return 0
+
+def run_list(args, storage, log):
+    table = load_table(storage, args.tab, parse_month(args.month), log)
+    writer = csv.writer(sys.stdout, lineterminator="\n")
+    writer.writerow(HEADER)
+    for row in range(table.rowCount()):
+        writer.writerow(table.row_values(row))
+    return 0
+
+def run_import(args, storage, log):
+    require_csv(storage, "Imports write")
+    stats = import_csv(args.path, args.tab, log, default_category=args.category, default_method=args.method)
+    return 1 if stats["rejected"] and args.strict else 0
+
+def run_export(args, storage, log):
+    require_csv(storage, "Exports read")
+    output = sys.stdout if args.output == "-" else open(args.output, "w", newline="", encoding="utf-8")
+    try:
+        writer = csv.writer(output, lineterminator="\n")
+        writer.writerow(["Tab"] + HEADER)
+        tabs = [args.tab] if args.tab else TAB_NAMES
+        for year, month, tab_name, path in month_files():
+            if year != args.year or tab_name not in tabs:
+                continue
+            for row in read_month_values(path):
+                writer.writerow([tab_name] + row)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    return 0
+
+def run_summary(args, storage, log):
+    from src.summary import SummaryIndex
+
+    require_csv(storage, "Summaries read")
+    result = SummaryIndex().aggregate([args.tab] if args.tab else None, [args.year] if args.year else None)
+    writer = csv.writer(sys.stdout, lineterminator="\n")
+    if args.by == "month":
+        writer.writerow(["Year", "Month", "Tab", "Count", "Total"])
+        writer.writerows(result["months"])
+    elif args.by == "tab":
+        writer.writerow(["Tab", "Count", "Total"])
+        writer.writerows([tab_name, *totals] for tab_name, totals in sorted(result["tabs"].items()))
+    else:
+        group = "categories" if args.by == "category" else "methods"
+        writer.writerow(["Tab", args.by.capitalize(), "Count", "Total"])
+        writer.writerows([*key, *totals] for key, totals in sorted(result[group].items()))
+    return 0
+
+def run_report(args, storage, log):
+    from src.report import export_report
+
+    require_csv(storage, "Reports read")
+    paths = export_report(log, args.output, [args.year] if args.year else None, [args.tab] if args.tab else None, args.jobs)
+    for path in paths:
+        print(path)
+    return 0
+
+def run_search(args, storage, log):
+    from src.search import get_search_index
+
+    require_csv(storage, "Searches read")
+    index = get_search_index()
+    index.refresh()
+    results = index.search(" ".join(args.query), [args.tab] if args.tab else None, args.limit)
+    writer = csv.writer(sys.stdout, lineterminator="\n")
+    writer.writerow(["Tab"] + HEADER)
+    writer.writerows([tab_name] + row for year, month, tab_name, row in results)
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m src", description="AccountBook command line interface")
+    parser.add_argument("-q", "--quiet", action="store_true", help="do not print log messages")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add = commands.add_parser("add", help="add entries to a month file")
+    add.add_argument("tab", choices=TAB_NAMES)
+    add.add_argument("date", nargs="?")
+    add.add_argument("category", nargs="?")
+    add.add_argument("method", nargs="?")
+    add.add_argument("description", nargs="?")
+    add.add_argument("amount", nargs="?", help="a number or an arithmetic expression")
+    add.add_argument("-f", "--file", help="read entries as CSV rows from a file, '-' for stdin")
+    add.set_defaults(run=run_add)
+
+    list_command = commands.add_parser("list", help="print the entries of a month as CSV")
+    list_command.add_argument("tab", choices=TAB_NAMES)
+    list_command.add_argument("month", help="YYYY-MM")
+    list_command.set_defaults(run=run_list)
+
+    import_command = commands.add_parser("import", help="import a bank statement CSV")
+    import_command.add_argument("tab", choices=TAB_NAMES)
+    import_command.add_argument("path")
+    import_command.add_argument("--category", default="Other", help="category for rows without one")
+    import_command.add_argument("--method", default="Other", help="method for rows without one")
+    import_command.add_argument("--strict", action="store_true", help="exit with status 1 when rows were rejected")
+    import_command.set_defaults(run=run_import)
+
+    export = commands.add_parser("export", help="export the entries of a year as CSV")
+    export.add_argument("year", help="YYYY")
+    export.add_argument("--tab", choices=TAB_NAMES)
+    export.add_argument("-o", "--output", default="-", help="output file, '-' for stdout")
+    export.set_defaults(run=run_export)
+
+    summary = commands.add_parser("summary", help="print totals from the summary index")
+    summary.add_argument("--tab", choices=TAB_NAMES)
+    summary.add_argument("--year")
+    summary.add_argument("--by", choices=["month", "tab", "category", "method"], default="month")
+    summary.set_defaults(run=run_summary)
+
+    report = commands.add_parser("report", help="write yearly entries, balance and category CSVs")
+    report.add_argument("--tab", choices=TAB_NAMES)
+    report.add_argument("--year")
+    report.add_argument("-o", "--output", default="Reports", help="output directory")
+    report.add_argument("-j", "--jobs", type=int, help="worker processes, the number of CPUs by default")
+    report.set_defaults(run=run_report)
+
+    search = commands.add_parser("search", help="find entries of all saved months by description, category or method")
+    search.add_argument("query", nargs="+")
+    search.add_argument("--tab", choices=TAB_NAMES)
+    search.add_argument("--limit", type=int, default=100)
+    search.set_defaults(run=run_search)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    log = ConsoleLog(args.quiet)
+    try:
+        return args.run(args, get_storage(), log)
+    except (AddRowError, DateError, ExpressionError, LoadError, SaveError, OSError) as e:
+        print(f"{type(e).__name__}: {e}", file=sys.stderr)
+        return 1
@@ -0,0 +1,411 @@
+from array import array
+from bisect import bisect_left
+from src.utils import AddRowError
+
+# Columns of the month files; tables add a Delete column for the checkboxes
+HEADER = ["Date", "Category", "Method", "Description", "Amount"]
+
+AMOUNT_MIN, AMOUNT_MAX = -2 ** 63, 2 ** 63 - 1
+
+def parse_amount(value):
+    amount = int(value)
+    if not AMOUNT_MIN <= amount <= AMOUNT_MAX:
+        raise ValueError(f"Amount out of range: {value}")
+    return amount
+
+def month_key(date):
+    return tuple(date.split("-")[:2])
+
+class StringPool:
+    def __init__(self) -> None:
+        self.values = []
+        self.codes = {}
+
+    def code(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.codes[value] = code
+            self.values.append(value)
+        return code
+
+def build_columns(rows, strings, amount_texts=None):
+    # amount_texts, when given, collects amounts that are not whole numbers by row position
+    # instead of rejecting them; their amount column holds 0
+    code = strings.code
+    dates, categories, methods, descriptions, amounts = array("I"), array("I"), array("I"), [], array("q")
+    for date, category, method, description, amount in rows:
+        try:
+            amounts.append(parse_amount(amount))
+        except ValueError:
+            if amount_texts is None:
+                raise AddRowError(f"Invalid amount: {amount}")
+            amount_texts[len(amounts)] = amount
+            amounts.append(0)
+        dates.append(code(date))
+        categories.append(code(category))
+        methods.append(code(method))
+        descriptions.append(description)
+    return dates, categories, methods, descriptions, amounts
+
+def validate_rows(rows, table_key):
+    # Validate against the year and month of the table data in a single pass
+    values = []
+    for row in rows:
+        if len(row) < 5:
+            raise AddRowError(f"The row does not have enough columns: {row}")
+        date, category, method, description, amount = row
+        input_key = month_key(date)
+        if table_key is None:
+            table_key = input_key
+        elif input_key != table_key:
+            raise AddRowError("The year and month of the entry must match the table data.")
+        category = ", ".join(category) if type(category) is list else category
+        values.append((date, category, method, description, str(amount)))
+    return values
+
+def prepare_columns(rows, amount_texts=None):
+    # Builds the columns of a loaded month; the first row is the header
+    values = validate_rows((row[:5] for row in rows[1:] if row), None)
+    strings = StringPool()
+    return (strings, *build_columns(values, strings, amount_texts))
+
+class ChangeTracker:
+    # Rows loaded from the source keep their load position as id, rows added later get ids after them.
+    # Edited rows remember the hashes of their original cells, so an edit that is reverted counts as clean.
+    def __init__(self, count=0) -> None:
+        self.row_ids = array("Q", range(count))
+        self.original_count = count
+        self.next_id = count
+        self.original_hashes = {}
+        self.edited_ids = set()
+        self.deleted_ids = set()
+        self.inserted_ids = set()
+
+    def is_original(self, row_id):
+        return row_id < self.original_count
+
+    def insert(self, first, count, ids=None):
+        if ids is None:
+            ids = range(self.next_id, self.next_id + count)
+            self.next_id += count
+        for row_id in ids:
+            if self.is_original(row_id):
+                self.deleted_ids.discard(row_id)
+            else:
+                self.inserted_ids.add(row_id)
+        self.row_ids[first:first] = array("Q", ids)
+
+    def remove(self, first, count):
+        ids = list(self.row_ids[first:first + count])
+        del self.row_ids[first:first + count]
+        for row_id in ids:
+            if self.is_original(row_id):
+                self.deleted_ids.add(row_id)
+            else:
+                self.inserted_ids.discard(row_id)
+        return ids
+
+    def before_edit(self, row, hashes):
+        row_id = self.row_ids[row]
+        if self.is_original(row_id) and row_id not in self.original_hashes:
+            self.original_hashes[row_id] = hashes
+
+    def after_edit(self, row, hashes):
+        row_id = self.row_ids[row]
+        if not self.is_original(row_id):
+            return
+        if hashes == self.original_hashes[row_id]:
+            self.edited_ids.discard(row_id)
+        else:
+            self.edited_ids.add(row_id)
+
+    def has_edits(self):
+        return any(row_id not in self.deleted_ids for row_id in self.edited_ids)
+
+    def has_inserts(self):
+        return bool(self.inserted_ids)
+
+    def has_deletes(self):
+        return bool(self.deleted_ids)
+
+class Columns:
+    DATE, CATEGORY, METHOD, DESCRIPTION, AMOUNT, DELETE = range(6)
+
+    def column(self, col):
+        return (self.dates, self.categories, self.methods, self.descriptions, self.amounts)[col]
+
+    def amount_value(self, row):
+        # Amounts that were not whole numbers in the loaded file keep their text
+        if self.amount_texts:
+            text = self.amount_texts.get(self.row_id(row))
+            if text is not None:
+                return text
+        return str(self.amounts[row])
+
+    def value(self, row, col):
+        if col == self.AMOUNT:
+            return self.amount_value(row)
+        if col == self.DESCRIPTION:
+            return self.descriptions[row]
+        return self.strings.values[self.column(col)[row]]
+
+    def row_values(self, row):
+        strings = self.strings.values
+        return [
+            strings[self.dates[row]],
+            strings[self.categories[row]],
+            strings[self.methods[row]],
+            self.descriptions[row],
+            self.amount_value(row),
+        ]
+
+    def journal_records(self):
+        # Records against the source rows: cell updates first, then deletes from the end, then appended rows
+        updated, deleted, inserted = self.changed_rows()
+        records = [["U", row_id, col, values[col]] for row_id, values, cols in updated for col in cols]
+        records += [["D", row_id] for row_id in reversed(deleted)]
+        first = self.original_count - len(deleted)
+        records += [["I", first + i, *values] for i, values in enumerate(inserted)]
+        return records
+
+class TableSnapshot(Columns):
+    def __init__(self, model) -> None:
+        # Copies of the columns that a worker thread can read while the model stays on the GUI thread
+        self.header = model.header
+        self.strings = StringPool()
+        self.strings.values = list(model.strings.values)
+        self.dates = array("I", model.dates)
+        self.categories = array("I", model.categories)
+        self.methods = array("I", model.methods)
+        self.descriptions = list(model.descriptions)
+        self.amounts = array("q", model.amounts)
+        self.amount_texts = {row: model.amount_texts[row_id] for row, row_id in enumerate(model.tracker.row_ids) if row_id in model.amount_texts} if model.amount_texts else {}
+        self.source_path = model.source_path
+        self.original_count = model.original_count
+        self.changed = model.changed_rows()
+
+    def rowCount(self):
+        return len(self.amounts)
+
+    def row_id(self, row):
+        return row
+
+    def changed_rows(self):
+        return self.changed
+
+    def mark_clean(self, path):
+        self.source_path = path
+        self.original_count = self.rowCount()
+        self.changed = ([], [], [])
+
+class ColumnTable(Columns):
+    HEADER = HEADER + ["Delete"]
+
+    def __init__(self, header=HEADER) -> None:
+        self.header = header
+        self.init_columns()
+
+    def init_columns(self):
+        # Dates, categories and methods repeat a lot, so they are stored as codes into a shared pool
+        self.strings = StringPool()
+        self.dates = array("I")
+        self.categories = array("I")
+        self.methods = array("I")
+        self.descriptions = []
+        self.amounts = array("q")
+        self.month_key = None
+
+        # Text of the amounts that did not load as numbers by row id, and those of the source rows for undo
+        self.amount_texts = {}
+        self.source_amount_texts = {}
+
+        # Changes since the rows were loaded from source_path
+        self.source_path = None
+        self.tracker = ChangeTracker()
+
+    # Row change notifications, used by the Qt model to keep its views in sync
+    def begin_insert_rows(self, first, last):
+        pass
+
+    def end_insert_rows(self):
+        pass
+
+    def begin_remove_rows(self, first, last):
+        pass
+
+    def end_remove_rows(self):
+        pass
+
+    def begin_reset(self):
+        pass
+
+    def end_reset(self):
+        pass
+
+    @property
+    def original_count(self):
+        return self.tracker.original_count
+
+    def rowCount(self):
+        return len(self.amounts)
+
+    def row_id(self, row):
+        return self.tracker.row_ids[row]
+
+    def set_value(self, row, col, value):
+        if value == self.value(row, col):
+            return False
+        self.tracker.before_edit(row, self.cell_hashes(row))
+
+        if col == self.AMOUNT:
+            row_id = self.row_id(row)
+            try:
+                self.amounts[row] = parse_amount(value)
+            except ValueError:
+                # Text that is not a number can only be put back where it was loaded, by undo
+                if self.source_amount_texts.get(row_id) != value:
+                    return False
+                self.amounts[row] = 0
+                self.amount_texts[row_id] = value
+            else:
+                self.amount_texts.pop(row_id, None)
+        elif col == self.DESCRIPTION:
+            self.descriptions[row] = value
+        elif col == self.DATE:
+            # Every row of a table belongs to the same year and month
+            if month_key(value) != self.month_key:
+                if len(self.amounts) > 1:
+                    return False
+                self.month_key = month_key(value)
+            self.dates[row] = self.strings.code(value)
+        else:
+            self.column(col)[row] = self.strings.code(value)
+
+        self.tracker.after_edit(row, self.cell_hashes(row))
+        return True
+
+    def cell_hashes(self, row):
+        return tuple(hash(value) for value in self.row_values(row))
+
+    def insert_rows(self, first, rows, ids=None):
+        # Rows put back with their ids, by undo, keep amounts that were loaded as text
+        texts = {} if ids is not None else None
+        dates, categories, methods, descriptions, amounts = build_columns(rows, self.strings, texts)
+        if not amounts:
+            return
+
+        count = len(amounts)
+        self.begin_insert_rows(first, first + count - 1)
+        self.dates[first:first] = dates
+        self.categories[first:first] = categories
+        self.methods[first:first] = methods
+        self.descriptions[first:first] = descriptions
+        self.amounts[first:first] = amounts
+        self.month_key = month_key(self.strings.values[dates[0]])
+        self.tracker.insert(first, count, ids)
+        for position, text in (texts or {}).items():
+            self.amount_texts[ids[position]] = text
+        self.end_insert_rows()
+
+    def append_rows(self, rows):
+        self.insert_rows(len(self.amounts), rows)
+
+    def set_columns(self, columns, amount_texts=None):
+        self.begin_reset()
+        self.init_columns()
+        self.strings, self.dates, self.categories, self.methods, self.descriptions, self.amounts = columns
+        self.amount_texts = dict(amount_texts or {})
+        self.source_amount_texts = dict(self.amount_texts)
+        if self.amounts:
+            self.month_key = month_key(self.strings.values[self.dates[0]])
+        self.tracker = ChangeTracker(len(self.amounts))
+        self.end_reset()
+
+    def set_rows(self, rows):
+        strings = StringPool()
+        self.set_columns((strings, *build_columns(rows, strings)))
+
+    def remove_rows(self, first, count):
+        last = first + count
+        rows = [self.row_values(row) for row in range(first, last)]
+        self.begin_remove_rows(first, last - 1)
+        del self.dates[first:last]
+        del self.categories[first:last]
+        del self.methods[first:last]
+        del self.descriptions[first:last]
+        del self.amounts[first:last]
+        if not self.amounts:
+            self.month_key = None
+        ids = self.tracker.remove(first, count)
+        self.end_remove_rows()
+        return rows, ids
+
+    def changed_rows(self):
+        # Returns (updated rows with their changed columns, deleted source rows, inserted rows)
+        tracker = self.tracker
+        deleted = sorted(tracker.deleted_ids)
+        updated = []
+        for row_id in sorted(tracker.edited_ids - tracker.deleted_ids):
+            # Source rows keep their order and added rows come after them
+            row = row_id - bisect_left(deleted, row_id)
+            hashes = self.cell_hashes(row)
+            original = tracker.original_hashes[row_id]
+            updated.append((row_id, self.row_values(row), [col for col in range(self.DELETE) if hashes[col] != original[col]]))
+        first = tracker.original_count - len(deleted)
+        inserted = [self.row_values(row) for row in range(first, len(self.amounts))]
+        return updated, deleted, inserted
+
+    def sort_keys(self, col):
+        # Keys that order the rows of a column: amounts as numbers, text case-insensitively.
+        # Pooled columns compare the rank of each distinct value instead of the strings.
+        if col == self.AMOUNT:
+            return self.amounts
+        if col == self.DESCRIPTION:
+            return [description.casefold() for description in self.descriptions]
+        values = self.strings.values
+        ranks = [0] * len(values)
+        for rank, code in enumerate(sorted(range(len(values)), key=lambda code: values[code].casefold())):
+            ranks[code] = rank
+        return [ranks[code] for code in self.column(col)]
+
+    def filter_rows(self, category=None, method=None, min_amount=None, max_amount=None, text="", folded=None):
+        # Rows matching every given filter. A row with several categories matches any of them.
+        # folded may hold the sort keys of the description column, to skip case folding.
+        rows = range(len(self.amounts))
+        values = self.strings.values
+        if category:
+            codes = {code for code, value in enumerate(values) if category in value.split(", ")}
+            rows = [row for row in rows if self.categories[row] in codes]
+        if method:
+            code = self.strings.codes.get(method)
+            rows = [row for row in rows if self.methods[row] == code]
+        if min_amount is not None:
+            rows = [row for row in rows if self.amounts[row] >= min_amount]
+        if max_amount is not None:
+            rows = [row for row in rows if self.amounts[row] <= max_amount]
+        if text:
+            text = text.casefold()
+            folded = folded or self.sort_keys(self.DESCRIPTION)
+            rows = [row for row in rows if text in folded[row]]
+        return list(rows)
+
+    def is_dirty(self):
+        return self.tracker.has_edits() or self.tracker.has_inserts() or self.tracker.has_deletes()
+
+    def mark_clean(self, path):
+        self.source_path = path
+        if self.amount_texts:
+            # Row ids start over from the saved positions
+            row_ids = self.tracker.row_ids
+            self.amount_texts = {row: self.amount_texts[row_id] for row, row_id in enumerate(row_ids) if row_id in self.amount_texts}
+        self.source_amount_texts = dict(self.amount_texts)
+        self.tracker = ChangeTracker(len(self.amounts))
+
+    def snapshot(self):
+        return TableSnapshot(self)
+
+    def clear(self):
+        self.begin_reset()
+        self.init_columns()
+        self.end_reset()
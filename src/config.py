@@ -0,0 +1,61 @@
+from src.file_manager import file_signature, load_from_json, save_to_json
+from src.utils import LoadError
+
+CATEGORY_FILE = "categories.json"
+METHOD_FILE = "methods.json"
+
+class ConfigStore:
+    # Process-wide cache of the JSON config files, shared by all tabs.
+    # A file is parsed again only when its size or mtime changes.
+    def __init__(self) -> None:
+        self.files = {}
+        self.listeners = []
+
+    def subscribe(self, listener):
+        # listener(path, key, items) is called whenever the items of a key change
+        self.listeners.append(listener)
+
+    def notify(self, path, key, items):
+        for listener in self.listeners:
+            listener(path, key, items)
+
+    def load(self, path):
+        signature = file_signature(path)
+        cached = self.files.get(path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+        try:
+            data = load_from_json(path)
+        finally:
+            # A broken file is reported once and then treated as empty until it changes
+            self.files[path] = (signature, {})
+        self.files[path] = (signature, data)
+
+        # Tell the tabs about changes made to the file outside this process
+        if cached is not None:
+            for key in set(cached[1]) | set(data):
+                if cached[1].get(key) != data.get(key):
+                    self.notify(path, key, data.get(key, []))
+        return data
+
+    def items(self, path, key, default=None):
+        return list(self.load(path).get(key, default or []))
+
+    def save(self, path, key, items, log):
+        try:
+            data = dict(self.load(path))
+        except LoadError:
+            data = {}
+        data[key] = list(items)
+        save_to_json(data, path, log)
+        self.files[path] = (file_signature(path), data)
+        self.notify(path, key, data[key])
+
+_config_store = None
+
+def get_config_store():
+    global _config_store
+    if _config_store is None:
+        _config_store = ConfigStore()
+    return _config_store
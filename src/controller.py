@@ -1,38 +1,400 @@
-from PyQt5.QtWidgets import QComboBox, QListWidget, QListWidgetItem, QCheckBox, QTableWidgetItem, QMessageBox
-from PyQt5.QtCore import QState, QStateMachine, pyqtSignal, QObject
+from PyQt5.QtWidgets import QApplication, QDialog, QComboBox, QListWidget, QListWidgetItem, QCheckBox, QMessageBox, QTableWidgetItem, QFileDialog
+from PyQt5.QtCore import QDate, QState, QStateMachine, QTimer, pyqtSignal, QObject
+import os
 import sys
-import re
+import time
 from datetime import datetime
-from src.file_manager import load_from_json, save_to_json, load_from_csv, save_to_csv
+from src.analytics import ANALYTICS_GROUPS, get_analytics_store, load_numpy
+from src.autosave import get_autosave_store, source_signature
+from src.columns import parse_amount
+from src.config import CATEGORY_FILE, METHOD_FILE, get_config_store
+from src.storage import get_storage
+from src.expression import evaluate_amount
+from src.file_manager import TAB_NAMES, month_files
+from src.importer import import_csv, parse_pasted_rows
+from src.profiler import get_profiler, profiled
+from src.search import get_search_index
+from src.summary import SummaryIndex
 from src.table import Table
+from src.worker import Task, start_task
 from src.utils import append_log
-from src.utils import AddClickError, DateError, LoadError, SaveError, AddRowError
+from src.utils import AddClickError, DateError, LoadError, SaveError, AddRowError, ExpressionError
+
+def fill_table(table, rows):
+    table.setRowCount(len(rows))
+    for row, values in enumerate(rows):
+        for col, value in enumerate(values):
+            table.setItem(row, col, QTableWidgetItem(str(value)))
 
 class MainController():
     def __init__(self, view) -> None:
         self.view = view
+        self.autosave = get_autosave_store()
+
+        # A tab and its controller are built when the tab is first shown
+        self.controller_creators = {name: (lambda tab: TabController(view, tab)) for name in view.TAB_NAMES}
+        self.controller_creators["Summary"] = lambda tab: SummaryController(view, tab, view.TAB_NAMES)
+        self.controller_creators["Search"] = lambda tab: SearchController(view, tab, self.tab_controller)
+        self.controller_creators["Analytics"] = lambda tab: AnalyticsController(view, tab)
+        self.controller_creators["Stats"] = lambda tab: StatsController(view, tab)
+
+        self.controllers = {}
+        self.tab_controllers = {}
+        self.view.tabs.currentChanged.connect(self.on_tab_changed)
+        self.on_tab_changed(self.view.tabs.currentIndex())
+
+        # Offer to restore unsaved changes left by a crash once the window is up
+        QTimer.singleShot(0, self.offer_recovery)
+
+    def controller(self, name):
+        if name not in self.controllers:
+            self.controllers[name] = self.controller_creators[name](self.view.build_tab(name))
+            if name in self.view.TAB_NAMES:
+                self.tab_controllers[name] = self.controllers[name]
+        return self.controllers[name]
+
+    def tab_controller(self, name):
+        return self.controller(name) if name in self.view.TAB_NAMES else None
+
+    def on_tab_changed(self, index):
+        if index < 0:
+            return
+        name = self.view.tab_name(index)
+        is_new = name not in self.controllers
+        controller = self.controller(name)
+        # A controller created now missed the tab change it refreshes on
+        if is_new and hasattr(controller, "on_tab_changed"):
+            controller.on_tab_changed(index)
+
+    def offer_recovery(self):
+        # Only tabs with a recovery file are built for it
+        for name in self.view.TAB_NAMES:
+            if os.path.exists(self.autosave.path(name)):
+                self.tab_controller(name).offer_recovery()
+
+class SummaryController():
+    ALL = "All"
+
+    def __init__(self, view, tab, tab_names) -> None:
+        self.view = view
+        self.tab = tab
+        self.index = SummaryIndex()
+
+        self.tab.tab_input.addItems([self.ALL] + tab_names)
+        self.tab.year_input.addItem(self.ALL)
+
+        # Connect refresh button
+        self.tab.refresh_button.clicked.connect(self.handle_refresh_click)
+
+        # Connect report button
+        self.report_task = None
+        self.tab.report_button.clicked.connect(self.handle_report_click)
+
+        # Refresh when the summary tab is shown
+        self.view.tabs.currentChanged.connect(self.on_tab_changed)
+
+    def on_tab_changed(self, index):
+        if self.view.tabs.widget(index) is self.tab.tab:
+            self.handle_refresh_click()
+
+    @profiled("controller.handle_refresh_click")
+    def handle_refresh_click(self):
+        try:
+            self.update_years()
+            tab_name = self.tab.tab_input.currentText()
+            year = self.tab.year_input.currentText()
+            result = self.index.aggregate(
+                tabs=None if tab_name == self.ALL else {tab_name},
+                years=None if year == self.ALL else {year},
+            )
+
+            groups = [(name, "Total", "", count, total) for name, (count, total) in sorted(result["tabs"].items())]
+            for group, label in (("categories", "Category"), ("methods", "Method")):
+                groups += [(name, label, key, count, total) for (name, key), (count, total) in sorted(result[group].items())]
+
+            fill_table(self.tab.month_table, result["months"])
+            fill_table(self.tab.group_table, groups)
+        except Exception as e:
+            QMessageBox.warning(self.view, "Error", f"An unknown error occurred while executing refresh summary: {e}")
+
+    @profiled("controller.handle_report_click")
+    def handle_report_click(self):
+        # The report module pulls in multiprocessing, so it is imported when first used
+        from src.report import REPORT_DIRECTORY, export_report
+
+        try:
+            directory = QFileDialog.getExistingDirectory(self.view, "Export Report", os.path.abspath(REPORT_DIRECTORY))
+            if not directory:
+                return
+            tab_name = self.tab.tab_input.currentText()
+            year = self.tab.year_input.currentText()
+            tabs = None if tab_name == self.ALL else [tab_name]
+            years = None if year == self.ALL else [year]
+
+            # Month files are read by worker processes; the task only waits for them and merges
+            self.report_task = Task("export report", lambda task: export_report(task.log, directory, years, tabs, progress=task.report_progress), cancelable=False)
+            self.report_task.signals.progress.connect(self.tab.report_progress_bar.setValue)
+            self.report_task.signals.finished.connect(self.on_report_finished)
+            self.report_task.signals.failed.connect(self.on_report_failed)
+            self.tab.report_button.setEnabled(False)
+            start_task(self.report_task)
+        except Exception as e:
+            QMessageBox.warning(self.view, "Error", f"An unknown error occurred while executing export report: {e}")
+
+    def on_report_finished(self, paths):
+        self.report_task = None
+        self.tab.report_button.setEnabled(True)
+        self.tab.report_progress_bar.setValue(0)
+        if paths:
+            QMessageBox.information(self.view, "Export Report", f"{len(paths)} report files written to '{os.path.dirname(paths[0])}'.")
+        else:
+            QMessageBox.information(self.view, "Export Report", "There are no month files to report.")
+
+    def on_report_failed(self, error):
+        self.report_task = None
+        self.tab.report_button.setEnabled(True)
+        self.tab.report_progress_bar.setValue(0)
+        QMessageBox.warning(self.view, "Error", f"An unknown error occurred while executing export report: {error}")
+
+    def update_years(self):
+        current = self.tab.year_input.currentText()
+        years = [self.ALL] + self.index.years()
+        self.tab.year_input.blockSignals(True)
+        self.tab.year_input.clear()
+        self.tab.year_input.addItems(years)
+        self.tab.year_input.setCurrentText(current if current in years else self.ALL)
+        self.tab.year_input.blockSignals(False)
+
+
+class SearchController():
+    def __init__(self, view, tab, tab_controller) -> None:
+        self.view = view
+        self.tab = tab
+        self.tab_controller = tab_controller
+        self.index = get_search_index()
+        self.results = []
+        self.task = None
+
+        # Connect search input and button
+        self.tab.search_input.textChanged.connect(self.handle_search_click)
+        self.tab.search_button.clicked.connect(self.handle_search_click)
+
+        # Connect result table
+        self.tab.result_table.cellDoubleClicked.connect(self.handle_result_click)
+
+        # Bring the index up to date with files changed outside the app when the search tab is shown
+        self.view.tabs.currentChanged.connect(self.on_tab_changed)
+
+    def on_tab_changed(self, index):
+        if self.view.tabs.widget(index) is self.tab.tab and self.task is None:
+            self.task = Task("search index refresh", lambda task: self.index.refresh())
+            self.task.signals.finished.connect(self.on_refresh_finished)
+            self.task.signals.failed.connect(self.on_refresh_failed)
+            start_task(self.task)
+
+    def on_refresh_finished(self, result):
+        self.task = None
+        if self.tab.search_input.text().strip():
+            self.handle_search_click()
+
+    def on_refresh_failed(self, error):
+        self.task = None
+        QMessageBox.warning(self.view, "Error", f"An unknown error occurred while updating the search index: {error}")
+
+    @profiled("controller.handle_search_click")
+    def handle_search_click(self):
+        try:
+            started = time.perf_counter()
+            self.results = self.index.search(self.tab.search_input.text())
+            rows = [(tab_name, *row) for year, month, tab_name, row in self.results]
+            fill_table(self.tab.result_table, rows)
+            self.tab.status_label.setText(f"{len(rows)} results in {(time.perf_counter() - started) * 1000:.1f} ms")
+        except Exception as e:
+            QMessageBox.warning(self.view, "Error", f"An unknown error occurred while executing search: {e}")
+
+    @profiled("controller.handle_result_click")
+    def handle_result_click(self, row, col):
+        # Loads the month of the result in its tab through the usual load path
+        year, month, tab_name, values = self.results[row]
+        controller = self.tab_controller(tab_name)
+        if controller is None:
+            return
+        if not controller.load_button_condition():
+            QMessageBox.warning(self.view, "LoadError", f"Save or undo the changes in {tab_name} before loading another month.")
+            return
+        self.view.tabs.setCurrentWidget(controller.tab.tab)
+        controller.tab.date_input.setDate(QDate.fromString(values[0], "yyyy-MM-dd"))
+        controller.handle_load_click()
+
+class AnalyticsController():
+    ALL = "All"
+
+    def __init__(self, view, tab) -> None:
+        self.view = view
+        self.tab = tab
+        self.store = get_analytics_store()
+        self.task = None
+        self.pending = False
+
+        self.tab.tab_input.addItems([self.ALL] + TAB_NAMES)
+        self.tab.group_input.addItems(ANALYTICS_GROUPS)
+        self.tab.group_input.setCurrentText("Month")
+
+        if not load_numpy():
+            self.tab.refresh_button.setEnabled(False)
+            self.tab.status_label.setText("Install NumPy ('pip install numpy') to use the analytics.")
+            return
+
+        # Connect refresh button and the grouping inputs
+        self.tab.refresh_button.clicked.connect(self.handle_refresh_click)
+        self.tab.group_input.currentIndexChanged.connect(self.handle_refresh_click)
+        self.tab.window_input.valueChanged.connect(self.handle_refresh_click)
+
+        # Refresh when the analytics tab is shown
+        self.view.tabs.currentChanged.connect(self.on_tab_changed)
+
+    def on_tab_changed(self, index):
+        # Also called directly when the tab is first built, so the NumPy hint is kept
+        if not load_numpy():
+            return
+        if self.view.tabs.widget(index) is self.tab.tab:
+            self.handle_refresh_click()
+
+    @profiled("controller.handle_analytics_refresh_click")
+    def handle_refresh_click(self):
+        if not load_numpy():
+            return
+        if self.task is not None:
+            # Runs again with the current inputs once the running refresh is done
+            self.pending = True
+            return
+        try:
+            self.update_years()
+            tab_name = self.tab.tab_input.currentText()
+            years = [self.tab.from_year_input.itemText(i) for i in range(self.tab.from_year_input.count())]
+            first, last = sorted((self.tab.from_year_input.currentText(), self.tab.to_year_input.currentText()))
+            years = {year for year in years if first <= year <= last}
+            tabs = None if tab_name == self.ALL else {tab_name}
+            group, window = self.tab.group_input.currentText(), self.tab.window_input.value()
+
+            # Month files are converted to arrays on a worker the first time they are used
+            self.task = Task("analytics", lambda task: self.store.compute(group, years, tabs, window))
+            self.task.signals.finished.connect(self.on_refresh_finished)
+            self.task.signals.failed.connect(self.on_refresh_failed)
+            self.tab.status_label.setText("Computing...")
+            start_task(self.task)
+        except Exception as e:
+            QMessageBox.warning(self.view, "Error", f"An unknown error occurred while executing analytics: {e}")
+
+    def on_refresh_finished(self, result):
+        header, rows, count, seconds = result
+        self.task = None
+        self.tab.result_table.setColumnCount(len(header))
+        self.tab.result_table.setHorizontalHeaderLabels(header)
+        fill_table(self.tab.result_table, rows)
+        self.tab.status_label.setText(f"{count} entries, {len(rows)} rows in {seconds * 1000:.1f} ms")
+        self.run_pending()
+
+    def on_refresh_failed(self, error):
+        self.task = None
+        self.tab.status_label.setText("")
+        QMessageBox.warning(self.view, "Error", f"An unknown error occurred while executing analytics: {error}")
+        self.run_pending()
+
+    def run_pending(self):
+        if self.pending:
+            self.pending = False
+            self.handle_refresh_click()
+
+    def update_years(self):
+        years = sorted({year for year, month, tab_name, path in month_files()})
+        for year_input, default in ((self.tab.from_year_input, years[:1]), (self.tab.to_year_input, years[-1:])):
+            current = year_input.currentText()
+            year_input.blockSignals(True)
+            year_input.clear()
+            year_input.addItems(years)
+            year_input.setCurrentText(current if current in years else (default or [""])[0])
+            year_input.blockSignals(False)
+
+class StatsController():
+    def __init__(self, view, tab) -> None:
+        self.view = view
+        self.tab = tab
+        self.profiler = get_profiler()
+
+        self.tab.enabled_checkbox.setChecked(self.profiler.enabled)
+
+        # Connect profiling switch and buttons
+        self.tab.enabled_checkbox.toggled.connect(self.handle_enabled_toggle)
+        self.tab.refresh_button.clicked.connect(self.handle_refresh_click)
+        self.tab.reset_button.clicked.connect(self.handle_reset_click)
+        self.tab.capture_button.clicked.connect(self.handle_capture_click)
+
+        # Refresh when the stats tab is shown
+        self.view.tabs.currentChanged.connect(self.on_tab_changed)
+
+    def on_tab_changed(self, index):
+        if self.view.tabs.widget(index) is self.tab.tab:
+            self.handle_refresh_click()
+
+    def handle_enabled_toggle(self, checked):
+        self.profiler.enabled = checked
+        self.handle_refresh_click()
+
+    def handle_refresh_click(self):
+        rows = self.profiler.snapshot()
+        fill_table(self.tab.stats_table, [
+            (name, count, f"{total * 1000:.2f}", f"{mean * 1000:.2f}", f"{maximum * 1000:.2f}", ", ".join(f"{key}={value}" for key, value in sorted(counters.items())))
+            for name, count, total, mean, maximum, counters in rows
+        ])
+
+        current = self.tab.capture_input.currentText()
+        self.tab.capture_input.clear()
+        self.tab.capture_input.addItems(sorted(row[0] for row in rows))
+        self.tab.capture_input.setCurrentText(current)
+
+        if not self.profiler.enabled:
+            self.tab.status_label.setText("Profiling is disabled.")
+        elif self.profiler.last_profile:
+            self.tab.status_label.setText(f"Last profile written to '{self.profiler.last_profile}'")
+        else:
+            self.tab.status_label.setText(f"{len(rows)} spans")
 
-        self.income_tab = self.view.tab_obj["Income"]
-        self.expense_tab = self.view.tab_obj["Expenses"]
-        self.saving_tab = self.view.tab_obj["Savings"]
+    def handle_reset_click(self):
+        self.profiler.reset()
+        self.handle_refresh_click()
 
-        TabController(view, self.income_tab)
-        TabController(view, self.expense_tab)
-        TabController(view, self.saving_tab)
+    def handle_capture_click(self):
+        name = self.tab.capture_input.currentText().strip()
+        if not name:
+            return
+        if not self.profiler.enabled:
+            self.tab.enabled_checkbox.setChecked(True)
+        self.profiler.capture_next(name, os.getcwd())
+        self.tab.status_label.setText(f"The next run of '{name}' will be recorded with cProfile.")
 
 class TabController(QObject):
-    CATEGORY_FILE = "categories.json"
-    METHOD_FILE = "methods.json"
+    CATEGORY_FILE = CATEGORY_FILE
+    METHOD_FILE = METHOD_FILE
+    DEFAULT_CATEGORIES = ["Category1", "Category2", "Category3", "Other"]
+    DEFAULT_METHODS = ["Account1", "Account2", "Cash", "Other"]
+    AUTOSAVE_DELAY = 2000
 
     load_button_enabled_signal = pyqtSignal()
+    import_button_enabled_signal = pyqtSignal()
     save_button_enabled_signal = pyqtSignal()
     add_button_enabled_signal = pyqtSignal()
     undo_button_enabled_signal = pyqtSignal()
+    redo_button_enabled_signal = pyqtSignal()
+    cancel_button_enabled_signal = pyqtSignal()
 
     load_button_disabled_signal = pyqtSignal()
+    import_button_disabled_signal = pyqtSignal()
     save_button_disabled_signal = pyqtSignal()
     add_button_disabled_signal = pyqtSignal()
     undo_button_disabled_signal = pyqtSignal()
+    redo_button_disabled_signal = pyqtSignal()
+    cancel_button_disabled_signal = pyqtSignal()
 
     def __init__(self, view, tab):
         super(TabController, self).__init__()
@@ -40,21 +402,41 @@ class TabController(QObject):
         self.tab = tab
         self.name = tab.name
         self.table_obj = Table(self, self.tab.table)
+        self.log = self.tab.log
+        self.storage = get_storage()
+        self.task = None
+        self.loaded_date = None
+
+        # Unsaved changes are written to a recovery file shortly after the last edit
+        self.autosave = get_autosave_store()
+        self.autosave_version = 0
+        self.autosave_task = None
+        self.is_autosaved = False
+        self.pending_recovery = None
+        self.autosave_timer = QTimer(self)
+        self.autosave_timer.setSingleShot(True)
+        self.autosave_timer.setInterval(self.AUTOSAVE_DELAY)
+        self.autosave_timer.timeout.connect(self.run_autosave)
         
-        self.categories = load_from_json(self.view, self.CATEGORY_FILE)
-        self.methods = load_from_json(self.view, self.METHOD_FILE)
+        # Categories and methods are shared by all tabs through the config store
+        self.config = get_config_store()
+        self.config.subscribe(self.on_config_changed)
 
         # Set category items
-        self.tab.category_input.add_items(self.categories.get(self.name, ["Category1", "Category2", "Category3", "Other"]))
+        categories = self.load_items(self.CATEGORY_FILE, self.DEFAULT_CATEGORIES)
+        self.tab.category_input.add_items(categories)
+        self.set_filter_items(self.tab.filter_category_input, categories)
 
         # Set method items
-        self.tab.method_input.addItems(self.methods.get(self.name, ["Account1", "Account2", "Cash", "Other"]))
+        methods = self.load_items(self.METHOD_FILE, self.DEFAULT_METHODS)
+        self.tab.method_input.addItems(methods)
+        self.set_filter_items(self.tab.filter_method_input, methods)
 
         # Connect category edit button
-        self.tab.edit_categories_button.clicked.connect(lambda: self.run_edit(self.tab.category_edit, self.CATEGORY_FILE, self.tab.category_input))
+        self.tab.edit_categories_button.clicked.connect(lambda: self.run_edit(self.tab.edit_window("Category"), self.CATEGORY_FILE))
 
         # Connect method edit button
-        self.tab.edit_methods_button.clicked.connect(lambda: self.run_edit(self.tab.method_edit, self.METHOD_FILE, self.tab.method_input))
+        self.tab.edit_methods_button.clicked.connect(lambda: self.run_edit(self.tab.edit_window("Method"), self.METHOD_FILE))
         
         # Connect load button
         self.tab.load_button.clicked.connect(self.handle_load_click)
@@ -62,36 +444,116 @@ class TabController(QObject):
         # Connect save button
         self.tab.save_button.clicked.connect(self.handle_save_click)
 
+        # Connect import button
+        self.tab.import_button.clicked.connect(self.handle_import_click)
+
         # Connect add button
         self.tab.add_button.clicked.connect(self.handle_add_click)
         
+        # Connect paste button and the paste shortcut of the table
+        self.tab.paste_button.clicked.connect(self.handle_paste_click)
+        self.tab.paste_shortcut.activated.connect(self.handle_clipboard_paste)
+
         # Connect undo button
         self.tab.undo_button.clicked.connect(self.handle_undo_click)
 
+        # Connect redo button
+        self.tab.redo_button.clicked.connect(self.handle_redo_click)
+
+        # Connect cancel button
+        self.tab.cancel_button.clicked.connect(self.handle_cancel_click)
+
+        # Connect export log button
+        self.tab.export_log_button.clicked.connect(self.handle_export_log_click)
+
+        # Connect filter inputs
+        self.tab.filter_category_input.currentIndexChanged.connect(self.handle_filter_change)
+        self.tab.filter_method_input.currentIndexChanged.connect(self.handle_filter_change)
+        self.tab.filter_min_input.textChanged.connect(self.handle_filter_change)
+        self.tab.filter_max_input.textChanged.connect(self.handle_filter_change)
+        self.tab.filter_text_input.textChanged.connect(self.handle_filter_change)
+        self.tab.clear_filter_button.clicked.connect(self.handle_clear_filter_click)
+
         # Connect table changes
-        self.tab.table.cellChanged.connect(self.on_cell_changed)
+        self.table_obj.model.dataChanged.connect(self.on_cell_changed)
 
         # Init state machines
         self.init_state_machines()
 
-    def run_edit(self, obj, path, item_input):
+    def load_items(self, path, default=None):
+        try:
+            return self.config.items(path, self.name, default)
+        except LoadError as e:
+            QMessageBox.warning(self.view, "Error", f"{e}")
+            return list(default or [])
+
+    def on_config_changed(self, path, key, items):
+        if key != self.name:
+            return
+        if path == self.CATEGORY_FILE:
+            self.tab.category_input.clear()
+            self.tab.category_input.add_items(items)
+            self.set_filter_items(self.tab.filter_category_input, items)
+        elif path == self.METHOD_FILE:
+            self.tab.method_input.clear()
+            self.tab.method_input.addItems(items)
+            self.set_filter_items(self.tab.filter_method_input, items)
+
+    def set_filter_items(self, combo, items):
+        # "All" first; the current choice is kept while it is still an item
+        current = combo.currentText()
+        combo.blockSignals(True)
+        combo.clear()
+        combo.addItems(["All"] + list(items))
+        combo.setCurrentIndex(max(combo.findText(current), 0))
+        combo.blockSignals(False)
+        if combo.currentText() != current and current:
+            self.handle_filter_change()
+
+    def filter_amount(self, line_edit):
+        # Bounds that are not whole numbers are ignored until they are
+        try:
+            return parse_amount(line_edit.text().strip())
+        except ValueError:
+            return None
+
+    @profiled("controller.handle_filter_change")
+    def handle_filter_change(self, *args):
+        category = self.tab.filter_category_input.currentText()
+        method = self.tab.filter_method_input.currentText()
+        self.tab.table_proxy.set_filters(
+            category=None if category == "All" else category,
+            method=None if method == "All" else method,
+            min_amount=self.filter_amount(self.tab.filter_min_input),
+            max_amount=self.filter_amount(self.tab.filter_max_input),
+            text=self.tab.filter_text_input.text().strip(),
+        )
+
+    def handle_clear_filter_click(self):
+        inputs = (self.tab.filter_category_input, self.tab.filter_method_input, self.tab.filter_min_input, self.tab.filter_max_input, self.tab.filter_text_input)
+        for widget in inputs:
+            widget.blockSignals(True)
+        self.tab.filter_category_input.setCurrentIndex(0)
+        self.tab.filter_method_input.setCurrentIndex(0)
+        for widget in inputs[2:]:
+            widget.clear()
+        for widget in inputs:
+            widget.blockSignals(False)
+        self.handle_filter_change()
+
+    @profiled("controller.run_edit")
+    def run_edit(self, obj, path):
         try:
             obj.edit_view()
-            items = load_from_json(self.view, path)
-            obj.item_list.addItems(items.get(obj.tab_name, []))  
+            obj.item_list.addItems(self.load_items(path))
 
             obj.add_button.clicked.connect(obj.add_item)
             obj.delete_button.clicked.connect(obj.delete_item)
 
             def apply_changes():
                 updated_items = [obj.item_list.item(i).text() for i in range(obj.item_list.count())]
-                items[obj.tab_name] = updated_items
-                item_input.clear()
-                if obj.name == "Category":
-                    item_input.add_items(updated_items)
-                else:
-                    item_input.addItems(updated_items)
-                save_to_json(items, path, self.tab.log_text)
+                # The store notifies every tab, which refreshes its own inputs
+                self.config.save(path, obj.tab_name, updated_items, self.log)
                 obj.dialog.accept()
 
             obj.dialog_buttons.accepted.connect(apply_changes)
@@ -103,48 +565,136 @@ class TabController(QObject):
         except Exception as e:
             QMessageBox.warning(self.view, "Error", f"An unknown error occurred while executing edit {obj.name.lower()}: {e}")
 
+    @profiled("controller.handle_load_click")
     def handle_load_click(self):
         try:
             date = self.get_date()
-            table_list = load_from_csv(self.name, date, self.tab.log_text)
-            self.table_obj.reset(table_list)
-            self.table_obj.is_loaded = True
-            self.table_obj.is_cell_changed = False
-            self.table_obj.is_inserted = False
-            self.clear_selection()
-            self.check_button_enable()
-            self.debug_print()
-        except AddRowError as e:
-            QMessageBox.warning(self.view, "AddRowError", f"{e}")
-            self.debug_print()            
-        except LoadError as e:
-            QMessageBox.warning(self.view, "LoadError", f"{e}")
-            self.debug_print()                        
+            self.start_task("load file", self.load_task, self.on_load_finished, date)
         except DateError as e:
             QMessageBox.warning(self.view, "DateError", f"{e}")
-            self.debug_print()            
         except Exception as e:
             QMessageBox.warning(self.view, "Error", f"An unknown error occurred while executing load file: {e}")
-            self.debug_print()
 
+    @profiled("controller.load_task")
+    def load_task(self, task, date):
+        # Runs on a worker thread: reading and parsing only, the model is swapped on the GUI thread
+        return date, self.storage.load_columns(self.name, date, task.log, task.report_progress)
+
+    @profiled("controller.on_load_finished")
+    def on_load_finished(self, result):
+        date, (columns, amount_texts) = result
+        self.finish_task()
+        self.table_obj.reset_columns(columns, amount_texts)
+        self.table_obj.model.mark_clean(self.storage.source(self.name, date))
+        self.table_obj.is_loaded = True
+        self.loaded_date = date
+        if self.pending_recovery is not None:
+            records, self.pending_recovery = self.pending_recovery, None
+            self.table_obj.apply_records(records)
+            self.is_autosaved = True
+            append_log(self.log, f"{len(records)} unsaved changes recovered", operation="recover", rows=len(records))
+        self.clear_selection()
+        self.check_button_enable()
+
+    @profiled("controller.handle_save_click")
     def handle_save_click(self):
         try:
             date = self.get_date()
-            save_to_csv(self.view, self.name, date, self.table_obj.table, self.tab.log_text)
-            self.table_obj.clear()
-            self.clear_selection()
-            self.check_button_enable()
-            self.debug_print()
-        except SaveError as e:
-            QMessageBox.warning(self.view, "SaveError", f"{e}")
-            self.debug_print()            
+            snapshot = self.table_obj.model.snapshot()
+            # A save cannot be canceled once the file is being written
+            self.start_task("save file", self.save_task, self.on_save_finished, date, snapshot, cancelable=False)
         except DateError as e:
             QMessageBox.warning(self.view, "DateError", f"{e}")
-            self.debug_print()               
         except Exception as e:
             QMessageBox.warning(self.view, "Error", f"An unknown error occurred while executing save file: {e}")
-            self.debug_print()            
 
+    @profiled("controller.save_task")
+    def save_task(self, task, date, snapshot):
+        self.storage.save_month(self.name, date, snapshot, task.log, task.report_progress)
+
+    @profiled("controller.on_save_finished")
+    def on_save_finished(self, result):
+        self.finish_task()
+        self.table_obj.clear()
+        self.clear_selection()
+        self.check_button_enable()
+
+    @profiled("controller.handle_import_click")
+    def handle_import_click(self):
+        try:
+            # Imports write month files, which only the csv backend reads
+            if self.storage.name != "csv":
+                raise LoadError("Imports write month files, so they need the csv storage backend.")
+            path, _ = QFileDialog.getOpenFileName(self.view, f"Import {self.name}", "", "CSV Files (*.csv)")
+            if path:
+                # Imported batches are written as they go, so an import runs to the end
+                self.start_task("import file", self.import_task, self.on_import_finished, path, cancelable=False)
+        except LoadError as e:
+            QMessageBox.warning(self.view, "LoadError", f"{e}")
+        except Exception as e:
+            QMessageBox.warning(self.view, "Error", f"An unknown error occurred while executing import file: {e}")
+
+    @profiled("controller.import_task")
+    def import_task(self, task, path):
+        return import_csv(path, self.name, task.log, task.report_progress)
+
+    @profiled("controller.on_import_finished")
+    def on_import_finished(self, stats):
+        self.finish_task()
+        if stats["rejected"]:
+            QMessageBox.warning(self.view, "Import", f"{stats['rejected']} rows could not be imported and were written to '{stats['reject_file']}'.")
+
+    def handle_cancel_click(self):
+        if self.task is not None:
+            self.task.cancel()
+
+    @profiled("controller.handle_export_log_click")
+    def handle_export_log_click(self):
+        try:
+            path, _ = QFileDialog.getSaveFileName(self.view, f"Export {self.name} Log", f"{self.name.lower()}_log.csv", "CSV Files (*.csv)")
+            if path:
+                count = self.log.export(path)
+                append_log(self.log, f"{count} log records exported to '{path}'", operation="export log", rows=count)
+        except Exception as e:
+            QMessageBox.warning(self.view, "Error", f"An unknown error occurred while executing export log: {e}")
+
+    def start_task(self, name, function, on_finished, *args, cancelable=True):
+        self.task = Task(name, function, *args, cancelable=cancelable)
+        self.task.signals.log.connect(self.on_task_log)
+        self.task.signals.progress.connect(self.tab.progress_bar.setValue)
+        self.task.signals.finished.connect(on_finished)
+        self.task.signals.failed.connect(self.on_task_failed)
+        self.task.signals.canceled.connect(self.on_task_canceled)
+        self.tab.progress_bar.setValue(0)
+        self.tab.table.setEnabled(False)
+        self.check_button_enable()
+        start_task(self.task)
+
+    def finish_task(self):
+        self.task = None
+        self.tab.table.setEnabled(True)
+        self.tab.progress_bar.setValue(0)
+        self.check_button_enable()
+
+    def on_task_log(self, record):
+        self.log.add(record)
+
+    def on_task_failed(self, error):
+        name = self.task.name
+        self.pending_recovery = None
+        self.finish_task()
+        if isinstance(error, (AddRowError, LoadError, SaveError)):
+            QMessageBox.warning(self.view, type(error).__name__, f"{error}")
+        else:
+            QMessageBox.warning(self.view, "Error", f"An unknown error occurred while executing {name}: {error}")
+
+    def on_task_canceled(self):
+        name = self.task.name
+        self.pending_recovery = None
+        self.finish_task()
+        append_log(self.log, f"The {name} was canceled.", operation=name)
+
+    @profiled("controller.handle_add_click")
     def handle_add_click(self):
         try:
             date = self.get_date()
@@ -153,48 +703,83 @@ class TabController(QObject):
             description = self.tab.description_input.text()
             amount = self.tab.amount_input.text()
 
-            if not re.fullmatch(r"[0-9+\-*/(). ]+", amount):
-                raise AddClickError("The amount can only be entered as a number or an arithmetic expression.")
-
             try:
-                amount = eval(amount, {"__builtins__": None}, {})
-                amount = int(amount)
-            except Exception:
-                raise AddClickError("Error", "Invalid formula.")
+                amount = evaluate_amount(amount)
+            except ExpressionError as e:
+                raise AddClickError(f"Invalid formula: {e}")
 
             if date and category and method and description and amount:
                 self.table_obj.add_row(date, category, method, description, amount)
                 self.clear_selection()
                 self.check_button_enable()
-                append_log(self.tab.log_text, f"The input values have been added to the table: [{date}, {category}, {method}, {description}, {amount}]")
+                append_log(self.log, f"The input values have been added to the table: [{date}, {category}, {method}, {description}, {amount}]", operation="add", rows=1)
             else:
                 raise AddClickError("You must fill in all the fields.")
-            self.debug_print()
         except AddRowError as e:
             QMessageBox.warning(self.view, "AddRowError", f"{e}")
-            self.debug_print()             
         except DateError as e:
             QMessageBox.warning(self.view, "DateError", f"{e}")
-            self.debug_print()               
         except AddClickError as e:
             QMessageBox.warning(self.view, "AddClickError", f"{e}")
-            self.debug_print()                         
         except Exception as e:
             QMessageBox.warning(self.view, "Error", f"An unknown error occurred while executing add entries: {e}")
-            self.debug_print()             
 
-    def handle_undo_click(self):
+    @profiled("controller.handle_paste_click")
+    def handle_paste_click(self):
+        window = self.tab.paste_window()
+        window.text_input.setPlainText(QApplication.clipboard().text())
+        if window.dialog.exec_() == QDialog.Accepted:
+            self.add_pasted_text(window.text_input.toPlainText())
+
+    @profiled("controller.handle_clipboard_paste")
+    def handle_clipboard_paste(self):
+        self.add_pasted_text(QApplication.clipboard().text())
+
+    def add_pasted_text(self, text):
+        # All rows are validated first and go in as one table update and one undo step
         try:
-            self.table_obj.undo_delete()
+            if not self.add_button_condition():
+                raise AddClickError("Load a month before adding entries.")
+            date = self.get_date()
+            category = ", ".join(self.tab.category_input.selected_items)
+            method = self.tab.method_input.currentText()
+            rows = parse_pasted_rows(text, date, category, method)
+            if not rows:
+                raise AddClickError("There are no rows to paste.")
+
+            self.table_obj.add_rows(rows)
             self.check_button_enable()
-            append_log(self.tab.log_text, "The deleted row has been re-added to the table.")
-            self.debug_print()
+            append_log(self.log, f"{len(rows)} pasted rows have been added to the table", operation="paste", rows=len(rows))
+        except AddRowError as e:
+            QMessageBox.warning(self.view, "AddRowError", f"{e}")
         except DateError as e:
-            QMessageBox.warning(self.view, "Error", f"{e}")
-            self.debug_print()               
+            QMessageBox.warning(self.view, "DateError", f"{e}")
+        except AddClickError as e:
+            QMessageBox.warning(self.view, "AddClickError", f"{e}")
+        except Exception as e:
+            QMessageBox.warning(self.view, "Error", f"An unknown error occurred while executing paste rows: {e}")
+
+    @profiled("controller.handle_undo_click")
+    def handle_undo_click(self):
+        try:
+            command = self.table_obj.undo()
+            self.check_button_enable()
+            append_log(self.log, f"Undid the {command.describe()}.", operation="undo")
+        except AddRowError as e:
+            QMessageBox.warning(self.view, "AddRowError", f"{e}")
+        except Exception as e:
+            QMessageBox.warning(self.view, "Error", f"An unknown error occurred while executing undo: {e}")
+
+    @profiled("controller.handle_redo_click")
+    def handle_redo_click(self):
+        try:
+            command = self.table_obj.redo()
+            self.check_button_enable()
+            append_log(self.log, f"Redid the {command.describe()}.", operation="redo")
+        except AddRowError as e:
+            QMessageBox.warning(self.view, "AddRowError", f"{e}")
         except Exception as e:
-            QMessageBox.warning(self.view, "Error", f"An unknown error occurred while executing undo delete: {e}")
-            self.debug_print()             
+            QMessageBox.warning(self.view, "Error", f"An unknown error occurred while executing redo: {e}")
 
     def get_date(self):
         try:
@@ -204,16 +789,10 @@ class TabController(QObject):
             raise DateError(f"Invalid date: {e}")
     
     def clear_selection(self):
-        for i in range(self.tab.category_input.list_widget.count()):
-            checkbox = self.tab.category_input.list_widget.itemWidget(self.tab.category_input.list_widget.item(i))
-            checkbox.setChecked(False)
-        self.tab.category_input.selected_items = []
-        self.tab.category_input.setEditText("")
+        self.tab.category_input.clear_selection()
 
     def on_cell_changed(self):
-        self.table_obj.is_cell_changed = True
         self.check_button_enable()
-        self.debug_print()
 
     def check_button_enable(self):
         if self.load_button_condition():
@@ -221,6 +800,11 @@ class TabController(QObject):
         else:
             self.load_button_disabled_signal.emit()
 
+        if self.import_button_condition():
+            self.import_button_enabled_signal.emit()
+        else:
+            self.import_button_disabled_signal.emit()
+
         if self.save_button_condition():
             self.save_button_enabled_signal.emit()
         else:
@@ -236,31 +820,106 @@ class TabController(QObject):
         else:
             self.undo_button_disabled_signal.emit()
 
-    def debug_print(self):
-        print("Table State:")
-        print(f"1. Loaded: {self.table_obj.is_loaded}")
-        print(f"2. Cell changed: {self.table_obj.is_cell_changed}")
-        print(f"3. Inserted: {self.table_obj.is_inserted}")
-        print(f"4. Deleted: {self.table_obj.is_deleted}")
-        print()
+        if self.redo_button_condition():
+            self.redo_button_enabled_signal.emit()
+        else:
+            self.redo_button_disabled_signal.emit()
+
+        if self.cancel_button_condition():
+            self.cancel_button_enabled_signal.emit()
+        else:
+            self.cancel_button_disabled_signal.emit()
+
+        self.schedule_autosave()
+
+    def schedule_autosave(self):
+        if self.table_obj.is_loaded and self.table_obj.model.is_dirty():
+            if self.task is None:
+                self.autosave_timer.start()
+        else:
+            self.autosave_timer.stop()
+            if self.is_autosaved:
+                # Saved, undone or replaced by another month: the recovery file is out of date
+                self.is_autosaved = False
+                self.autosave_version += 1
+                self.autosave.remove(self.name, self.autosave_version)
+
+    @profiled("controller.run_autosave")
+    def run_autosave(self):
+        model = self.table_obj.model
+        if self.task is not None or not self.table_obj.is_loaded or not model.is_dirty():
+            return
+        # The records are taken on the GUI thread, only the file is written on a worker
+        source = model.source_path
+        data = {
+            "tab": self.name,
+            "date": self.loaded_date,
+            "source": source,
+            "signature": source_signature(source),
+            "records": model.journal_records(),
+        }
+        self.is_autosaved = True
+        self.autosave_version += 1
+        self.autosave_task = Task("autosave", self.autosave_task_run, self.autosave_version, data)
+        self.autosave_task.signals.failed.connect(self.on_autosave_failed)
+        start_task(self.autosave_task)
+
+    def autosave_task_run(self, task, version, data):
+        self.autosave.write(self.name, version, data)
+
+    def on_autosave_failed(self, error):
+        append_log(self.log, f"Autosave failed: {error}", operation="autosave")
+
+    def offer_recovery(self):
+        data = self.autosave.read(self.name)
+        if data is None:
+            return
+        if not data["records"]:
+            self.autosave.remove(self.name, self.autosave_version)
+            return
+
+        message = f"{self.name} has {len(data['records'])} unsaved changes to {data['date']} from an earlier session. Restore them?"
+        if data.get("signature") != source_signature(data.get("source")):
+            message += "\n\nThe saved file has changed since then, so the changes may not apply cleanly."
+        if QMessageBox.question(self.view, "Recover", message, QMessageBox.Yes | QMessageBox.No) != QMessageBox.Yes:
+            self.autosave_version += 1
+            self.autosave.remove(self.name, self.autosave_version)
+            return
+
+        self.pending_recovery = data["records"]
+        self.tab.date_input.setDate(QDate.fromString(data["date"], "yyyy-MM-dd"))
+        self.handle_load_click()
+
+    def import_button_condition(self):
+        return self.task is None
 
     def load_button_condition(self):
-        return not self.table_obj.is_cell_changed and not self.table_obj.is_inserted and not self.table_obj.is_deleted
+        return self.task is None and not self.table_obj.is_cell_changed and not self.table_obj.is_inserted and not self.table_obj.is_deleted
 
     def save_button_condition(self):
-        return self.table_obj.is_cell_changed or self.table_obj.is_inserted or self.table_obj.is_deleted
+        return self.task is None and (self.table_obj.is_cell_changed or self.table_obj.is_inserted or self.table_obj.is_deleted)
 
     def add_button_condition(self):
-        return self.table_obj.is_loaded
+        return self.task is None and self.table_obj.is_loaded
 
     def undo_button_condition(self):
-        return self.table_obj.is_deleted
+        return self.task is None and self.table_obj.history.can_undo()
+
+    def redo_button_condition(self):
+        return self.task is None and self.table_obj.history.can_redo()
+
+    def cancel_button_condition(self):
+        return self.task is not None and self.task.cancelable
     
     def init_state_machines(self):
         self.load_state_machine = StateMachine(self.tab.load_button, self.load_button_enabled_signal, self.load_button_disabled_signal, True)
+        self.import_state_machine = StateMachine(self.tab.import_button, self.import_button_enabled_signal, self.import_button_disabled_signal, True)
         self.save_state_machine = StateMachine(self.tab.save_button, self.save_button_enabled_signal, self.save_button_disabled_signal, False)
         self.add_state_machine = StateMachine(self.tab.add_button, self.add_button_enabled_signal, self.add_button_disabled_signal, False)
+        self.paste_state_machine = StateMachine(self.tab.paste_button, self.add_button_enabled_signal, self.add_button_disabled_signal, False)
         self.undo_state_machine = StateMachine(self.tab.undo_button, self.undo_button_enabled_signal, self.undo_button_disabled_signal, False)
+        self.redo_state_machine = StateMachine(self.tab.redo_button, self.redo_button_enabled_signal, self.redo_button_disabled_signal, False)
+        self.cancel_state_machine = StateMachine(self.tab.cancel_button, self.cancel_button_enabled_signal, self.cancel_button_disabled_signal, False)
 
 class StateMachine:
     def __init__(self, button, actice_signal, inactive_signal, init_state) -> None:
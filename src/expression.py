@@ -0,0 +1,124 @@
+import re
+from fractions import Fraction
+from functools import lru_cache
+from src.columns import parse_amount
+from src.utils import ExpressionError
+
+TOKEN_PATTERN = re.compile(r"\s*(?:(\d+(?:\.\d*)?|\.\d+)|(.))")
+PRECEDENCE = {"+": 1, "-": 1, "*": 2, "/": 2, "neg": 3, "pos": 3}
+MAX_EXPRESSION_LENGTH = 256
+
+def tokenize(text):
+    tokens = []
+    for number, symbol in TOKEN_PATTERN.findall(text):
+        if number:
+            tokens.append(Fraction(number))
+        elif symbol in "+-*/()":
+            tokens.append(symbol)
+        elif not symbol.isspace():
+            raise ExpressionError("The amount can only be entered as a number or an arithmetic expression.")
+    return tokens
+
+@lru_cache(maxsize=1024)
+def compile_expression(text):
+    # Shunting-yard: turns the expression into a postfix program that evaluate_program runs on a stack
+    if len(text) > MAX_EXPRESSION_LENGTH:
+        raise ExpressionError(f"The expression is longer than {MAX_EXPRESSION_LENGTH} characters.")
+
+    program, operators = [], []
+    expect_operand = True
+    for token in tokenize(text):
+        if isinstance(token, Fraction):
+            if not expect_operand:
+                raise ExpressionError("Missing operator.")
+            program.append(token)
+            expect_operand = False
+        elif token == "(":
+            if not expect_operand:
+                raise ExpressionError("Missing operator.")
+            operators.append(token)
+        elif token == ")":
+            if expect_operand:
+                raise ExpressionError("Missing operand.")
+            while operators and operators[-1] != "(":
+                program.append(operators.pop())
+            if not operators:
+                raise ExpressionError("Unbalanced parentheses.")
+            operators.pop()
+        else:
+            if expect_operand:
+                if token not in "+-":
+                    raise ExpressionError("Missing operand.")
+                operators.append("neg" if token == "-" else "pos")
+                continue
+            # Binary operators are left-associative, unary ones bind tighter and are right-associative
+            while operators and operators[-1] != "(" and PRECEDENCE[operators[-1]] >= PRECEDENCE[token]:
+                program.append(operators.pop())
+            operators.append(token)
+            expect_operand = True
+
+    if expect_operand:
+        raise ExpressionError("Missing operand.")
+    while operators:
+        operator = operators.pop()
+        if operator == "(":
+            raise ExpressionError("Unbalanced parentheses.")
+        program.append(operator)
+    return tuple(program)
+
+def evaluate_program(program):
+    # Exact rational arithmetic, so 10000/3*3 is 10000 like it was with eval
+    stack = []
+    for token in program:
+        if isinstance(token, Fraction):
+            stack.append(token)
+        elif token == "neg":
+            stack.append(-stack.pop())
+        elif token == "pos":
+            continue
+        else:
+            right = stack.pop()
+            left = stack.pop()
+            if token == "+":
+                stack.append(left + right)
+            elif token == "-":
+                stack.append(left - right)
+            elif token == "*":
+                stack.append(left * right)
+            else:
+                stack.append(left / right)
+    return stack[0]
+
+def evaluate(text):
+    try:
+        return evaluate_program(compile_expression(text.strip()))
+    except ZeroDivisionError:
+        raise ExpressionError("Division by zero.")
+
+def evaluate_amount(text):
+    # Amounts are whole numbers; only the final result is truncated toward zero
+    text = text.strip()
+    try:
+        if text.isdigit():
+            return parse_amount(text)
+        return parse_amount(int(evaluate(text)))
+    except ValueError as e:
+        raise ExpressionError(f"{e}")
+
+def evaluate_amounts(texts):
+    # A column of amounts at once, each distinct text evaluated once.
+    # Returns the amounts, None where a text failed, and the error message of every failed position.
+    amounts, errors, results = [], {}, {}
+    for position, text in enumerate(texts):
+        if text not in results:
+            try:
+                results[text] = evaluate_amount(text)
+            except ExpressionError as e:
+                results[text] = e
+        result = results[text]
+        if isinstance(result, ExpressionError):
+            errors[position] = f"{result}"
+            amounts.append(None)
+        else:
+            amounts.append(result)
+    return amounts, errors
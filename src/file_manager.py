@@ -1,76 +1,265 @@
 import os
+import io
 import json
 import csv
+import time
+import hashlib
+import threading
+from contextlib import contextmanager
+from src.profiler import get_profiler
 from src.utils import append_log
-from src.utils import LoadError, SaveError
-from PyQt5.QtWidgets import QMessageBox
+from src.utils import LoadError, SaveError, CancelError
 
-def load_from_json(parent, path):
-    if os.path.exists(path):
-        try:
+JOURNAL_MIN_COMPACT_SIZE = 64 * 1024
+PROGRESS_STEP = 4096
+
+def sync_directory(directory):
+    # Makes a rename in directory durable; directories cannot be opened for syncing on Windows
+    if os.name == "nt":
+        return
+    descriptor = os.open(directory or ".", os.O_RDONLY)
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
+
+@contextmanager
+def atomic_write(path, newline=None, encoding="utf-8", binary=False):
+    # Writes to a temporary file next to path and renames it over path once it is on disk,
+    # so a crash leaves either the old or the new file, never a truncated one
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with (open(temp_path, "wb") if binary else open(temp_path, "w", newline=newline, encoding=encoding)) as file:
+            yield file
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    sync_directory(os.path.dirname(path))
+
+def append_synced(path, records):
+    # Appends CSV records and waits until they are on disk
+    with open(path, "a", newline="", encoding="utf-8") as file:
+        start = file.tell()
+        csv.writer(file).writerows(records)
+        file.flush()
+        os.fsync(file.fileno())
+        return file.tell() - start
+
+def load_from_json(path):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with get_profiler().span("file.load_json", bytes_read=os.path.getsize(path)):
             with open(path, "r") as file:
                 data = json.load(file)
-                if isinstance(data, dict):
-                    return data
-                else:
-                    QMessageBox.warning(parent, "Error", "Invalid JSON format. Resetting to default.")
-                    return {}
-        except (json.JSONDecodeError, IOError):
-            QMessageBox.warning(parent, "Error", f"Failed to load JSON file in '{path}'. Resetting to default.")
-            return {}
-    return {}
+    except (json.JSONDecodeError, IOError):
+        raise LoadError(f"Failed to load JSON file in '{path}'. Resetting to default.")
+    if not isinstance(data, dict):
+        raise LoadError("Invalid JSON format. Resetting to default.")
+    return data
 
 def save_to_json(data, path, log):
     try:
-        with open(path, "w") as file:
-            json.dump(data, file, indent=4)
+        with get_profiler().span("file.save_json") as span:
+            with atomic_write(path) as file:
+                json.dump(data, file, indent=4)
+                span.add("bytes_written", file.tell())
         append_log(log, f"{path} saved successfully!")
     except Exception:
         raise SaveError(f"Failed to save Json file in '{path}'.")
 
-def load_from_csv(tab_name, date, log) -> None:
+def track_progress(items, total, progress, weight=None):
+    # Reports progress as a percentage of total every PROGRESS_STEP items
+    done = 0
+    for i, item in enumerate(items):
+        if progress is not None and i % PROGRESS_STEP == 0:
+            progress(min(100, done * 100 // total) if total else 0)
+        done += weight(item) if weight else 1
+        yield item
+    if progress is not None:
+        progress(100)
+
+# Tabs with month files, in the order they are shown
+TAB_NAMES = ["Income", "Expenses", "Savings"]
+
+def csv_path(tab_name, date):
     year, month = date.split("-")[:2]
-    directory = os.path.join("Result", year)
-    file_name = f"{month}_{tab_name}.csv"
-    path = os.path.join(directory, file_name)
+    return os.path.join("Result", year, f"{month}_{tab_name}.csv")
+
+def journal_path(path):
+    return os.path.splitext(path)[0] + ".journal"
+
+def file_signature(path):
+    # Size and mtime of a file, zeros when it does not exist
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return [0, 0]
+    return [stat.st_size, stat.st_mtime_ns]
+
+def month_signature(path):
+    # A change in the month file or its journal means the month is read again
+    return file_signature(path) + file_signature(journal_path(path))
+
+def journal_too_big(path, journal):
+    if not os.path.exists(journal):
+        return False
+    return os.path.getsize(journal) > max(JOURNAL_MIN_COMPACT_SIZE, os.path.getsize(path) // 2)
+
+def file_generation(path):
+    # Size and content hash of a month file. They stay the same when Result/ is copied or restored,
+    # and change with any rewrite that changes the rows, so a journal applies to the file it was written for.
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(block)
+    return [str(os.path.getsize(path)), digest.hexdigest()]
+
+def journal_batches(path, journal):
+    # A journal starts with an S record holding the generation of the month file it applies to,
+    # and every save appends its records followed by a C record.
+    # Only committed batches count. Returns None for a journal that does not match the file,
+    # such as one left behind by a crash between the rewrite of the file and the removal of the journal.
+    with open(journal, "r", newline="", encoding="utf-8") as file:
+        text = file.read()
+    if not text.endswith("\n"):
+        # Drop a line torn by a crash during an append
+        text = text[:text.rfind("\n") + 1]
+
+    records = [record for record in csv.reader(io.StringIO(text, newline="")) if record]
+    if not records or records[0][0] != "S" or records[0][1:] != file_generation(path):
+        return None
+    committed = max((i for i, record in enumerate(records) if record[0] == "C"), default=0)
+    return [record for record in records[1:committed] if record[0] != "C"]
+
+def replay_journal(rows, journal, path):
+    # Row indexes in the journal do not count the header row
+    for record in journal_batches(path, journal) or []:
+        op, row = record[0], int(record[1]) + 1
+        if op == "I":
+            rows.insert(row, record[2:])
+        elif op == "D":
+            del rows[row]
+        elif op == "U":
+            rows[row][int(record[2])] = record[3]
+        else:
+            raise LoadError(f"Invalid journal record in '{journal}': {record}")
+
+def write_csv(path, rows):
+    with get_profiler().span("file.write_csv", rows=len(rows)) as span:
+        with atomic_write(path, newline="") as file:
+            csv.writer(file).writerows(rows)
+            span.add("bytes_written", file.tell())
+
+def read_month_rows(path, progress=None):
+    # Reads a month file with its pending journal records applied, without compacting
+    with get_profiler().span("file.read_month", bytes_read=os.path.getsize(path)) as span:
+        with open(path, "r", newline="", encoding="utf-8") as file:
+            rows = list(csv.reader(track_progress(file, os.path.getsize(path), progress, len)))
+        journal = journal_path(path)
+        if os.path.exists(journal):
+            span.add("bytes_read", os.path.getsize(journal))
+            replay_journal(rows, journal, path)
+        span.add("rows", max(len(rows) - 1, 0))
+    return rows
+
+def stale_journal_path(journal):
+    return f"{journal}.{time.time_ns()}.stale"
+
+def compact_journal(path, rows=None):
+    # Rewrites the month file with its journal applied; the journal is removed only after the rename.
+    # A journal that does not match the file is never dropped: it is renamed aside and its new path returned.
+    journal = journal_path(path)
+    if not os.path.exists(journal):
+        return None
+    if journal_batches(path, journal) is None:
+        stale = stale_journal_path(journal)
+        os.replace(journal, stale)
+        return stale
+    write_csv(path, read_month_rows(path) if rows is None else rows)
+    os.remove(journal)
+    return None
+
+def month_files(root="Result"):
+    # Yields (year, month, tab name, path) for every month file under root
+    if not os.path.isdir(root):
+        return
+    for year in sorted(os.listdir(root)):
+        directory = os.path.join(root, year)
+        if not os.path.isdir(directory):
+            continue
+        for file_name in sorted(os.listdir(directory)):
+            month, _, tab_name = os.path.splitext(file_name)[0].partition("_")
+            if file_name.endswith(".csv") and tab_name:
+                yield year, month, tab_name, os.path.join(directory, file_name)
+
+def load_from_csv(tab_name, date, log, progress=None) -> None:
+    path = csv_path(tab_name, date)
 
     if not os.path.exists(path):
         append_log(log, "There is no file to load.")
         return []
 
     try:
-        with open(path, "r", newline="", encoding="utf-8") as file:
-            reader = csv.reader(file)
-            rows = list(reader)     
-            append_log(log, f"Data successfully loaded from '{path}'")
-            return rows
+        rows = read_month_rows(path, progress)
+
+        # Fold pending journal records back into the file
+        journal = journal_path(path)
+        if os.path.exists(journal):
+            stale = compact_journal(path, rows)
+            if stale is None:
+                append_log(log, f"Journal '{journal}' compacted into '{path}'")
+            else:
+                append_log(log, f"Journal '{journal}' does not match '{path}' and was not applied; it was kept as '{stale}'")
+
+        append_log(log, f"Data successfully loaded from '{path}'", rows=len(rows) - 1)
+        return rows
+    except (LoadError, CancelError):
+        raise
     except Exception as e:
         raise LoadError(f"Failed to load file: {e}")
 
-def save_to_csv(tab_name, date, table, log) -> None:
-    year, month = date.split("-")[:2]
-    directory = os.path.join("Result", year)
-    os.makedirs(directory, exist_ok=True)
-
-    file_name = f"{month}_{tab_name}.csv"
-    path = os.path.join(directory, file_name)
+def save_to_csv(tab_name, date, model, log, progress=None):
+    # Returns whether anything was written
+    path = csv_path(tab_name, date)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    journal = journal_path(path)
 
     try:
-        with open(path, "w", newline="", encoding="utf-8") as file:
-            writer = csv.writer(file)
-
-            # Write headers
-            headers = [table.horizontalHeaderItem(i).text() for i in range(table.columnCount()-1)]
-            writer.writerow(headers)
-
-            # Write rows
-            for row in range(table.rowCount()):
-                values = [
-                    table.item(row, col).text() if table.item(row, col) else ""
-                    for col in range(table.columnCount()-1)
-                ]
-                writer.writerow(values)
-
-        append_log(log, f"Data successfully saved to '{path}'")
+        with get_profiler().span("file.save_csv") as span:
+            if model.source_path == path and os.path.exists(path) and not journal_too_big(path, journal):
+                # Only append the cells and rows that differ from the loaded file
+                records = model.journal_records()
+                if records:
+                    header = [] if os.path.exists(journal) else [["S", *file_generation(path)]]
+                    span.add("bytes_written", append_synced(journal, header + records + [["C"]]))
+                    span.add("rows", len(records))
+                    append_log(log, f"{len(records)} changes successfully saved to '{journal}'", rows=len(records))
+                else:
+                    append_log(log, f"There are no changes to save to '{path}'")
+                    model.mark_clean(path)
+                    return False
+            else:
+                with atomic_write(path, newline="") as file:
+                    writer = csv.writer(file)
+
+                    # Write headers
+                    writer.writerow(model.header[:model.DELETE])
+
+                    # Write rows
+                    rows = track_progress(range(model.rowCount()), model.rowCount(), progress)
+                    writer.writerows(model.row_values(row) for row in rows)
+                    span.add("bytes_written", file.tell())
+                span.add("rows", model.rowCount())
+
+                if os.path.exists(journal):
+                    os.remove(journal)
+                append_log(log, f"Data successfully saved to '{path}'", rows=model.rowCount())
+            model.mark_clean(path)
+            return True
     except Exception as e:
-        raise SaveError(f"Failed to save file: {e}")
\ No newline at end of file
+        raise SaveError(f"Failed to save file: {e}")
@@ -0,0 +1,127 @@
+from collections import deque
+
+HISTORY_MAX_ENTRIES = 500
+HISTORY_MAX_BYTES = 8 * 1024 * 1024
+COMMAND_OVERHEAD = 64
+
+def rows_size(rows):
+    return sum(len(value) for row in rows for value in row) + COMMAND_OVERHEAD * len(rows)
+
+class InsertRows:
+    # Covers single adds and bulk inserts; the rows are only kept while the insert is undone
+    def __init__(self, first, count) -> None:
+        self.first = first
+        self.count = count
+        self.rows = None
+        self.ids = None
+
+    @property
+    def size(self):
+        return COMMAND_OVERHEAD + (rows_size(self.rows) if self.rows else 0)
+
+    def undo(self, model):
+        self.rows, self.ids = model.remove_rows(self.first, self.count)
+
+    def redo(self, model):
+        model.insert_rows(self.first, self.rows, self.ids)
+        self.rows = None
+        self.ids = None
+
+    def describe(self):
+        return f"insert of {self.count} row{'s' if self.count > 1 else ''}"
+
+class DeleteRow:
+    def __init__(self, row, values, row_id) -> None:
+        self.row = row
+        self.values = values
+        self.row_id = row_id
+
+    @property
+    def size(self):
+        return rows_size([self.values])
+
+    def undo(self, model):
+        model.insert_rows(self.row, [self.values], [self.row_id])
+
+    def redo(self, model):
+        model.remove_rows(self.row, 1)
+
+    def describe(self):
+        return f"delete of row {self.row + 1}"
+
+class EditCell:
+    def __init__(self, row, col, old_value, new_value) -> None:
+        self.row = row
+        self.col = col
+        self.old_value = old_value
+        self.new_value = new_value
+
+    @property
+    def size(self):
+        return COMMAND_OVERHEAD + len(self.old_value) + len(self.new_value)
+
+    def undo(self, model):
+        model.setData(model.index(self.row, self.col), self.old_value)
+
+    def redo(self, model):
+        model.setData(model.index(self.row, self.col), self.new_value)
+
+    def describe(self):
+        return f"edit of row {self.row + 1}, column {self.col + 1}"
+
+class History:
+    def __init__(self, max_entries=HISTORY_MAX_ENTRIES, max_bytes=HISTORY_MAX_BYTES) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.undo_stack = deque()
+        self.redo_stack = []
+        self.size = 0
+        self.is_replaying = False
+
+    def push(self, command):
+        if self.is_replaying:
+            return
+        for redo_command in self.redo_stack:
+            self.size -= redo_command.size
+        self.redo_stack = []
+        self.undo_stack.append(command)
+        self.size += command.size
+        self.evict()
+
+    def evict(self):
+        # Drop the oldest entries once either cap is exceeded
+        while self.undo_stack and (len(self.undo_stack) > self.max_entries or self.size > self.max_bytes):
+            self.size -= self.undo_stack.popleft().size
+
+    def can_undo(self):
+        return bool(self.undo_stack)
+
+    def can_redo(self):
+        return bool(self.redo_stack)
+
+    def undo(self, model):
+        command = self.undo_stack.pop()
+        self.replay(command, command.undo, model)
+        self.redo_stack.append(command)
+        return command
+
+    def redo(self, model):
+        command = self.redo_stack.pop()
+        self.replay(command, command.redo, model)
+        self.undo_stack.append(command)
+        self.evict()
+        return command
+
+    def replay(self, command, action, model):
+        self.size -= command.size
+        self.is_replaying = True
+        try:
+            action(model)
+        finally:
+            self.is_replaying = False
+            self.size += command.size
+
+    def clear(self):
+        self.undo_stack.clear()
+        self.redo_stack = []
+        self.size = 0
@@ -0,0 +1,267 @@
+import io
+import os
+import csv
+import time
+from functools import lru_cache
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from src.file_manager import compact_journal, csv_path, track_progress
+from src.columns import AMOUNT_MAX, HEADER, parse_amount
+from src.expression import evaluate_amounts
+from src.utils import append_log
+from src.utils import AddRowError, DateError, LoadError
+
+IMPORT_BATCH_SIZE = 5000
+IMPORT_LOG_INTERVAL = 50000
+DATE_FORMATS = ("%Y-%m-%d", "%Y/%m/%d", "%Y.%m.%d", "%Y%m%d")
+
+PASTE_ERROR_LIMIT = 5
+
+# Columns of pasted rows without a header, by the number of cells in the first row
+PASTE_COLUMNS = {
+    2: ["Description", "Amount"],
+    3: ["Date", "Description", "Amount"],
+    4: ["Date", "Category", "Description", "Amount"],
+    5: ["Date", "Category", "Method", "Description", "Amount"],
+}
+
+# Header names commonly used by bank exports, matched case-insensitively
+COLUMN_ALIASES = {
+    "Date": ["date", "transaction date", "posted date", "posting date", "value date"],
+    "Category": ["category", "type"],
+    "Method": ["method", "account", "account name", "card"],
+    "Description": ["description", "details", "memo", "payee", "narrative"],
+    "Amount": ["amount", "value", "sum"],
+}
+
+class RejectedRow(Exception):
+    pass
+
+def detect_columns(header):
+    names = {name.strip().lower(): i for i, name in enumerate(header)}
+    mapping = {}
+    for column, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in names:
+                mapping[column] = names[alias]
+                break
+    return mapping
+
+def read_records(file, size, progress):
+    reader = csv.reader(track_progress(file, size, progress, len))
+    header = next(reader, None)
+    return header, reader
+
+def map_records(records, mapping, default_category, default_method):
+    def field(record, column, default=""):
+        index = mapping.get(column)
+        if index is None or index >= len(record):
+            return default
+        return record[index].strip() or default
+
+    for record in records:
+        if not record:
+            continue
+        yield record, [
+            field(record, "Date"),
+            field(record, "Category", default_category),
+            field(record, "Method", default_method),
+            field(record, "Description"),
+            field(record, "Amount"),
+        ]
+
+# Exports repeat the same few hundred dates, so parsed dates are cached.
+# Also parses the dates of the command line, which only takes the first format.
+@lru_cache(maxsize=4096)
+def parse_date(value, date_formats=DATE_FORMATS):
+    for date_format in date_formats:
+        try:
+            return datetime.strptime(value, date_format).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    raise DateError(f"Invalid date: {value}")
+
+def parse_import_amount(value):
+    try:
+        amount = Decimal(value.replace(",", "").replace(" ", ""))
+    except InvalidOperation:
+        raise RejectedRow(f"Invalid amount: {value}")
+    # Infinity and NaN parse as decimals but are not amounts
+    if not amount.is_finite():
+        raise RejectedRow(f"Invalid amount: {value}")
+    # Checked on the exponent, since converting a value like 1e999999 to an integer takes seconds
+    if amount.adjusted() > len(str(AMOUNT_MAX)):
+        raise RejectedRow(f"Amount out of range: {value}")
+    try:
+        if amount != amount.to_integral_value():
+            raise RejectedRow(f"The amount must be a whole number: {value}")
+        return str(parse_amount(int(amount)))
+    except (ValueError, OverflowError, InvalidOperation):
+        raise RejectedRow(f"Amount out of range: {value}")
+
+def validate_records(records, date_formats, rejects):
+    for record, (date, category, method, description, amount) in records:
+        try:
+            if not date or not category or not method or not description or not amount:
+                raise RejectedRow("You must fill in all the fields.")
+            yield [parse_date(date, date_formats), category, method, description, parse_import_amount(amount)]
+        except (RejectedRow, DateError) as e:
+            rejects.write(record, e)
+
+def parse_pasted_rows(text, default_date, default_category, default_method, date_formats=DATE_FORMATS):
+    # Rows copied from a spreadsheet (tab-separated) or typed as CSV. A header row names the columns,
+    # otherwise they are taken by position; missing cells come from the entry fields.
+    # Amounts may be expressions. Every row is checked before any is returned, so a paste is all or nothing.
+    reader = csv.reader(io.StringIO(text, newline=""), delimiter="\t" if "\t" in text else ",")
+    records = [record for record in reader if any(cell.strip() for cell in record)]
+    if not records:
+        return []
+
+    # Every row must have as many cells as the header or the first row, so no cell is dropped
+    width = len(records[0])
+    mapping = detect_columns(records[0])
+    first = 1 if "Amount" in mapping else 0
+    if not first:
+        if width not in PASTE_COLUMNS:
+            raise AddRowError(f"Rows without a header need {min(PASTE_COLUMNS)} to {max(PASTE_COLUMNS)} cells, the first row has {width}.")
+        mapping = {column: i for i, column in enumerate(PASTE_COLUMNS[width])}
+    defaults = {"Date": default_date, "Category": default_category, "Method": default_method, "Description": ""}
+
+    checked, errors = [], []
+    for number, record in enumerate(records[first:], first + 1):
+        try:
+            if len(record) != width:
+                raise RejectedRow(f"{len(record)} cells instead of {width}.")
+            values = {}
+            for column, default in defaults.items():
+                index = mapping.get(column)
+                values[column] = record[index].strip() if index is not None and record[index].strip() else default
+            # Spreadsheets copy amounts with thousands separators
+            amount = record[mapping["Amount"]].strip().replace(",", "")
+            missing = [column for column, value in values.items() if not value] + ([] if amount else ["Amount"])
+            if missing:
+                raise RejectedRow(f"Missing {', '.join(missing)}.")
+            values["Date"] = parse_date(values["Date"], tuple(date_formats))
+            checked.append((number, values, amount))
+        except (RejectedRow, DateError) as e:
+            errors.append((number, f"{e}"))
+
+    # The amount column is evaluated in one pass
+    amounts, amount_errors = evaluate_amounts([amount for number, values, amount in checked])
+    rows = []
+    for position, ((number, values, text), amount) in enumerate(zip(checked, amounts)):
+        if position in amount_errors:
+            errors.append((number, amount_errors[position]))
+        else:
+            rows.append([values["Date"], values["Category"], values["Method"], values["Description"], amount])
+
+    if errors:
+        errors = [f"Row {number}: {message}" for number, message in sorted(errors)]
+        shown = "\n".join(errors[:PASTE_ERROR_LIMIT])
+        more = f"\n... and {len(errors) - PASTE_ERROR_LIMIT} more" if len(errors) > PASTE_ERROR_LIMIT else ""
+        raise AddRowError(f"{len(errors)} of {len(records) - first} rows could not be added:\n{shown}{more}")
+    return rows
+
+class RejectWriter:
+    # Opens the reject file only when the first row is rejected. It repeats the source header with a
+    # Reason column, so the rows can be fixed and imported again with the same mapping.
+    def __init__(self, path) -> None:
+        self.path = path
+        self.header = None
+        self.file = None
+        self.writer = None
+        self.count = 0
+
+    def write(self, record, reason):
+        if self.writer is None:
+            self.file = open(self.path, "w", newline="", encoding="utf-8")
+            self.writer = csv.writer(self.file)
+            if self.header is not None:
+                self.writer.writerow([*self.header, "Reason"])
+        self.writer.writerow([*record, str(reason)])
+        self.count += 1
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+class MonthWriter:
+    # Buffers rows per month file and appends them in batches
+    def __init__(self, tab_name, batch_size=IMPORT_BATCH_SIZE) -> None:
+        self.tab_name = tab_name
+        self.batch_size = batch_size
+        self.buffers = {}
+        self.paths = set()
+        self.count = 0
+
+    def write(self, row):
+        path = csv_path(self.tab_name, row[0])
+        buffer = self.buffers.setdefault(path, [])
+        buffer.append(row)
+        if len(buffer) >= self.batch_size:
+            self.flush(path)
+
+    def flush(self, path):
+        rows = self.buffers.pop(path, [])
+        if not rows:
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+        if not is_new and path not in self.paths:
+            # Appending changes the file contents, which would make a pending journal look stale
+            compact_journal(path)
+        with open(path, "a", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            if is_new:
+                writer.writerow(HEADER)
+            writer.writerows(rows)
+            file.flush()
+            os.fsync(file.fileno())
+        self.paths.add(path)
+        self.count += len(rows)
+
+    def close(self):
+        for path in list(self.buffers):
+            self.flush(path)
+
+def import_csv(path, tab_name, log=None, progress=None, mapping=None, default_category="Other", default_method="Other", date_formats=DATE_FORMATS):
+    started = time.perf_counter()
+    rejects = RejectWriter(os.path.splitext(path)[0] + ".rejects.csv")
+    months = MonthWriter(tab_name)
+
+    try:
+        with open(path, "r", newline="", encoding="utf-8-sig") as file:
+            header, records = read_records(file, os.path.getsize(path), progress)
+            if header is None:
+                raise LoadError(f"'{path}' is empty.")
+            rejects.header = header
+
+            mapping = mapping or detect_columns(header)
+            missing = [column for column in ("Date", "Description", "Amount") if column not in mapping]
+            if missing:
+                raise LoadError(f"Could not find the columns {', '.join(missing)} in '{path}'.")
+
+            rows = validate_records(map_records(records, mapping, default_category, default_method), tuple(date_formats), rejects)
+            for count, row in enumerate(rows, 1):
+                months.write(row)
+                if log is not None and count % IMPORT_LOG_INTERVAL == 0:
+                    append_log(log, f"{count} rows imported ({count / (time.perf_counter() - started):.0f} rows/sec)", rows=count)
+    finally:
+        months.close()
+        rejects.close()
+
+    seconds = time.perf_counter() - started
+    stats = {
+        "imported": months.count,
+        "rejected": rejects.count,
+        "files": sorted(months.paths),
+        "reject_file": rejects.path if rejects.count else None,
+        "seconds": seconds,
+        "rows_per_second": (months.count + rejects.count) / seconds if seconds else 0,
+    }
+
+    if log is not None:
+        append_log(log, f"Imported {stats['imported']} rows into {len(stats['files'])} month files in {seconds:.2f}s ({stats['rows_per_second']:.0f} rows/sec)", rows=stats['imported'], duration=seconds)
+        if stats["reject_file"]:
+            append_log(log, f"{stats['rejected']} rows were rejected and written to '{stats['reject_file']}'", rows=stats['rejected'])
+    return stats
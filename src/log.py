@@ -0,0 +1,51 @@
+import csv
+import time
+from collections import deque
+from datetime import datetime
+
+LOG_MAX_RECORDS = 2000
+
+class LogRecord:
+    def __init__(self, message, operation=None, tab=None, rows=None, duration=None) -> None:
+        self.created = time.time()
+        self.message = message
+        self.operation = operation
+        self.tab = tab
+        self.rows = rows
+        self.duration = duration
+
+    def values(self):
+        created = datetime.fromtimestamp(self.created).isoformat(timespec="milliseconds")
+        duration = "" if self.duration is None else f"{self.duration:.3f}"
+        return [created, self.tab or "", self.operation or "", "" if self.rows is None else self.rows, duration, self.message]
+
+class LogSink:
+    # Keeps the last max_records records of a tab. The log view takes the pending records in batches,
+    # so a burst of messages costs one widget update instead of one per message.
+    HEADER = ["Time", "Tab", "Operation", "Rows", "Duration", "Message"]
+
+    def __init__(self, tab=None, max_records=LOG_MAX_RECORDS) -> None:
+        self.tab = tab
+        self.records = deque(maxlen=max_records)
+        self.pending = deque(maxlen=max_records)
+
+    def append(self, message, **fields):
+        self.add(LogRecord(message, **fields))
+
+    def add(self, record):
+        if record.tab is None:
+            record.tab = self.tab
+        self.records.append(record)
+        self.pending.append(record)
+
+    def take_pending(self):
+        records = list(self.pending)
+        self.pending.clear()
+        return records
+
+    def export(self, path):
+        with open(path, "w", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            writer.writerow(self.HEADER)
+            writer.writerows(record.values() for record in self.records)
+        return len(self.records)
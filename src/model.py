@@ -0,0 +1,216 @@
+from PyQt5.QtCore import Qt, QAbstractProxyModel, QAbstractTableModel, QModelIndex, pyqtSignal
+from src.columns import ColumnTable
+
+class TableModel(ColumnTable, QAbstractTableModel):
+    cell_edited = pyqtSignal(int, int, str, str)
+
+    def __init__(self, header, parent=None) -> None:
+        QAbstractTableModel.__init__(self, parent)
+        ColumnTable.__init__(self, header)
+
+    def begin_insert_rows(self, first, last):
+        self.beginInsertRows(QModelIndex(), first, last)
+
+    def end_insert_rows(self):
+        self.endInsertRows()
+
+    def begin_remove_rows(self, first, last):
+        self.beginRemoveRows(QModelIndex(), first, last)
+
+    def end_remove_rows(self):
+        self.endRemoveRows()
+
+    def begin_reset(self):
+        self.beginResetModel()
+
+    def end_reset(self):
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.amounts)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.header)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.header[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.column() >= self.DELETE:
+            return None
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            return self.value(index.row(), index.column())
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        if index.column() >= self.DELETE:
+            return Qt.ItemIsEnabled
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsEditable
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.EditRole or not index.isValid() or index.column() >= self.DELETE:
+            return False
+
+        row, col = index.row(), index.column()
+        value = str(value)
+        old_value = self.value(row, col)
+        if not self.set_value(row, col, value):
+            return False
+
+        self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.EditRole])
+        self.cell_edited.emit(row, col, old_value, value)
+        return True
+
+class SortFilterModel(QAbstractProxyModel):
+    # Shows the rows of a TableModel in sorted and filtered order through a list of source rows.
+    # Sort keys and sort orders are cached per column and dropped when the data changes.
+    def __init__(self, parent=None) -> None:
+        super().__init__(parent)
+        self.sort_column = -1
+        self.sort_order = Qt.AscendingOrder
+        self.filters = {}
+        self.rows = None
+        self.positions = None
+        self.keys = {}
+        self.orders = {}
+
+    def setSourceModel(self, model):
+        super().setSourceModel(model)
+        model.rowsAboutToBeInserted.connect(self.on_rows_about_to_be_inserted)
+        model.rowsInserted.connect(self.on_rows_inserted)
+        model.rowsAboutToBeRemoved.connect(self.on_rows_about_to_be_removed)
+        model.rowsRemoved.connect(self.on_rows_removed)
+        model.modelAboutToBeReset.connect(self.beginResetModel)
+        model.modelReset.connect(self.on_model_reset)
+        model.dataChanged.connect(self.on_data_changed)
+
+    def is_identity(self):
+        return self.sort_column < 0 and not self.filters
+
+    # Without sorting and filtering, row changes are passed on as they are so the view keeps its place
+    def on_rows_about_to_be_inserted(self, parent, first, last):
+        if self.is_identity():
+            self.beginInsertRows(QModelIndex(), first, last)
+
+    def on_rows_inserted(self, parent, first, last):
+        self.clear_cache()
+        if self.is_identity():
+            self.endInsertRows()
+        else:
+            self.refresh()
+
+    def on_rows_about_to_be_removed(self, parent, first, last):
+        if self.is_identity():
+            self.beginRemoveRows(QModelIndex(), first, last)
+
+    def on_rows_removed(self, parent, first, last):
+        self.clear_cache()
+        if self.is_identity():
+            self.endRemoveRows()
+        else:
+            self.refresh()
+
+    def on_model_reset(self):
+        self.clear_cache()
+        self.update_rows()
+        self.endResetModel()
+
+    def on_data_changed(self, top_left, bottom_right, roles=[]):
+        for col in range(top_left.column(), bottom_right.column() + 1):
+            self.keys.pop(col, None)
+            self.orders.pop((col, Qt.AscendingOrder), None)
+            self.orders.pop((col, Qt.DescendingOrder), None)
+        # An edited row stays in place until the next sort or filter
+        if top_left.row() != bottom_right.row() and not self.is_identity():
+            self.dataChanged.emit(self.index(0, top_left.column()), self.index(self.rowCount() - 1, bottom_right.column()), roles)
+            return
+        top_left, bottom_right = self.mapFromSource(top_left), self.mapFromSource(bottom_right)
+        if top_left.isValid() and bottom_right.isValid():
+            self.dataChanged.emit(top_left, bottom_right, roles)
+
+    def clear_cache(self):
+        self.keys.clear()
+        self.orders.clear()
+
+    def sort_keys(self, col):
+        if col not in self.keys:
+            self.keys[col] = self.sourceModel().sort_keys(col)
+        return self.keys[col]
+
+    def sorted_rows(self):
+        key = (self.sort_column, self.sort_order)
+        if key not in self.orders:
+            keys = self.sort_keys(self.sort_column)
+            self.orders[key] = sorted(range(len(keys)), key=keys.__getitem__, reverse=self.sort_order == Qt.DescendingOrder)
+        return self.orders[key]
+
+    def update_rows(self):
+        model = self.sourceModel()
+        self.positions = None
+        if self.is_identity():
+            self.rows = None
+            return
+        rows = self.sorted_rows() if self.sort_column >= 0 else range(model.rowCount())
+        if self.filters:
+            folded = self.sort_keys(model.DESCRIPTION) if self.filters.get("text") else None
+            matches = bytearray(model.rowCount())
+            for row in model.filter_rows(folded=folded, **self.filters):
+                matches[row] = 1
+            rows = [row for row in rows if matches[row]]
+        self.rows = list(rows)
+
+    def refresh(self):
+        self.beginResetModel()
+        self.update_rows()
+        self.endResetModel()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        if column >= self.sourceModel().DELETE:
+            column = -1
+        self.sort_column, self.sort_order = column, order
+        self.refresh()
+
+    def set_filters(self, **filters):
+        # category, method, min_amount, max_amount and text; empty values are ignored
+        self.filters = {name: value for name, value in filters.items() if value not in (None, "")}
+        self.refresh()
+
+    def source_row(self, row):
+        return row if self.rows is None else self.rows[row]
+
+    def index(self, row, column, parent=QModelIndex()):
+        if parent.isValid() or not 0 <= row < self.rowCount() or not 0 <= column < self.columnCount():
+            return QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index=QModelIndex()):
+        return QModelIndex()
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid() or self.sourceModel() is None:
+            return 0
+        return self.sourceModel().rowCount() if self.rows is None else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid() or self.sourceModel() is None:
+            return 0
+        return self.sourceModel().columnCount()
+
+    def mapToSource(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        return self.sourceModel().index(self.source_row(index.row()), index.column())
+
+    def mapFromSource(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        if self.rows is None:
+            return self.index(index.row(), index.column())
+        if self.positions is None:
+            self.positions = {row: position for position, row in enumerate(self.rows)}
+        position = self.positions.get(index.row())
+        return QModelIndex() if position is None else self.index(position, index.column())
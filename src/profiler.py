@@ -0,0 +1,156 @@
+import os
+import json
+import time
+import cProfile
+import threading
+from functools import wraps
+
+PROFILE_ENV = "ACCOUNTBOOK_PROFILE"
+PROFILE_LOG_ENV = "ACCOUNTBOOK_PROFILE_LOG"
+
+class SpanStats:
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.counters = {}
+
+    def add(self, duration, counters):
+        self.count += 1
+        self.total += duration
+        self.max = max(self.max, duration)
+        for counter, value in counters.items():
+            self.counters[counter] = self.counters.get(counter, 0) + value
+
+class Span:
+    def __init__(self, profiler, name, counters) -> None:
+        self.profiler = profiler
+        self.name = name
+        self.counters = counters
+        self.profile = None
+        self.started = 0.0
+
+    def add(self, counter, value=1):
+        self.counters[counter] = self.counters.get(counter, 0) + value
+
+    def __enter__(self):
+        self.profile = self.profiler.start_capture(self.name)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, error_type, error, traceback):
+        duration = time.perf_counter() - self.started
+        self.profiler.finish(self, duration, error_type)
+
+class NullSpan:
+    # Returned while profiling is off, so an instrumented call costs one attribute check
+    def add(self, counter, value=1):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, error_type, error, traceback):
+        pass
+
+NULL_SPAN = NullSpan()
+
+class FileSink:
+    # Appends one JSON line per finished span
+    def __init__(self, path) -> None:
+        self.path = path
+        self.lock = threading.Lock()
+
+    def __call__(self, record):
+        line = json.dumps(record, separators=(",", ":"))
+        with self.lock:
+            with open(self.path, "a", encoding="utf-8") as file:
+                file.write(line + "\n")
+
+class Profiler:
+    # Timing spans with counters. Sinks get a record per finished span and may run on worker threads.
+    def __init__(self, enabled=False) -> None:
+        self.enabled = enabled
+        self.stats = {}
+        self.sinks = []
+        self.lock = threading.Lock()
+        self.capture_name = None
+        self.capture_directory = "."
+        self.last_profile = None
+
+    def span(self, name, **counters):
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, counters)
+
+    def add_sink(self, sink):
+        self.sinks.append(sink)
+
+    def remove_sink(self, sink):
+        if sink in self.sinks:
+            self.sinks.remove(sink)
+
+    def capture_next(self, name, directory="."):
+        # The next run of the span is recorded with cProfile and written to a .prof file
+        self.capture_name = name
+        self.capture_directory = directory
+
+    def start_capture(self, name):
+        if self.capture_name != name:
+            return None
+        with self.lock:
+            if self.capture_name != name:
+                return None
+            self.capture_name = None
+        profile = cProfile.Profile()
+        profile.enable()
+        return profile
+
+    def finish(self, span, duration, error_type=None):
+        record = {"name": span.name, "seconds": duration, "counters": span.counters, "time": time.time()}
+        if error_type is not None:
+            record["error"] = error_type.__name__
+        if span.profile is not None:
+            span.profile.disable()
+            path = os.path.join(self.capture_directory, f"{span.name}-{time.strftime('%Y%m%d-%H%M%S')}.prof")
+            span.profile.dump_stats(path)
+            record["profile"] = self.last_profile = path
+
+        with self.lock:
+            self.stats.setdefault(span.name, SpanStats()).add(duration, span.counters)
+        for sink in list(self.sinks):
+            sink(record)
+
+    def snapshot(self):
+        # (name, count, total, mean, max, counters), slowest in total first
+        with self.lock:
+            rows = [(name, stats.count, stats.total, stats.total / stats.count, stats.max, dict(stats.counters)) for name, stats in self.stats.items()]
+        return sorted(rows, key=lambda row: row[2], reverse=True)
+
+    def reset(self):
+        with self.lock:
+            self.stats = {}
+
+def profiled(name):
+    # Wraps a function in a span. Qt hands extra signal arguments to callables that accept them,
+    # so like a plain slot the wrapper drops the ones the function does not take.
+    def decorator(function):
+        argcount = function.__code__.co_argcount
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            with get_profiler().span(name):
+                return function(*args[:argcount], **kwargs)
+        return wrapper
+    return decorator
+
+_profiler = None
+
+def get_profiler():
+    global _profiler
+    if _profiler is None:
+        log_path = os.environ.get(PROFILE_LOG_ENV)
+        _profiler = Profiler(enabled=os.environ.get(PROFILE_ENV, "") not in ("", "0") or bool(log_path))
+        if log_path:
+            _profiler.add_sink(FileSink(log_path))
+    return _profiler
@@ -0,0 +1,134 @@
+import os
+import csv
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from src.columns import HEADER
+from src.file_manager import TAB_NAMES, atomic_write, month_files
+from src.sidecar import read_month_values
+from src.summary import summarize_month
+from src.utils import append_log
+
+REPORT_DIRECTORY = "Reports"
+ENTRY_HEADER = ["Tab"] + HEADER
+
+def summarize_file(path):
+    # Runs in a worker process and sends back only the totals of the month; the rows are
+    # streamed into the entries file by the parent, so they are never pickled or held all at once
+    return summarize_month(path)
+
+def map_files(paths, workers, progress=None):
+    # Results in the order of paths, whatever order the workers finish in
+    results = [None] * len(paths)
+    if workers <= 1 or len(paths) <= 1:
+        for i, path in enumerate(paths):
+            results[i] = summarize_file(path)
+            if progress is not None:
+                progress((i + 1) * 100 // len(paths))
+        return results
+
+    # Spawned workers do not inherit the threads of the parent, which a forked Qt process would
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        futures = {executor.submit(summarize_file, path): i for i, path in enumerate(paths)}
+        try:
+            for done, future in enumerate(as_completed(futures), 1):
+                results[futures[future]] = future.result()
+                if progress is not None:
+                    progress(done * 100 // len(paths))
+        except BaseException:
+            executor.shutdown(wait=True, cancel_futures=True)
+            raise
+    return results
+
+def build_report(root="Result", years=None, tabs=None, workers=None, progress=None):
+    # Summarizes the selected month files in a process pool and merges the summaries into
+    # a monthly balance of the tabs and totals by category per year, with the files of each year
+    files = [
+        (year, month, tab_name, path) for year, month, tab_name, path in month_files(root)
+        if (years is None or year in years) and (tabs is None or tab_name in tabs)
+    ]
+    workers = workers or os.cpu_count() or 1
+    results = map_files([path for year, month, tab_name, path in files], min(workers, len(files)), progress)
+
+    report = {}
+    for (year, month, tab_name, path), summary in zip(files, results):
+        year_report = report.setdefault(year, {"files": [], "balance": {}, "categories": {}})
+        year_report["files"].append((tab_name, path))
+
+        balance = year_report["balance"].setdefault(month, dict.fromkeys(TAB_NAMES, 0))
+        balance[tab_name] = balance.get(tab_name, 0) + summary["total"]
+
+        for category, (count, total) in summary["categories"].items():
+            totals = year_report["categories"].setdefault((tab_name, category), [0, 0])
+            totals[0] += count
+            totals[1] += total
+    return report
+
+def balance_rows(balance):
+    # Balance is income less expenses and savings
+    rows = []
+    year_totals = dict.fromkeys(TAB_NAMES, 0)
+    for month, totals in sorted(balance.items()):
+        values = [totals.get(tab_name, 0) for tab_name in TAB_NAMES]
+        rows.append([month, *values, values[0] - values[1] - values[2]])
+        for tab_name, value in zip(TAB_NAMES, values):
+            year_totals[tab_name] += value
+    values = list(year_totals.values())
+    rows.append(["Total", *values, values[0] - values[1] - values[2]])
+    return rows
+
+def category_rows(categories):
+    tab_totals = {}
+    for (tab_name, category), (count, total) in categories.items():
+        tab_totals[tab_name] = tab_totals.get(tab_name, 0) + total
+    rows = []
+    for (tab_name, category), (count, total) in sorted(categories.items()):
+        share = total * 100 / tab_totals[tab_name] if tab_totals[tab_name] else 0
+        rows.append([tab_name, category, count, total, f"{share:.1f}"])
+    return rows
+
+def write_csv_file(path, header, rows):
+    with atomic_write(path, newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+def write_entries(path, files):
+    # One month file at a time, so memory does not grow with the archive
+    count = 0
+    with atomic_write(path, newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(ENTRY_HEADER)
+        for tab_name, month_path in files:
+            rows = read_month_values(month_path)
+            writer.writerows([tab_name] + row for row in rows)
+            count += len(rows)
+    return count
+
+def write_report(report, directory=REPORT_DIRECTORY):
+    # <year>_entries.csv, <year>_balance.csv and <year>_categories.csv for every year of the report.
+    # Returns the written paths and the number of entries.
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    count = 0
+    for year, year_report in sorted(report.items()):
+        path = os.path.join(directory, f"{year}_entries.csv")
+        count += write_entries(path, year_report["files"])
+        paths.append(path)
+        outputs = (
+            ("balance", ["Month"] + TAB_NAMES + ["Balance"], balance_rows(year_report["balance"])),
+            ("categories", ["Tab", "Category", "Count", "Total", "Share"], category_rows(year_report["categories"])),
+        )
+        for name, header, rows in outputs:
+            path = os.path.join(directory, f"{year}_{name}.csv")
+            write_csv_file(path, header, rows)
+            paths.append(path)
+    return paths, count
+
+def export_report(log, directory=REPORT_DIRECTORY, years=None, tabs=None, workers=None, progress=None, root="Result"):
+    report = build_report(root, years, tabs, workers, progress)
+    if not report:
+        append_log(log, "There are no month files to report.")
+        return []
+    paths, rows = write_report(report, directory)
+    append_log(log, f"Report for {', '.join(sorted(report))} written to '{directory}'", rows=rows)
+    return paths
@@ -0,0 +1,222 @@
+import os
+import re
+import json
+import threading
+from collections import OrderedDict
+from bisect import bisect_left
+from src.file_manager import atomic_write, month_files, month_signature
+from src.sidecar import read_month_values
+from src.utils import LoadError
+
+SEARCH_INDEX_DIRECTORY = ".search"
+SEARCH_LIMIT = 500
+SEARCH_ROW_CACHE_SIZE = 24
+TERM_PATTERN = re.compile(r"\w+")
+
+def row_terms(row):
+    # Category, Method and Description are searchable
+    return set(TERM_PATTERN.findall(" ".join(row[1:4]).lower()))
+
+def file_key(path):
+    # Result/<year>/<month>_<tab>.csv -> <year>/<month>/<tab>
+    year = os.path.basename(os.path.dirname(path))
+    month, _, tab_name = os.path.splitext(os.path.basename(path))[0].partition("_")
+    return f"{year}/{month}/{tab_name}"
+
+def file_postings(rows):
+    # Row numbers of the month file per term, without the header
+    postings = {}
+    for number, row in enumerate(rows):
+        for term in row_terms(row):
+            postings.setdefault(term, []).append(number)
+    return postings
+
+class SearchIndex:
+    # Inverted index from terms to the rows of the month files that contain them.
+    # Each month file has its own part in Result/.search/<year>_<month>_<tab>.json holding row numbers only,
+    # so saving a month rewrites only its part. Matching rows are read from the month files.
+    # Queries use the index in memory; refresh() brings it up to date with files changed outside the app.
+    def __init__(self, root="Result") -> None:
+        self.root = root
+        self.directory = os.path.join(root, SEARCH_INDEX_DIRECTORY)
+        self.lock = threading.Lock()
+        self.entries = None
+        self.postings = None
+        self.terms = None
+        self.rows = OrderedDict()
+
+    def part_path(self, key):
+        return os.path.join(self.directory, key.replace("/", "_") + ".json")
+
+    def read_index(self):
+        if self.entries is not None:
+            return
+        self.entries, self.postings = {}, {}
+        if not os.path.isdir(self.directory):
+            return
+        for file_name in os.listdir(self.directory):
+            if not file_name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.directory, file_name), "r", encoding="utf-8") as file:
+                    data = json.load(file)
+            except (json.JSONDecodeError, IOError):
+                continue
+            if isinstance(data, dict) and "key" in data and "signature" in data and "postings" in data:
+                self.add_file(data["key"], data["signature"], data["postings"])
+
+    def write_part(self, key):
+        os.makedirs(self.directory, exist_ok=True)
+        with atomic_write(self.part_path(key)) as file:
+            json.dump({"key": key, **self.entries[key]}, file, ensure_ascii=False, separators=(",", ":"))
+
+    def remove_part(self, key):
+        path = self.part_path(key)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def remove_file(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        for term in entry["postings"]:
+            files = self.postings.get(term)
+            if files is not None:
+                files.pop(key, None)
+                if not files:
+                    del self.postings[term]
+        self.terms = None
+
+    def add_file(self, key, signature, postings):
+        self.entries[key] = {"signature": signature, "postings": postings}
+        for term, numbers in postings.items():
+            self.postings.setdefault(term, {})[key] = numbers
+        self.terms = None
+
+    def update_file(self, path, rows):
+        # Called after a month file is saved, with its rows without the header
+        with self.lock:
+            self.read_index()
+            key = file_key(path)
+            self.remove_file(key)
+            self.add_file(key, month_signature(path), file_postings(rows))
+            self.write_part(key)
+
+    def refresh(self):
+        # Re-indexes only the month files whose signature changed, for example after an import.
+        # Runs on a worker when the search tab is shown; the files are read without holding the lock,
+        # so queries keep answering from the index in memory meanwhile.
+        with self.lock:
+            self.read_index()
+            indexed = {key: entry["signature"] for key, entry in self.entries.items()}
+
+        changed, removed = {}, dict(indexed)
+        for year, month, tab_name, path in month_files(self.root):
+            key = f"{year}/{month}/{tab_name}"
+            signature = month_signature(path)
+            if removed.pop(key, None) == signature:
+                continue
+            try:
+                changed[key] = (signature, file_postings(read_month_values(path)))
+            except (OSError, ValueError, LoadError):
+                continue
+
+        with self.lock:
+            # Months saved by update_file() in the meantime are already newer than what was read here
+            current = {key: entry["signature"] for key, entry in self.entries.items()}
+            for key, (signature, postings) in changed.items():
+                if current.get(key) != indexed.get(key):
+                    continue
+                self.remove_file(key)
+                self.add_file(key, signature, postings)
+                try:
+                    self.write_part(key)
+                except OSError:
+                    pass
+            # Month files that are gone
+            for key, signature in removed.items():
+                if current.get(key) != signature:
+                    continue
+                self.remove_file(key)
+                try:
+                    self.remove_part(key)
+                except OSError:
+                    pass
+
+    def result_rows(self, key):
+        # Rows of an indexed month file, cached for the signature they were indexed with.
+        # A file that changed since then is left out until the next refresh, since its row numbers no longer match.
+        signature = self.entries[key]["signature"]
+        cached = self.rows.get(key)
+        if cached is not None and cached[0] == signature:
+            self.rows.move_to_end(key)
+            return cached[1]
+        year, month, tab_name = key.split("/")
+        path = os.path.join(self.root, year, f"{month}_{tab_name}.csv")
+        if month_signature(path) != signature:
+            return None
+        try:
+            rows = read_month_values(path)
+        except (OSError, ValueError, LoadError):
+            return None
+        self.rows[key] = (signature, rows)
+        if len(self.rows) > SEARCH_ROW_CACHE_SIZE:
+            self.rows.popitem(last=False)
+        return rows
+
+    def matching_terms(self, prefix):
+        # Query words match terms starting with them, so results show up while typing
+        if self.terms is None:
+            self.terms = sorted(self.postings)
+        position = bisect_left(self.terms, prefix)
+        while position < len(self.terms) and self.terms[position].startswith(prefix):
+            yield self.terms[position]
+            position += 1
+
+    def search(self, query, tabs=None, limit=SEARCH_LIMIT):
+        # Returns (year, month, tab name, row) for the rows containing every word of the query
+        words = TERM_PATTERN.findall(query.lower())
+        if not words:
+            return []
+
+        with self.lock:
+            self.read_index()
+
+            # Matching row numbers per month file, narrowed down word by word
+            matches = None
+            for word in words:
+                rows = {}
+                for term in self.matching_terms(word):
+                    for key, numbers in self.postings[term].items():
+                        if matches is None or key in matches:
+                            rows.setdefault(key, set()).update(numbers)
+                if matches is not None:
+                    rows = {key: numbers & matches[key] for key, numbers in rows.items()}
+                matches = {key: numbers for key, numbers in rows.items() if numbers}
+                if not matches:
+                    return []
+
+            # Newest months first; only the files needed to reach the limit are sorted
+            results = []
+            for key in sorted(matches, key=lambda key: key.split("/")[:2], reverse=True):
+                year, month, tab_name = key.split("/")
+                if tabs is not None and tab_name not in tabs:
+                    continue
+                rows = self.result_rows(key)
+                if rows is None:
+                    continue
+                for number in sorted(matches[key], reverse=True):
+                    if number >= len(rows):
+                        continue
+                    results.append((year, month, tab_name, rows[number]))
+                    if len(results) >= limit:
+                        return results
+            return results
+
+_search_index = None
+
+def get_search_index():
+    global _search_index
+    if _search_index is None:
+        _search_index = SearchIndex()
+    return _search_index
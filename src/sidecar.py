@@ -0,0 +1,171 @@
+import os
+import sys
+import mmap
+import struct
+from array import array
+from src.columns import StringPool, prepare_columns
+from src.file_manager import atomic_write, csv_path, journal_path, load_from_csv, read_month_rows
+from src.profiler import get_profiler
+from src.utils import append_log
+from src.utils import AddRowError
+
+# Binary copy of the columns of a month file, next to it as <month>_<tab>.cols.
+# Layout after the header: string offsets, dates, categories, methods, amounts,
+# description offsets, then the string and description blobs. Offsets count characters.
+SIDECAR_MAGIC = b"ABCOLS1\n"
+SIDECAR_HEADER = struct.Struct("<8sqqIIQQ")
+
+def sidecar_path(path):
+    return os.path.splitext(path)[0] + ".cols"
+
+def to_bytes(values):
+    # Stored little-endian on every platform
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+def from_bytes(typecode, data):
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+def text_offsets(values):
+    offsets = array("Q", [0])
+    total = 0
+    for value in values:
+        total += len(value)
+        offsets.append(total)
+    return offsets
+
+def write_sidecar(path, columns, stat=None):
+    # stat is that of the file the columns were read from, taken before reading it
+    strings, dates, categories, methods, descriptions, amounts = columns
+    string_blob = "".join(strings.values).encode("utf-8")
+    description_blob = "".join(descriptions).encode("utf-8")
+    stat = stat or os.stat(path)
+    header = SIDECAR_HEADER.pack(
+        SIDECAR_MAGIC, stat.st_size, stat.st_mtime_ns, len(amounts), len(strings.values), len(string_blob), len(description_blob)
+    )
+    with atomic_write(sidecar_path(path), binary=True) as file:
+        file.write(header)
+        for values in (text_offsets(strings.values), dates, categories, methods, amounts, text_offsets(descriptions)):
+            file.write(to_bytes(values))
+        file.write(string_blob)
+        file.write(description_blob)
+
+def split_text(blob, offsets):
+    return [blob[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+
+def read_sidecar(path):
+    # Returns the columns of path, or None when there is no sidecar or the file changed since it was written
+    sidecar = sidecar_path(path)
+    if not os.path.exists(sidecar) or os.path.exists(journal_path(path)):
+        return None
+    stat = os.stat(path)
+    with open(sidecar, "rb") as file:
+        if os.fstat(file.fileno()).st_size < SIDECAR_HEADER.size:
+            return None
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            magic, size, mtime, rows, string_count, string_bytes, description_bytes = SIDECAR_HEADER.unpack_from(data)
+            if magic != SIDECAR_MAGIC or size != stat.st_size or mtime != stat.st_mtime_ns:
+                return None
+
+            layout = (("Q", string_count + 1), ("I", rows), ("I", rows), ("I", rows), ("q", rows), ("Q", rows + 1))
+            if len(data) != SIDECAR_HEADER.size + sum(count * array(typecode).itemsize for typecode, count in layout) + string_bytes + description_bytes:
+                return None
+
+            view = memoryview(data)
+            try:
+                position = SIDECAR_HEADER.size
+                sections = []
+                for typecode, count in layout:
+                    end = position + count * array(typecode).itemsize
+                    sections.append(from_bytes(typecode, view[position:end]))
+                    position = end
+                string_blob = str(view[position:position + string_bytes], "utf-8")
+                position += string_bytes
+                description_blob = str(view[position:position + description_bytes], "utf-8")
+            finally:
+                view.release()
+
+    string_offsets, dates, categories, methods, amounts, description_offsets = sections
+    if len(string_blob) != string_offsets[-1] or len(description_blob) != description_offsets[-1]:
+        return None
+    strings = StringPool()
+    strings.values = split_text(string_blob, string_offsets)
+    strings.codes = {value: code for code, value in enumerate(strings.values)}
+    return strings, dates, categories, methods, split_text(description_blob, description_offsets), amounts
+
+def column_rows(columns):
+    # Rows of strings as they appear in the month file, without the header
+    strings, dates, categories, methods, descriptions, amounts = columns
+    values = strings.values
+    return [
+        [values[date], values[category], values[method], description, str(amount)]
+        for date, category, method, description, amount in zip(dates, categories, methods, descriptions, amounts)
+    ]
+
+def read_month_columns(path):
+    # Columns of a month file for scans over many months. The sidecar is used when it is current
+    # and written when the file has no pending journal; rows that do not fit the columns raise AddRowError.
+    with get_profiler().span("file.read_month_columns") as span:
+        try:
+            columns = read_sidecar(path)
+        except (OSError, ValueError, struct.error):
+            columns = None
+        if columns is not None:
+            span.add("sidecar_hits")
+            return columns
+
+        has_journal = os.path.exists(journal_path(path))
+        stat = os.stat(path)
+        columns = prepare_columns(read_month_rows(path))
+        if not has_journal:
+            try:
+                write_sidecar(path, columns, stat)
+            except OSError:
+                pass
+        return columns
+
+def read_month_values(path):
+    # Rows of a month file without the header, from the sidecar when possible.
+    # Files with rows that do not fit the columns are read as text.
+    try:
+        return column_rows(read_month_columns(path))
+    except AddRowError:
+        return [row[:5] for row in read_month_rows(path)[1:] if row]
+
+def load_columns_from_csv(tab_name, date, log, progress=None):
+    # Like load_from_csv, but returns the columns and skips parsing the file when its sidecar is current.
+    # Also returns the amounts that are not whole numbers by row, so one bad cell does not stop the month from loading.
+    path = csv_path(tab_name, date)
+    with get_profiler().span("file.load_columns") as span:
+        try:
+            columns = read_sidecar(path) if os.path.exists(path) else None
+        except (OSError, ValueError, struct.error):
+            columns = None
+        if columns is not None:
+            span.add("sidecar_hits")
+            if progress is not None:
+                progress(100)
+            append_log(log, f"Data successfully loaded from '{path}'", rows=len(columns[-1]))
+            return columns, {}
+
+        # Stat before reading, so a write during the read leaves a sidecar that no longer matches the file
+        stat = os.stat(path) if os.path.exists(path) else None
+        has_journal = os.path.exists(journal_path(path))
+        rows = load_from_csv(tab_name, date, log, progress)
+        amount_texts = {}
+        columns = prepare_columns(rows, amount_texts)
+        if amount_texts:
+            shown = ", ".join(str(row + 1) for row in sorted(amount_texts)[:5])
+            append_log(log, f"Amounts that are not whole numbers in '{path}' are kept as text and count as 0 until corrected (rows {shown})", rows=len(amount_texts))
+        elif rows and stat is not None and not has_journal:
+            try:
+                write_sidecar(path, columns, stat)
+            except OSError as e:
+                append_log(log, f"Failed to write the column cache for '{path}': {e}")
+        return columns, amount_texts
@@ -0,0 +1,197 @@
+import os
+import sqlite3
+from contextlib import closing
+from src.file_manager import load_from_csv, save_to_csv, csv_path, read_month_rows, month_files, track_progress
+from src.analytics import get_analytics_store
+from src.columns import HEADER, prepare_columns
+from src.search import get_search_index
+from src.sidecar import load_columns_from_csv
+from src.utils import append_log
+from src.utils import LoadError, SaveError
+
+class CsvStorage:
+    name = "csv"
+
+    def source(self, tab_name, date):
+        return csv_path(tab_name, date)
+
+    def load_month(self, tab_name, date, log, progress=None):
+        return load_from_csv(tab_name, date, log, progress)
+
+    def load_columns(self, tab_name, date, log, progress=None):
+        return load_columns_from_csv(tab_name, date, log, progress)
+
+    def save_month(self, tab_name, date, model, log, progress=None):
+        path = csv_path(tab_name, date)
+        if not save_to_csv(tab_name, date, model, log, progress):
+            return
+        get_analytics_store().invalidate(path)
+
+        # Keep the search index in step with the saved month. The month is already saved at this point,
+        # so a failure only leaves its part stale; the next search re-indexes it from the file.
+        try:
+            get_search_index().update_file(path, [model.row_values(row) for row in range(model.rowCount())])
+        except Exception as e:
+            append_log(log, f"Failed to update the search index for '{path}': {e}")
+
+class SqliteStorage:
+    name = "sqlite"
+    DATABASE_FILE = "accountbook.db"
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS entries (
+            id INTEGER PRIMARY KEY,
+            tab TEXT NOT NULL,
+            month TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            date TEXT NOT NULL,
+            category TEXT NOT NULL,
+            method TEXT NOT NULL,
+            description TEXT NOT NULL,
+            amount INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_entries_tab_month ON entries (tab, month, position);
+        CREATE INDEX IF NOT EXISTS idx_entries_tab_date ON entries (tab, date);
+        CREATE INDEX IF NOT EXISTS idx_entries_category ON entries (category);
+        CREATE INDEX IF NOT EXISTS idx_entries_method ON entries (method);
+    """
+
+    def __init__(self, path=DATABASE_FILE, csv_root="Result") -> None:
+        self.path = path
+        is_new = not os.path.exists(path)
+        with closing(self.connect()) as connection:
+            connection.executescript(self.SCHEMA)
+
+        # Import the existing CSV records the first time the database is created
+        if is_new and os.path.isdir(csv_root):
+            try:
+                self.migrate_from_csv(csv_root)
+            except Exception:
+                # Otherwise the next start finds the database and never imports the records
+                os.remove(path)
+                raise
+
+    def connect(self):
+        # A connection per operation keeps the backend usable from worker threads
+        return sqlite3.connect(self.path)
+
+    def source(self, tab_name, date):
+        return f"{self.path}:{tab_name}:{'-'.join(date.split('-')[:2])}"
+
+    def load_month(self, tab_name, date, log, progress=None):
+        month = "-".join(date.split("-")[:2])
+        try:
+            with closing(self.connect()) as connection:
+                (total,) = connection.execute("SELECT COUNT(*) FROM entries WHERE tab = ? AND month = ?", (tab_name, month)).fetchone()
+                cursor = connection.execute(
+                    "SELECT date, category, method, description, amount FROM entries "
+                    "WHERE tab = ? AND month = ? ORDER BY position",
+                    (tab_name, month),
+                )
+                rows = list(track_progress(cursor, total, progress))
+        except sqlite3.Error as e:
+            raise LoadError(f"Failed to load data: {e}")
+
+        if not rows:
+            append_log(log, "There is no data to load.")
+            return []
+
+        append_log(log, f"Data successfully loaded from '{self.path}'", rows=len(rows))
+        return [HEADER] + [[date, category, method, description, str(amount)] for date, category, method, description, amount in rows]
+
+    def load_columns(self, tab_name, date, log, progress=None):
+        amount_texts = {}
+        return prepare_columns(self.load_month(tab_name, date, log, progress), amount_texts), amount_texts
+
+    def save_month(self, tab_name, date, model, log, progress=None):
+        month = "-".join(date.split("-")[:2])
+        try:
+            if model.source_path == self.source(tab_name, date):
+                self.update_month(tab_name, month, model)
+            else:
+                rows = (model.row_values(row) for row in track_progress(range(model.rowCount()), model.rowCount(), progress))
+                self.replace_month(tab_name, month, rows)
+        except (sqlite3.Error, ValueError) as e:
+            raise SaveError(f"Failed to save data: {e}")
+        model.mark_clean(self.source(tab_name, date))
+        append_log(log, f"Data successfully saved to '{self.path}'", rows=model.rowCount())
+
+    def update_month(self, tab_name, month, model):
+        # Writes only the rows that changed since the month was loaded
+        updated, deleted, inserted = model.changed_rows()
+        with closing(self.connect()) as connection:
+            with connection:
+                positions = [position for (position,) in connection.execute(
+                    "SELECT position FROM entries WHERE tab = ? AND month = ? ORDER BY position", (tab_name, month)
+                )]
+                if len(positions) != model.original_count:
+                    rows = (model.row_values(row) for row in range(model.rowCount()))
+                    self.write_month(connection, tab_name, month, rows)
+                    return
+
+                connection.executemany(
+                    "UPDATE entries SET date = ?, category = ?, method = ?, description = ?, amount = ? "
+                    "WHERE tab = ? AND month = ? AND position = ?",
+                    ((date, category, method, description, int(amount), tab_name, month, positions[row_id]) for row_id, (date, category, method, description, amount), _ in updated),
+                )
+                connection.executemany(
+                    "DELETE FROM entries WHERE tab = ? AND month = ? AND position = ?",
+                    ((tab_name, month, positions[row_id]) for row_id in deleted),
+                )
+                first = positions[-1] + 1 if positions else 0
+                connection.executemany(
+                    "INSERT INTO entries (tab, month, position, date, category, method, description, amount) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        (tab_name, month, first + i, date, category, method, description, int(amount))
+                        for i, (date, category, method, description, amount) in enumerate(inserted)
+                    ),
+                )
+
+    def replace_month(self, tab_name, month, rows):
+        # One transaction per month
+        with closing(self.connect()) as connection:
+            with connection:
+                self.write_month(connection, tab_name, month, rows)
+
+    def write_month(self, connection, tab_name, month, rows):
+        connection.execute("DELETE FROM entries WHERE tab = ? AND month = ?", (tab_name, month))
+        connection.executemany(
+            "INSERT INTO entries (tab, month, position, date, category, method, description, amount) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                (tab_name, month, position, date, category, method, description, int(amount))
+                for position, (date, category, method, description, amount) in enumerate(rows)
+            ),
+        )
+
+    def migrate_from_csv(self, root="Result", log=None):
+        count = 0
+        with closing(self.connect()) as connection:
+            with connection:
+                for year, month, tab_name, path in month_files(root):
+                    rows = read_month_rows(path)
+                    try:
+                        self.write_month(connection, tab_name, f"{year}-{month}", (row[:5] for row in rows[1:] if row))
+                    except ValueError as e:
+                        raise LoadError(f"Could not import '{path}' into '{self.path}': {e}")
+                    count += 1
+        if log is not None:
+            append_log(log, f"{count} month files imported into '{self.path}'")
+        return count
+
+STORAGE_BACKENDS = {
+    CsvStorage.name: CsvStorage,
+    SqliteStorage.name: SqliteStorage,
+}
+
+_storage = None
+
+def get_storage():
+    global _storage
+    if _storage is None:
+        backend = os.environ.get("ACCOUNTBOOK_STORAGE", CsvStorage.name).lower()
+        if backend not in STORAGE_BACKENDS:
+            raise LoadError(f"Unknown storage backend: {backend}")
+        _storage = STORAGE_BACKENDS[backend]()
+    return _storage
@@ -0,0 +1,116 @@
+import os
+import json
+from src.file_manager import atomic_write, read_month_rows, month_files, month_signature
+from src.sidecar import read_month_columns
+from src.utils import AddRowError, LoadError
+
+SUMMARY_INDEX_FILE = ".summary_index.json"
+
+def summarize_rows(rows):
+    summary = {"count": 0, "total": 0, "categories": {}, "methods": {}}
+    for row in rows[1:]:
+        if len(row) < 5:
+            continue
+        try:
+            amount = int(row[4])
+        except ValueError:
+            continue
+        summary["count"] += 1
+        summary["total"] += amount
+        for group, key in (("categories", row[1]), ("methods", row[2])):
+            totals = summary[group].setdefault(key, [0, 0])
+            totals[0] += 1
+            totals[1] += amount
+    return summary
+
+def summarize_columns(columns):
+    # Same totals as summarize_rows, from the codes and amounts without building rows
+    strings, dates, categories, methods, descriptions, amounts = columns
+    summary = {"count": len(amounts), "total": sum(amounts), "categories": {}, "methods": {}}
+    for group, codes in (("categories", categories), ("methods", methods)):
+        totals = {}
+        for code, amount in zip(codes, amounts):
+            total = totals.get(code)
+            if total is None:
+                totals[code] = [1, amount]
+            else:
+                total[0] += 1
+                total[1] += amount
+        summary[group] = {strings.values[code]: total for code, total in totals.items()}
+    return summary
+
+def summarize_month(path):
+    try:
+        return summarize_columns(read_month_columns(path))
+    except AddRowError:
+        # Rows that do not fit the columns are skipped, as in a text scan
+        return summarize_rows(read_month_rows(path))
+
+class SummaryIndex:
+    def __init__(self, root="Result") -> None:
+        self.root = root
+        self.path = os.path.join(root, SUMMARY_INDEX_FILE)
+        self.entries = self.read_index()
+
+    def read_index(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                entries = json.load(file)
+            return entries if isinstance(entries, dict) else {}
+        except (json.JSONDecodeError, IOError):
+            return {}
+
+    def write_index(self):
+        os.makedirs(self.root, exist_ok=True)
+        with atomic_write(self.path) as file:
+            json.dump(self.entries, file, separators=(",", ":"))
+
+    def refresh(self):
+        # Re-scans only the month files whose signature changed since the last refresh
+        entries = {}
+        changed = False
+        for year, month, tab_name, path in month_files(self.root):
+            key = f"{year}/{month}/{tab_name}"
+            signature = month_signature(path)
+            entry = self.entries.get(key)
+            if entry is None or entry["signature"] != signature:
+                try:
+                    summary = summarize_month(path)
+                except (OSError, ValueError, LoadError):
+                    continue
+                entry = {"signature": signature, "summary": summary}
+                changed = True
+            entries[key] = entry
+
+        if changed or len(entries) != len(self.entries):
+            self.entries = entries
+            self.write_index()
+        return self.entries
+
+    def months(self, tabs=None, years=None):
+        # Yields (year, month, tab name, summary) for the selected tabs and years
+        for key, entry in sorted(self.refresh().items()):
+            year, month, tab_name = key.split("/")
+            if (tabs is None or tab_name in tabs) and (years is None or year in years):
+                yield year, month, tab_name, entry["summary"]
+
+    def aggregate(self, tabs=None, years=None):
+        result = {"months": [], "tabs": {}, "categories": {}, "methods": {}}
+        for year, month, tab_name, summary in self.months(tabs, years):
+            result["months"].append((year, month, tab_name, summary["count"], summary["total"]))
+
+            totals = result["tabs"].setdefault(tab_name, [0, 0])
+            totals[0] += summary["count"]
+            totals[1] += summary["total"]
+
+            for group in ("categories", "methods"):
+                for name, (count, total) in summary[group].items():
+                    totals = result[group].setdefault((tab_name, name), [0, 0])
+                    totals[0] += count
+                    totals[1] += total
+        return result
+
+    def years(self):
+        return sorted({key.split("/")[0] for key in self.refresh()})
@@ -1,82 +1,124 @@
-from PyQt5.QtWidgets import QTableWidget, QTableWidgetItem, QMessageBox, QPushButton
-from src.utils import AddRowError
+from PyQt5.QtWidgets import QApplication, QStyle, QStyledItemDelegate, QStyleOptionButton
+from PyQt5.QtCore import Qt, QEvent, pyqtSignal
+from src.columns import prepare_columns, validate_rows
+from src.history import History, InsertRows, DeleteRow, EditCell
+from src.profiler import get_profiler, profiled
+
+class DeleteButtonDelegate(QStyledItemDelegate):
+    clicked = pyqtSignal(int)
+
+    def __init__(self, parent=None) -> None:
+        super().__init__(parent)
+        self.pressed_row = None
+
+    def paint(self, painter, option, index):
+        button = QStyleOptionButton()
+        button.rect = option.rect
+        button.text = "-"
+        button.state = QStyle.State_Enabled | QStyle.State_Raised
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawControl(QStyle.CE_PushButton, button, painter, option.widget)
+
+    def editorEvent(self, event, model, option, index):
+        # The row is looked up when the click happens, so nothing has to be rebuilt after deletes.
+        # The emitted row is that of the source model, whatever the sort and filter of the view.
+        if event.type() == QEvent.MouseButtonPress and event.button() == Qt.LeftButton:
+            self.pressed_row = index.row()
+            return True
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            if self.pressed_row == index.row() and option.rect.contains(event.pos()):
+                self.clicked.emit(model.mapToSource(index).row() if hasattr(model, "mapToSource") else index.row())
+            self.pressed_row = None
+            return True
+        return super().editorEvent(event, model, option, index)
 
 class Table:
     def __init__(self, parent, table) -> None:
         self.parent = parent
         self.table = table
+        self.proxy = table.model()
+        self.model = self.proxy.sourceModel() if hasattr(self.proxy, "sourceModel") else self.proxy
+        self.delete_delegate = DeleteButtonDelegate(self.table)
+        self.delete_delegate.clicked.connect(self.delete_row)
+        self.table.setItemDelegateForColumn(self.model.DELETE, self.delete_delegate)
+        self.model.cell_edited.connect(self.on_cell_edited)
+        self.history = History()
         self.is_loaded = False
-        self.is_cell_changed = False
-        self.is_inserted = False
-        self.is_deleted = False
-        self.deleted_rows_stack = []
+
+    @property
+    def is_cell_changed(self):
+        return self.model.tracker.has_edits()
+
+    @property
+    def is_inserted(self):
+        return self.model.tracker.has_inserts()
+
+    @property
+    def is_deleted(self):
+        return self.model.tracker.has_deletes()
 
     def reset(self, rows: list):
-        self.clear()
-        for row in rows[1:]:
-            if row:
-                self.add_row(row[0], row[1], row[2], row[3], row[4])
+        self.reset_columns(self.prepare_rows(rows))
+
+    def prepare_rows(self, rows: list):
+        # Does not touch the model, so it can run on a worker thread
+        with get_profiler().span("table.prepare_rows", rows=max(len(rows) - 1, 0)):
+            return prepare_columns(rows)
+
+    def reset_columns(self, columns, amount_texts=None):
+        with get_profiler().span("table.reset_columns", rows=len(columns[-1])):
+            self.clear_state()
+            self.model.set_columns(columns, amount_texts)
 
     def clear(self):
-        self.table.clearContents()
-        self.table.setRowCount(0)
+        self.model.clear()
+        self.clear_state()
+
+    def clear_state(self):
         self.is_loaded = False
-        self.is_cell_changed = False
-        self.is_inserted = False
-        self.is_deleted = False        
-        self.deleted_rows_stack = []
+        self.history.clear()
 
     def add_row(self, date_input, category, method, description, amount):
-        self.table.blockSignals(True)
-        date = date_input
-        input_year, input_month = date.split("-")[:2]
-
-        # Validate against table data
-        for row in range(self.table.rowCount()):
-            row_date = self.table.item(row, 0).text()
-            table_year, table_month = row_date.split("-")[:2]
-            if input_year != table_year or input_month != table_month:
-                self.table.blockSignals(False)
-                raise AddRowError("The year and month of the entry must match the table data.")
-
-        row_position = self.table.rowCount()
-        self.table.insertRow(row_position)
-        self.table.setItem(row_position, 0, QTableWidgetItem(date))
-        self.table.setItem(row_position, 1, QTableWidgetItem(", ".join(category) if type(category) is list else category))
-        self.table.setItem(row_position, 2, QTableWidgetItem(method))
-        self.table.setItem(row_position, 3, QTableWidgetItem(description))
-        self.table.setItem(row_position, 4, QTableWidgetItem(str(amount)))
-        self.add_delete_button(row_position)
-        self.is_inserted = True
-        self.table.blockSignals(False)
-
-    def add_delete_button(self, row):
-        button = QPushButton("-")
-        button.clicked.connect(lambda: self.delete_row(row))
-        self.table.setCellWidget(row, 5, button)        
+        self.add_rows([(date_input, category, method, description, amount)])
+
+    def add_rows(self, rows):
+        with get_profiler().span("table.add_rows") as span:
+            values = validate_rows(rows, self.model.month_key)
+            if not values:
+                return
+
+            first = self.model.rowCount()
+            self.model.append_rows(values)
+            self.history.push(InsertRows(first, len(values)))
+            span.add("rows", len(values))
 
+    @profiled("table.delete_row")
     def delete_row(self, row):
-        deleted_row_data = [self.table.item(row, col).text() if self.table.item(row, col) else "" for col in range(6)]
-        self.deleted_rows_stack.append((row, deleted_row_data))
-        self.table.removeRow(row)
-        for i in range(self.table.rowCount()):
-            self.add_delete_button(i)
-        self.is_deleted = True
+        deleted_rows, deleted_ids = self.model.remove_rows(row, 1)
+        self.history.push(DeleteRow(row, deleted_rows[0], deleted_ids[0]))
         self.parent.check_button_enable()
-        self.parent.debug_print()
 
-    def undo_delete(self):
-        if self.deleted_rows_stack:
-            self.table.blockSignals(True)
-            row, row_data = self.deleted_rows_stack.pop()
+    @profiled("table.apply_records")
+    def apply_records(self, records):
+        # Replays journal records from an autosave on the loaded source rows.
+        # The rows stay unsaved, but the recovered state is the start of the undo history.
+        for record in records:
+            op, row = record[0], int(record[1])
+            if op == "U":
+                self.model.setData(self.model.index(row, int(record[2])), record[3])
+            elif op == "D":
+                self.model.remove_rows(row, 1)
+            elif op == "I":
+                self.model.insert_rows(row, [record[2:]])
+        self.history.clear()
 
-            self.table.insertRow(row)
-            for col, data in enumerate(row_data):
-                self.table.setItem(row, col, QTableWidgetItem(data))
-            self.add_delete_button(row)
+    def on_cell_edited(self, row, col, old_value, new_value):
+        self.history.push(EditCell(row, col, old_value, new_value))
 
-            for i in range(self.table.rowCount()):
-                self.add_delete_button(i)
+    @profiled("table.undo")
+    def undo(self):
+        return self.history.undo(self.model)
 
-            self.is_deleted = True if self.deleted_rows_stack else False
-            self.table.blockSignals(False)
\ No newline at end of file
+    @profiled("table.redo")
+    def redo(self):
+        return self.history.redo(self.model)
@@ -1,9 +1,17 @@
-from PyQt5.QtWidgets import QMainWindow, QTabWidget, QVBoxLayout, QHBoxLayout, QWidget, QLineEdit, QPushButton, QTableWidget, QTableWidgetItem, QComboBox, QMessageBox, QTextEdit, QSizePolicy, QGridLayout, QLabel, QDateEdit
-from PyQt5.QtWidgets import QDialog, QDialogButtonBox, QListWidget, QInputDialog
-from PyQt5.QtCore import QDate
-from src.utils import MultiSelectComboBox
+from PyQt5.QtWidgets import QMainWindow, QTabWidget, QVBoxLayout, QHBoxLayout, QWidget, QLineEdit, QPushButton, QTableView, QTableWidget, QComboBox, QMessageBox, QTextEdit, QSizePolicy, QGridLayout, QLabel, QDateEdit, QProgressBar
+from PyQt5.QtWidgets import QDialog, QDialogButtonBox, QListWidget, QInputDialog, QCheckBox, QSpinBox, QPlainTextEdit, QShortcut
+from PyQt5.QtGui import QKeySequence
+from PyQt5.QtCore import Qt, QDate
+from src.columns import HEADER, ColumnTable
+from src.file_manager import TAB_NAMES
+from src.log import LogSink
+from src.widgets import LogView, MultiSelectComboBox
+from src.model import SortFilterModel, TableModel
 
 class MainWindow(QMainWindow):
+    TAB_NAMES = TAB_NAMES
+    HEADER = ColumnTable.HEADER
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Account Book")
@@ -12,21 +20,51 @@ class MainWindow(QMainWindow):
         self.tabs = QTabWidget()
         self.setCentralWidget(self.tabs)
 
+        # Tabs are created the first time they are shown; until then the tab bar holds an empty widget
+        self.tab_creators = {name: (lambda name=name: TabCreator(self, name, self.HEADER)) for name in self.TAB_NAMES}
+        self.tab_creators["Summary"] = lambda: SummaryTabCreator(self, "Summary")
+        self.tab_creators["Search"] = lambda: SearchTabCreator(self, "Search")
+        self.tab_creators["Analytics"] = lambda: AnalyticsTabCreator(self, "Analytics")
+        self.tab_creators["Stats"] = lambda: StatsTabCreator(self, "Stats")
+
         self.tab_obj = {}
-        self.tab_obj["Income"] = TabCreator(self, "Income", ["Date", "Category", "Method", "Description", "Amount", "Delete"])
-        self.tab_obj["Expenses"] = TabCreator(self, "Expenses", ["Date", "Category", "Method", "Description", "Amount", "Delete"])
-        self.tab_obj["Savings"] = TabCreator(self, "Savings", ["Date", "Category", "Method", "Description", "Amount", "Delete"])
+        self.built_tabs = {}
+        self.summary_tab = self.search_tab = self.analytics_tab = self.stats_tab = None
+        for name in self.tab_creators:
+            self.tabs.addTab(QWidget(), name)
+
+    def tab_name(self, index):
+        return list(self.tab_creators)[index]
+
+    def build_tab(self, name):
+        if name in self.built_tabs:
+            return self.built_tabs[name]
+        creator = self.tab_creators[name]()
+
+        # Swap the placeholder for the real tab without reporting a tab change
+        index = list(self.tab_creators).index(name)
+        current = self.tabs.currentIndex()
+        self.tabs.blockSignals(True)
+        placeholder = self.tabs.widget(index)
+        self.tabs.removeTab(index)
+        self.tabs.insertTab(index, creator.tab, name)
+        self.tabs.setCurrentIndex(current)
+        self.tabs.blockSignals(False)
+        placeholder.deleteLater()
 
-        self.tabs.addTab(self.tab_obj["Income"].tab, "Income")
-        self.tabs.addTab(self.tab_obj["Expenses"].tab, "Expenses")
-        self.tabs.addTab(self.tab_obj["Savings"].tab, "Savings")
+        self.built_tabs[name] = creator
+        if name in self.TAB_NAMES:
+            self.tab_obj[name] = creator
+        else:
+            setattr(self, f"{name.lower()}_tab", creator)
+        return creator
 
 class EditWindow():
     def __init__(self, parent, tab_name, name) -> None:
         self.parent = parent
         self.tab_name = tab_name
         self.name = name
-        self.dialog = QDialog(self.parent)
+        self.dialog = None
 
     def edit_view(self):
         self.dialog = QDialog(self.parent)
@@ -60,6 +98,28 @@ class EditWindow():
         for item in self.item_list.selectedItems():
             self.item_list.takeItem(self.item_list.row(item))        
 
+class PasteWindow():
+    def __init__(self, parent, tab_name) -> None:
+        self.parent = parent
+        self.tab_name = tab_name
+
+        self.dialog = QDialog(self.parent)
+        self.dialog.setWindowTitle(f"Paste {self.tab_name} Rows")
+        self.dialog.setGeometry(100, 100, 600, 400)
+
+        self.layout = QVBoxLayout()
+        self.layout.addWidget(QLabel("One entry per line, tab or comma separated: Date, Category, Method, Description, Amount.\nA header row names the columns; missing ones are taken from the entry fields."))
+
+        self.text_input = QPlainTextEdit()
+        self.layout.addWidget(self.text_input)
+
+        self.dialog_buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        self.dialog_buttons.accepted.connect(self.dialog.accept)
+        self.dialog_buttons.rejected.connect(self.dialog.reject)
+        self.layout.addWidget(self.dialog_buttons)
+
+        self.dialog.setLayout(self.layout)
+
 class TabCreator():
     def __init__(self, parent, name, header) -> None:
         self.name = name
@@ -68,8 +128,19 @@ class TabCreator():
 
         self.create_tab()
 
-        self.category_edit = EditWindow(parent, name, "Category")
-        self.method_edit = EditWindow(parent, name, "Method")
+        # Edit and paste dialogs are created when first opened
+        self.edit_windows = {}
+        self.paste_dialog = None
+
+    def edit_window(self, name):
+        if name not in self.edit_windows:
+            self.edit_windows[name] = EditWindow(self.parent, self.name, name)
+        return self.edit_windows[name]
+
+    def paste_window(self):
+        if self.paste_dialog is None:
+            self.paste_dialog = PasteWindow(self.parent, self.name)
+        return self.paste_dialog
 
     def create_tab(self):
         self.tab = QWidget()
@@ -84,10 +155,13 @@ class TabCreator():
 
         self.load_button = QPushButton("Load by Date")
 
+        self.import_button = QPushButton("Import CSV")
+
         self.layout.addWidget(QLabel('Date:'), 0, 0, 1, 1)
         self.layout.addWidget(self.date_input, 0, 1, 1, 3)        
         self.layout.addWidget(self.load_button, 0, 4, 1, 2)
         self.layout.addWidget(self.save_button, 0, 6, 1, 2)
+        self.layout.addWidget(self.import_button, 0, 8, 1, 1)
         
         # Category
         self.category_input = MultiSelectComboBox()
@@ -112,26 +186,218 @@ class TabCreator():
         self.layout.addWidget(self.description_input, 3, 1, 1, 4) 
         self.layout.addWidget(self.amount_input, 3, 5, 1, 4) 
 
-        # Add
+        # Add, paste
         self.add_button = QPushButton(f"Add {self.name}")
-        self.layout.addWidget(self.add_button, 4, 0, 1, 8)
+        self.paste_button = QPushButton("Paste Rows")
+        self.layout.addWidget(self.add_button, 4, 0, 1, 6)
+        self.layout.addWidget(self.paste_button, 4, 6, 1, 1)
+
+        # Undo, redo
+        self.undo_button = QPushButton("Undo")
+        self.redo_button = QPushButton("Redo")
+        self.layout.addWidget(self.undo_button, 4, 7, 1, 1)
+        self.layout.addWidget(self.redo_button, 4, 8, 1, 1)
 
-        # Undo
-        self.undo_button = QPushButton(f"Undo Deleted Row")
-        self.layout.addWidget(self.undo_button, 4, 8, 1, 1)        
+        # Filter
+        self.filter_category_input = QComboBox()
+        self.filter_method_input = QComboBox()
+        self.filter_min_input = QLineEdit()
+        self.filter_min_input.setPlaceholderText("Min amount")
+        self.filter_max_input = QLineEdit()
+        self.filter_max_input.setPlaceholderText("Max amount")
+        self.filter_text_input = QLineEdit()
+        self.filter_text_input.setPlaceholderText("Description contains")
+        self.clear_filter_button = QPushButton("Clear Filter")
+        self.layout.addWidget(QLabel('Filter:'), 5, 0, 1, 1)
+        self.layout.addWidget(self.filter_category_input, 5, 1, 1, 2)
+        self.layout.addWidget(self.filter_method_input, 5, 3, 1, 1)
+        self.layout.addWidget(self.filter_min_input, 5, 4, 1, 1)
+        self.layout.addWidget(self.filter_max_input, 5, 5, 1, 1)
+        self.layout.addWidget(self.filter_text_input, 5, 6, 1, 2)
+        self.layout.addWidget(self.clear_filter_button, 5, 8, 1, 1)
 
-        # Table
-        self.table = QTableWidget(0, len(self.header))
-        self.table.setHorizontalHeaderLabels(self.header)
-        self.layout.addWidget(self.table, 5, 0, 8, 9)        
+        # Table, sorted and filtered through a proxy; clicking a header sorts by that column
+        self.table_model = TableModel(self.header)
+        self.table_proxy = SortFilterModel(self.tab)
+        self.table_proxy.setSourceModel(self.table_model)
+        self.table = QTableView()
+        self.table.setModel(self.table_proxy)
+        self.table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.table.setSortingEnabled(True)
+        self.paste_shortcut = QShortcut(QKeySequence.Paste, self.table)
+        self.paste_shortcut.setContext(Qt.WidgetWithChildrenShortcut)
+        self.layout.addWidget(self.table, 6, 0, 7, 9)        
 
         # Log
-        self.log_text = QTextEdit(self.parent)
-        self.log_text.setReadOnly(True)
-        self.log_text.setPlaceholderText("Log messages are displayed here...")
+        self.log = LogSink(self.name)
+        self.log_text = LogView(self.log, self.parent)
         self.layout.addWidget(self.log_text, 13, 0, 1, 9)            
 
+        # Progress
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        self.cancel_button = QPushButton("Cancel")
+        self.export_log_button = QPushButton("Export Log")
+        self.layout.addWidget(self.progress_bar, 14, 0, 1, 7)
+        self.layout.addWidget(self.cancel_button, 14, 7, 1, 1)
+        self.layout.addWidget(self.export_log_button, 14, 8, 1, 1)
+
         # self.layout.setRowStretch(5, 8)
         # self.layout.setRowStretch(13, 1)
 
-        self.tab.setLayout(self.layout)
\ No newline at end of file
+        self.tab.setLayout(self.layout)
+
+class SummaryTabCreator():
+    def __init__(self, parent, name) -> None:
+        self.name = name
+        self.parent = parent
+
+        self.create_tab()
+
+    def create_tab(self):
+        self.tab = QWidget()
+        self.layout = QGridLayout()
+
+        # Filter, refresh
+        self.tab_input = QComboBox()
+        self.year_input = QComboBox()
+        self.refresh_button = QPushButton("Refresh")
+        self.layout.addWidget(QLabel('Tab:'), 0, 0, 1, 1)
+        self.layout.addWidget(self.tab_input, 0, 1, 1, 3)
+        self.layout.addWidget(QLabel('Year:'), 0, 4, 1, 1)
+        self.layout.addWidget(self.year_input, 0, 5, 1, 3)
+        self.layout.addWidget(self.refresh_button, 0, 8, 1, 1)
+
+        # Monthly totals
+        self.month_table = QTableWidget(0, 5)
+        self.month_table.setHorizontalHeaderLabels(["Year", "Month", "Tab", "Count", "Total"])
+        self.month_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.layout.addWidget(self.month_table, 1, 0, 6, 4)
+
+        # Tab, category and method totals
+        self.group_table = QTableWidget(0, 5)
+        self.group_table.setHorizontalHeaderLabels(["Tab", "Group", "Name", "Count", "Total"])
+        self.group_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.layout.addWidget(self.group_table, 1, 4, 6, 5)
+
+        # Report export
+        self.report_progress_bar = QProgressBar()
+        self.report_progress_bar.setRange(0, 100)
+        self.report_button = QPushButton("Export Report")
+        self.layout.addWidget(self.report_progress_bar, 7, 0, 1, 8)
+        self.layout.addWidget(self.report_button, 7, 8, 1, 1)
+
+        self.tab.setLayout(self.layout)
+
+class SearchTabCreator():
+    def __init__(self, parent, name) -> None:
+        self.name = name
+        self.parent = parent
+
+        self.create_tab()
+
+    def create_tab(self):
+        self.tab = QWidget()
+        self.layout = QGridLayout()
+
+        # Search input
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Search descriptions, categories and methods of all saved months")
+        self.search_button = QPushButton("Search")
+        self.layout.addWidget(QLabel('Search:'), 0, 0, 1, 1)
+        self.layout.addWidget(self.search_input, 0, 1, 1, 7)
+        self.layout.addWidget(self.search_button, 0, 8, 1, 1)
+
+        # Results, double-click loads the month
+        self.result_table = QTableWidget(0, 6)
+        self.result_table.setHorizontalHeaderLabels(["Tab"] + HEADER)
+        self.result_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.result_table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.layout.addWidget(self.result_table, 1, 0, 6, 9)
+
+        self.status_label = QLabel()
+        self.layout.addWidget(self.status_label, 7, 0, 1, 9)
+
+        self.tab.setLayout(self.layout)
+
+class AnalyticsTabCreator():
+    def __init__(self, parent, name) -> None:
+        self.name = name
+        self.parent = parent
+
+        self.create_tab()
+
+    def create_tab(self):
+        self.tab = QWidget()
+        self.layout = QGridLayout()
+
+        # Range and tab filter, refresh
+        self.tab_input = QComboBox()
+        self.from_year_input = QComboBox()
+        self.to_year_input = QComboBox()
+        self.refresh_button = QPushButton("Refresh")
+        self.layout.addWidget(QLabel('Tab:'), 0, 0, 1, 1)
+        self.layout.addWidget(self.tab_input, 0, 1, 1, 2)
+        self.layout.addWidget(QLabel('From:'), 0, 3, 1, 1)
+        self.layout.addWidget(self.from_year_input, 0, 4, 1, 1)
+        self.layout.addWidget(QLabel('To:'), 0, 5, 1, 1)
+        self.layout.addWidget(self.to_year_input, 0, 6, 1, 2)
+        self.layout.addWidget(self.refresh_button, 0, 8, 1, 1)
+
+        # Grouping and moving average window
+        self.group_input = QComboBox()
+        self.window_input = QSpinBox()
+        self.window_input.setRange(1, 365)
+        self.window_input.setValue(7)
+        self.layout.addWidget(QLabel('Group by:'), 1, 0, 1, 1)
+        self.layout.addWidget(self.group_input, 1, 1, 1, 2)
+        self.layout.addWidget(QLabel('Moving average:'), 1, 3, 1, 2)
+        self.layout.addWidget(self.window_input, 1, 5, 1, 1)
+
+        # Totals per period or per category and method
+        self.result_table = QTableWidget(0, 0)
+        self.result_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.layout.addWidget(self.result_table, 2, 0, 6, 9)
+
+        self.status_label = QLabel()
+        self.layout.addWidget(self.status_label, 8, 0, 1, 9)
+
+        self.tab.setLayout(self.layout)
+
+class StatsTabCreator():
+    def __init__(self, parent, name) -> None:
+        self.name = name
+        self.parent = parent
+
+        self.create_tab()
+
+    def create_tab(self):
+        self.tab = QWidget()
+        self.layout = QGridLayout()
+
+        # Profiling switch, refresh, reset
+        self.enabled_checkbox = QCheckBox("Enable profiling")
+        self.refresh_button = QPushButton("Refresh")
+        self.reset_button = QPushButton("Reset")
+        self.layout.addWidget(self.enabled_checkbox, 0, 0, 1, 3)
+        self.layout.addWidget(self.refresh_button, 0, 7, 1, 1)
+        self.layout.addWidget(self.reset_button, 0, 8, 1, 1)
+
+        # cProfile capture of the next run of a span
+        self.capture_input = QComboBox()
+        self.capture_input.setEditable(True)
+        self.capture_button = QPushButton("Profile Next Run")
+        self.layout.addWidget(QLabel('Span:'), 1, 0, 1, 1)
+        self.layout.addWidget(self.capture_input, 1, 1, 1, 7)
+        self.layout.addWidget(self.capture_button, 1, 8, 1, 1)
+
+        # Span statistics
+        self.stats_table = QTableWidget(0, 6)
+        self.stats_table.setHorizontalHeaderLabels(["Span", "Count", "Total (ms)", "Mean (ms)", "Max (ms)", "Counters"])
+        self.stats_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.layout.addWidget(self.stats_table, 2, 0, 6, 9)
+
+        self.status_label = QLabel()
+        self.layout.addWidget(self.status_label, 8, 0, 1, 9)
+
+        self.tab.setLayout(self.layout)
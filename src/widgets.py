@@ -0,0 +1,220 @@
+import re
+from bisect import bisect_left
+from PyQt5.QtWidgets import QComboBox, QListView, QPlainTextEdit
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex, QEvent, QTimer, pyqtSignal
+
+WORD_PATTERN = re.compile(r"[^\s,/_\-()]+")
+LOG_MAX_LINES = 2000
+LOG_FLUSH_INTERVAL = 100
+
+class CheckListModel(QAbstractListModel):
+    # Check states live in the model; only the checked item numbers are stored, so clearing is O(selected)
+    selection_changed = pyqtSignal()
+
+    def __init__(self, parent=None) -> None:
+        super().__init__(parent)
+        self.items = []
+        self.selected = set()
+        # Sorted (word, item) pairs for prefix filtering, and the items shown by the current filter
+        self.words = []
+        self.visible = None
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.items) if self.visible is None else len(self.visible)
+
+    def item_at(self, row):
+        return row if self.visible is None else self.visible[row]
+
+    def row_of(self, item):
+        if self.visible is None:
+            return item
+        row = bisect_left(self.visible, item)
+        return row if row < len(self.visible) and self.visible[row] == item else None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        item = self.item_at(index.row())
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            return self.items[item]
+        if role == Qt.CheckStateRole:
+            return Qt.Checked if item in self.selected else Qt.Unchecked
+        return None
+
+    def setData(self, index, value, role=Qt.CheckStateRole):
+        if role != Qt.CheckStateRole or not index.isValid():
+            return False
+        item = self.item_at(index.row())
+        if value == Qt.Checked:
+            self.selected.add(item)
+        else:
+            self.selected.discard(item)
+        self.dataChanged.emit(index, index, [Qt.CheckStateRole])
+        self.selection_changed.emit()
+        return True
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsUserCheckable
+
+    def toggle(self, row):
+        checked = self.item_at(row) in self.selected
+        self.setData(self.index(row), Qt.Unchecked if checked else Qt.Checked)
+
+    def add_items(self, items):
+        items = [str(item) for item in items]
+        if not items:
+            return
+        first = len(self.items)
+        self.set_filter("")
+        self.beginInsertRows(QModelIndex(), first, first + len(items) - 1)
+        self.items += items
+        for item, text in enumerate(items, first):
+            text = text.lower()
+            keys = {text, *WORD_PATTERN.findall(text)}
+            self.words += [(key, item) for key in keys]
+        self.words.sort()
+        self.endInsertRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self.items = []
+        self.words = []
+        self.visible = None
+        had_selection = bool(self.selected)
+        self.selected = set()
+        self.endResetModel()
+        if had_selection:
+            self.selection_changed.emit()
+
+    def clear_selection(self):
+        if not self.selected:
+            return
+        selected, self.selected = self.selected, set()
+        for item in selected:
+            row = self.row_of(item)
+            if row is not None:
+                index = self.index(row)
+                self.dataChanged.emit(index, index, [Qt.CheckStateRole])
+        self.selection_changed.emit()
+
+    def selected_items(self):
+        return [self.items[item] for item in sorted(self.selected)]
+
+    def set_filter(self, text):
+        # Items with a word starting with the text are found by bisecting the word index
+        text = text.strip().lower()
+        if not text and self.visible is None:
+            return
+        self.beginResetModel()
+        if text:
+            matches = set()
+            for position in range(bisect_left(self.words, (text,)), len(self.words)):
+                key, item = self.words[position]
+                if not key.startswith(text):
+                    break
+                matches.add(item)
+            self.visible = sorted(matches)
+        else:
+            self.visible = None
+        self.endResetModel()
+
+class MultiSelectComboBox(QComboBox):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setEditable(True)
+        self.setInsertPolicy(QComboBox.NoInsert)
+        self.setCompleter(None)
+        self.lineEdit().setReadOnly(True)
+        self.check_model = CheckListModel(self)
+        self.check_model.selection_changed.connect(self.update_selection)
+        self.filter_text = ""
+
+        # The edit text shows the selection, not the current item
+        self.currentIndexChanged.connect(self.update_selection)
+
+        self.setModel(self.check_model)
+        self.setView(QListView())
+
+        # Clicks toggle the check state without closing the popup, typing filters the list
+        self.view().viewport().installEventFilter(self)
+        self.view().installEventFilter(self)
+
+    @property
+    def selected_items(self):
+        return self.check_model.selected_items()
+
+    def add_items(self, items):
+        self.check_model.add_items(items)
+        self.update_selection()
+
+    def add_item(self, text):
+        self.add_items([text])
+
+    def clear(self):
+        self.check_model.clear()
+        self.update_selection()
+
+    def clear_selection(self):
+        self.check_model.clear_selection()
+        self.update_selection()
+
+    def update_selection(self):
+        self.setEditText(self.filter_text or ", ".join(self.selected_items))
+
+    def set_filter(self, text):
+        self.filter_text = text
+        self.check_model.set_filter(text)
+        self.update_selection()
+
+    def hidePopup(self):
+        super().hidePopup()
+        if self.filter_text:
+            self.filter_text = ""
+            self.check_model.set_filter("")
+        self.update_selection()
+
+    def eventFilter(self, obj, event):
+        if obj is self.view().viewport() and event.type() == QEvent.MouseButtonRelease:
+            index = self.view().indexAt(event.pos())
+            if index.isValid():
+                self.check_model.toggle(index.row())
+            return True
+        if obj is self.view() and event.type() == QEvent.KeyPress:
+            if event.key() == Qt.Key_Backspace and self.filter_text:
+                self.set_filter(self.filter_text[:-1])
+                return True
+            if event.key() in (Qt.Key_Space, Qt.Key_Return, Qt.Key_Enter) and not self.filter_text.strip():
+                index = self.view().currentIndex()
+                if index.isValid():
+                    self.check_model.toggle(index.row())
+                return True
+            if event.text() and event.text().isprintable():
+                self.set_filter(self.filter_text + event.text())
+                return True
+        return super().eventFilter(obj, event)
+
+class LogView(QPlainTextEdit):
+    # Shows the records of a LogSink, appending the pending ones in one batch per timer tick
+    def __init__(self, sink, parent=None) -> None:
+        super().__init__(parent)
+        self.sink = sink
+        self.setReadOnly(True)
+        self.setMaximumBlockCount(LOG_MAX_LINES)
+        self.setPlaceholderText("Log messages are displayed here...")
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(LOG_FLUSH_INTERVAL)
+        self.timer.timeout.connect(self.flush)
+        self.timer.start()
+
+    def flush(self):
+        records = self.sink.take_pending()
+        if not records:
+            return
+        self.appendPlainText("\n".join(record.message for record in records))
+        scroll_bar = self.verticalScrollBar()
+        scroll_bar.setValue(scroll_bar.maximum())
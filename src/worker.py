@@ -0,0 +1,61 @@
+import time
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from src.log import LogRecord
+from src.utils import CancelError
+
+class TaskSignals(QObject):
+    log = pyqtSignal(object)
+    progress = pyqtSignal(int)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(object)
+    canceled = pyqtSignal()
+
+class TaskLog:
+    # Stands in for the tab log on worker threads; records are added to it on the GUI thread
+    def __init__(self, signal, operation) -> None:
+        self.signal = signal
+        self.operation = operation
+        self.started = time.perf_counter()
+
+    def append(self, message, **fields):
+        fields.setdefault("operation", self.operation)
+        fields.setdefault("duration", time.perf_counter() - self.started)
+        self.signal.emit(LogRecord(message, **fields))
+
+class Task(QRunnable):
+    def __init__(self, name, function, *args, cancelable=True) -> None:
+        super().__init__()
+        self.name = name
+        self.function = function
+        self.args = args
+        self.cancelable = cancelable
+        self.is_canceled = False
+        self.signals = TaskSignals()
+        self.log = TaskLog(self.signals.log, name)
+
+    def cancel(self):
+        if self.cancelable:
+            self.is_canceled = True
+
+    def report_progress(self, percent):
+        if self.is_canceled:
+            raise CancelError(f"The {self.name} was canceled.")
+        self.signals.progress.emit(percent)
+
+    def run(self):
+        self.log.started = time.perf_counter()
+        try:
+            result = self.function(self, *self.args)
+        except CancelError:
+            self.signals.canceled.emit()
+        except Exception as e:
+            self.signals.failed.emit(e)
+        else:
+            if self.is_canceled:
+                self.signals.canceled.emit()
+            else:
+                self.signals.finished.emit(result)
+
+def start_task(task):
+    QThreadPool.globalInstance().start(task)
+    return task
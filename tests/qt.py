@@ -0,0 +1,14 @@
+import os
+
+# Widget tests run without a display
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtWidgets import QApplication
+
+_application = None
+
+def application():
+    # Kept for the whole run; Qt aborts when widgets outlive the application
+    global _application
+    _application = QApplication.instance() or QApplication([])
+    return _application
@@ -0,0 +1,102 @@
+import unittest
+from src.columns import HEADER, ChangeTracker, ColumnTable, prepare_columns
+from src.utils import AddRowError
+
+class ChangeTrackerTest(unittest.TestCase):
+    def test_ids_follow_inserts_and_removes(self):
+        tracker = ChangeTracker(3)
+        tracker.insert(3, 2)
+        self.assertEqual(list(tracker.row_ids), [0, 1, 2, 3, 4])
+        self.assertEqual(tracker.remove(1, 1), [1])
+        self.assertEqual(tracker.remove(3, 1), [4])
+        self.assertEqual(tracker.deleted_ids, {1})
+        self.assertEqual(tracker.inserted_ids, {3})
+
+        # Undoing a delete puts the same id back
+        tracker.insert(1, 1, [1])
+        self.assertEqual(list(tracker.row_ids), [0, 1, 2, 3])
+        self.assertFalse(tracker.has_deletes())
+
+    def test_reverted_edit_is_clean(self):
+        tracker = ChangeTracker(2)
+        tracker.before_edit(0, ("a",))
+        tracker.after_edit(0, ("b",))
+        self.assertTrue(tracker.has_edits())
+        tracker.before_edit(0, ("b",))
+        tracker.after_edit(0, ("a",))
+        self.assertFalse(tracker.has_edits())
+
+    def test_edits_of_added_rows_are_not_tracked(self):
+        tracker = ChangeTracker(1)
+        tracker.insert(1, 1)
+        tracker.before_edit(1, ("a",))
+        tracker.after_edit(1, ("b",))
+        self.assertFalse(tracker.has_edits())
+
+class JournalRecordTest(unittest.TestCase):
+    def test_records(self):
+        table = ColumnTable()
+        table.set_rows([("2024-03-01", "Food", "Cash", f"entry {i}", str(i)) for i in range(4)])
+        table.set_value(2, table.AMOUNT, "20")
+        table.remove_rows(0, 1)
+        table.append_rows([("2024-03-05", "Rent", "Card", "added", "7")])
+        self.assertEqual(table.journal_records(), [
+            ["U", 2, table.AMOUNT, "20"],
+            ["D", 0],
+            ["I", 3, "2024-03-05", "Rent", "Card", "added", "7"],
+        ])
+
+    def test_deleted_edit_is_not_recorded(self):
+        table = ColumnTable()
+        table.set_rows([("2024-03-01", "Food", "Cash", "a", "1"), ("2024-03-01", "Food", "Cash", "b", "2")])
+        table.set_value(1, table.DESCRIPTION, "changed")
+        table.remove_rows(1, 1)
+        self.assertEqual(table.journal_records(), [["D", 1]])
+
+class AmountTextTest(unittest.TestCase):
+    ROWS = [
+        ["2024-03-01", "Food", "Cash", "a", "1"],
+        ["2024-03-02", "Food", "Cash", "b", "12.5"],
+        ["2024-03-03", "Food", "Cash", "c", "3"],
+    ]
+
+    def load(self):
+        amount_texts = {}
+        table = ColumnTable()
+        table.set_columns(prepare_columns([HEADER] + self.ROWS, amount_texts), amount_texts)
+        table.mark_clean("source")
+        return table
+
+    def test_bad_amount_keeps_its_text(self):
+        self.assertRaises(AddRowError, prepare_columns, [HEADER] + self.ROWS)
+        table = self.load()
+        self.assertEqual([table.row_values(row) for row in range(3)], self.ROWS)
+        self.assertEqual(list(table.amounts), [1, 0, 3])
+        self.assertEqual([table.row_values(row) for row in range(3)], [table.snapshot().row_values(row) for row in range(3)])
+
+        # New rows still need whole numbers
+        self.assertRaises(AddRowError, table.append_rows, [["2024-03-04", "Food", "Cash", "d", "x"]])
+        self.assertFalse(table.set_value(0, table.AMOUNT, "1.5"))
+
+    def test_edit_undo_and_save(self):
+        table = self.load()
+        table.remove_rows(0, 1)
+        self.assertTrue(table.set_value(0, table.AMOUNT, "12"))
+        self.assertEqual(table.value(0, table.AMOUNT), "12")
+
+        # Undo puts the loaded text back
+        self.assertTrue(table.set_value(0, table.AMOUNT, "12.5"))
+        self.assertEqual(table.journal_records(), [["D", 0]])
+        rows, ids = table.remove_rows(0, 1)
+        table.insert_rows(0, rows, ids)
+        self.assertEqual(table.value(0, table.AMOUNT), "12.5")
+
+        # Saving starts the ids over, the text follows its row
+        table.mark_clean("source")
+        self.assertEqual([table.row_values(row) for row in range(2)], self.ROWS[1:])
+        self.assertTrue(table.set_value(0, table.AMOUNT, "13"))
+        self.assertEqual(table.journal_records(), [["U", 0, table.AMOUNT, "13"]])
+        self.assertFalse(table.amount_texts)
+
+if __name__ == "__main__":
+    unittest.main()
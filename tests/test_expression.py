@@ -0,0 +1,74 @@
+import re
+import random
+import unittest
+from fractions import Fraction
+from src.expression import evaluate, evaluate_amount, evaluate_amounts
+from src.utils import ExpressionError
+
+NUMBER_PATTERN = re.compile(r"\d+(?:\.\d*)?|\.\d+")
+
+def random_expression(rng, depth=0):
+    if depth > 3 or rng.random() < 0.3:
+        return rng.choice(["0", "1", "3", "7", "12", "1000", "2.5", ".5", "10000"])
+    kind = rng.random()
+    if kind < 0.15:
+        return f"-{random_expression(rng, depth + 1)}"
+    if kind < 0.3:
+        return f"({random_expression(rng, depth + 1)})"
+    operator = rng.choice("+-*/")
+    return f"{random_expression(rng, depth + 1)} {operator} {random_expression(rng, depth + 1)}"
+
+def python_value(text):
+    # Python's own precedence and associativity over exact fractions
+    return eval(NUMBER_PATTERN.sub(lambda match: f"Fraction('{match.group()}')", text), {"Fraction": Fraction})
+
+class ExpressionTest(unittest.TestCase):
+    def test_precedence_and_unary(self):
+        self.assertEqual(evaluate("1 + 2 * 3"), 7)
+        self.assertEqual(evaluate("(1 + 2) * 3"), 9)
+        self.assertEqual(evaluate("10 - 4 - 3"), 3)
+        self.assertEqual(evaluate("2 * -3"), -6)
+        self.assertEqual(evaluate("--4"), 4)
+        self.assertEqual(evaluate("+5"), 5)
+
+    def test_division_is_exact(self):
+        self.assertEqual(evaluate_amount("10000/3*3"), 10000)
+        self.assertEqual(evaluate_amount("1/3*3"), 1)
+        self.assertEqual(evaluate_amount("2/3+2/3+2/3"), 2)
+
+    def test_result_is_truncated_toward_zero(self):
+        self.assertEqual(evaluate_amount("7/2"), 3)
+        self.assertEqual(evaluate_amount("-7/2"), -3)
+        self.assertEqual(evaluate_amount("1.9"), 1)
+        self.assertEqual(evaluate_amount(" 1200 "), 1200)
+
+    def test_errors(self):
+        for text in ["", "1 +", "* 2", "(1 + 2", "1 + 2)", "2 (3)", "1 / 0", "1 / (2 - 2)", "abc", "1e3", "2 ** 3", "1" * 300]:
+            with self.subTest(text=text):
+                with self.assertRaises(ExpressionError):
+                    evaluate_amount(text)
+
+    def test_out_of_range(self):
+        with self.assertRaises(ExpressionError):
+            evaluate_amount(str(2 ** 63))
+
+    def test_matches_python(self):
+        rng = random.Random(4)
+        for _ in range(2000):
+            text = random_expression(rng)
+            try:
+                expected = int(python_value(text))
+            except ZeroDivisionError:
+                with self.assertRaises(ExpressionError, msg=text):
+                    evaluate_amount(text)
+                continue
+            self.assertEqual(evaluate_amount(text), expected, text)
+
+    def test_evaluate_amounts(self):
+        amounts, errors = evaluate_amounts(["1+1", "x", "10/4", "1+1", "1/0"])
+        self.assertEqual(amounts, [2, None, 2, 2, None])
+        self.assertEqual(sorted(errors), [1, 4])
+        self.assertEqual(evaluate_amounts([]), ([], {}))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+from src.columns import ColumnTable
+from src.history import COMMAND_OVERHEAD, DeleteRow, EditCell, History, InsertRows
+from src.model import TableModel
+
+def month_rows(count, first=0):
+    return [["2024-03-01", "Food", "Cash", f"entry {i}", str(i)] for i in range(first, first + count)]
+
+class HistoryTest(unittest.TestCase):
+    def setUp(self):
+        # Edits reach the history through the cell_edited signal, as in Table
+        self.model = TableModel(ColumnTable.HEADER)
+        self.model.set_rows(month_rows(5))
+        self.model.mark_clean("source")
+        self.history = History()
+        self.model.cell_edited.connect(lambda row, col, old, new: self.history.push(EditCell(row, col, old, new)))
+
+    def edit(self, row, value):
+        self.model.setData(self.model.index(row, self.model.DESCRIPTION), value)
+
+    def descriptions(self):
+        return [self.model.value(row, self.model.DESCRIPTION) for row in range(self.model.rowCount())]
+
+    def stack_size(self):
+        return sum(command.size for command in [*self.history.undo_stack, *self.history.redo_stack])
+
+    def test_entry_cap_drops_the_oldest_edits(self):
+        self.history.max_entries = 3
+        for i in range(5):
+            self.edit(i, f"edited {i}")
+        self.assertEqual(len(self.history.undo_stack), 3)
+
+        while self.history.can_undo():
+            self.history.undo(self.model)
+        self.assertEqual(self.descriptions(), ["edited 0", "edited 1", "entry 2", "entry 3", "entry 4"])
+
+        # Redo may not grow the stack past the cap either
+        while self.history.can_redo():
+            self.history.redo(self.model)
+        self.assertEqual(len(self.history.undo_stack), 3)
+        self.assertEqual(self.descriptions(), [f"edited {i}" for i in range(5)])
+
+    def test_byte_cap_and_size_accounting(self):
+        self.history.max_bytes = 3 * (COMMAND_OVERHEAD + 1000)
+        for i in range(5):
+            self.edit(i, "x" * (1000 - len(f"entry {i}")))
+        self.assertEqual(len(self.history.undo_stack), 3)
+        self.assertLessEqual(self.history.size, self.history.max_bytes)
+        self.assertEqual(self.history.size, self.stack_size())
+
+        self.history.undo(self.model)
+        self.history.undo(self.model)
+        self.assertEqual(self.history.size, self.stack_size())
+
+        # A new edit drops the redo entries and their size
+        self.edit(0, "new")
+        self.assertFalse(self.history.can_redo())
+        self.assertEqual(self.history.size, self.stack_size())
+
+    def test_undone_inserts_keep_their_rows_until_redone(self):
+        self.model.append_rows(month_rows(2, 5))
+        self.history.push(InsertRows(5, 2))
+        rows, ids = self.model.remove_rows(0, 1)
+        self.history.push(DeleteRow(0, rows[0], ids[0]))
+        inserted = self.history.undo_stack[0]
+        self.assertEqual(inserted.size, COMMAND_OVERHEAD)
+
+        self.history.undo(self.model)
+        self.history.undo(self.model)
+        self.assertEqual(self.model.rowCount(), 5)
+        self.assertFalse(self.model.is_dirty())
+        self.assertGreater(inserted.size, COMMAND_OVERHEAD)
+        self.assertEqual(self.history.size, self.stack_size())
+
+        self.history.redo(self.model)
+        self.assertEqual(inserted.size, COMMAND_OVERHEAD)
+        self.assertEqual(self.descriptions()[5:], ["entry 5", "entry 6"])
+        self.assertEqual(self.history.size, self.stack_size())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+import os
+import csv
+import unittest
+from src.columns import HEADER
+from src.file_manager import csv_path, read_month_rows
+from src.importer import RejectedRow, import_csv, parse_import_amount, parse_pasted_rows
+from src.utils import AddRowError, LoadError
+from tests.test_journal import MonthFileTest
+
+SOURCE = [
+    ["Posted Date", "Payee", "Value", "Note"],
+    ["2024/03/01", "Lunch", "12,000", "a"],
+    ["2024-03-02", "Refund", "-5", "b"],
+    ["2024-03-40", "Bad date", "1", "c"],
+    ["2024-03-03", "Fraction", "1.5", "d"],
+    ["2024-03-04", "Infinite", "Infinity", "e"],
+    ["2024-03-05", "Signaling", "sNaN", "f"],
+    ["2024-03-06", "Huge", "1e999999", "g"],
+    ["2024-04-01", "Rent", "1E+2", "h"],
+]
+
+def write_source(path, records):
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        csv.writer(file).writerows(records)
+
+def read_source(path):
+    with open(path, "r", newline="", encoding="utf-8") as file:
+        return list(csv.reader(file))
+
+class ParseAmountTest(unittest.TestCase):
+    def test_amounts(self):
+        self.assertEqual(parse_import_amount("1,200"), "1200")
+        self.assertEqual(parse_import_amount(" -3 000 "), "-3000")
+        self.assertEqual(parse_import_amount("1E+2"), "100")
+        for value in ["", "abc", "1.5", "Infinity", "-inf", "NaN", "sNaN", "1e999999", str(2 ** 63)]:
+            with self.subTest(value=value):
+                self.assertRaises(RejectedRow, parse_import_amount, value)
+
+class ImportTest(MonthFileTest):
+    def test_rejected_rows_do_not_stop_the_import(self):
+        write_source("bank.csv", SOURCE)
+        stats = import_csv("bank.csv", "Expenses")
+        self.assertEqual((stats["imported"], stats["rejected"]), (3, 5))
+        self.assertEqual(stats["files"], sorted([csv_path("Expenses", "2024-03-01"), csv_path("Expenses", "2024-04-01")]))
+        self.assertEqual(read_month_rows(csv_path("Expenses", "2024-03-01")), [
+            HEADER,
+            ["2024-03-01", "Other", "Other", "Lunch", "12000"],
+            ["2024-03-02", "Other", "Other", "Refund", "-5"],
+        ])
+        self.assertEqual(read_month_rows(csv_path("Expenses", "2024-04-01"))[1:], [["2024-04-01", "Other", "Other", "Rent", "100"]])
+
+        rejects = read_source(stats["reject_file"])
+        self.assertEqual(stats["reject_file"], "bank.rejects.csv")
+        self.assertEqual(rejects[0], SOURCE[0] + ["Reason"])
+        self.assertEqual([record[:-1] for record in rejects[1:]], SOURCE[3:8])
+
+    def test_fixed_rejects_can_be_imported_again(self):
+        write_source("bank.csv", SOURCE)
+        import_csv("bank.csv", "Expenses")
+
+        # Fix the amounts of the rejected rows and import the reject file itself
+        rejects = read_source("bank.rejects.csv")
+        fixed = [rejects[0]] + [[date, payee, "7", note, reason] for date, payee, value, note, reason in rejects[1:] if date != "2024-03-40"]
+        write_source("bank.rejects.csv", fixed)
+        stats = import_csv("bank.rejects.csv", "Expenses")
+        self.assertEqual((stats["imported"], stats["rejected"]), (4, 0))
+        self.assertIsNone(stats["reject_file"])
+
+        rows = read_month_rows(csv_path("Expenses", "2024-03-01"))[1:]
+        self.assertEqual([row[3] for row in rows], ["Lunch", "Refund", "Fraction", "Infinite", "Signaling", "Huge"])
+        self.assertEqual([row[4] for row in rows[2:]], ["7"] * 4)
+
+    def test_import_appends_to_existing_months(self):
+        self.write_month([["2024-03-09", "Food", "Cash", "Existing", "1"]])
+        write_source("bank.csv", SOURCE[:3])
+        import_csv("bank.csv", "Expenses")
+        import_csv("bank.csv", "Expenses")
+
+        # Imports append, so running the same file twice adds its rows twice
+        self.assertEqual([row[3] for row in read_month_rows(self.path)[1:]], ["Existing", "Lunch", "Refund", "Lunch", "Refund"])
+        self.assertFalse(os.path.exists("bank.rejects.csv"))
+
+    def test_missing_columns(self):
+        write_source("bank.csv", [["Date", "Payee"], ["2024-03-01", "Lunch"]])
+        with self.assertRaises(LoadError) as context:
+            import_csv("bank.csv", "Expenses")
+        self.assertIn("Amount", str(context.exception))
+
+class PasteTest(unittest.TestCase):
+    def paste(self, text):
+        return parse_pasted_rows(text, "2024-03-15", "Food", "Cash")
+
+    def test_columns_by_position(self):
+        self.assertEqual(self.paste("Lunch\t1,200\nDinner\t3*4\n"), [
+            ["2024-03-15", "Food", "Cash", "Lunch", 1200],
+            ["2024-03-15", "Food", "Cash", "Dinner", 12],
+        ])
+        self.assertEqual(self.paste("2024/03/02,Rent,Card,March,100"), [["2024-03-02", "Rent", "Card", "March", 100]])
+        self.assertEqual(self.paste("2024-03-02\tRent\tMarch\t100"), [["2024-03-02", "Rent", "Cash", "March", 100]])
+
+    def test_columns_by_header(self):
+        text = "Amount\tMemo\tDate\n5\tCoffee\t\n7\tTea\t2024-03-03\n"
+        self.assertEqual(self.paste(text), [
+            ["2024-03-15", "Food", "Cash", "Coffee", 5],
+            ["2024-03-03", "Food", "Cash", "Tea", 7],
+        ])
+
+    def test_blank_lines_and_empty_paste(self):
+        self.assertEqual(self.paste(""), [])
+        self.assertEqual(self.paste("\n\t\n"), [])
+        self.assertEqual(len(self.paste("a\t1\n\nb\t2\n")), 2)
+
+    def test_bad_rows_reject_the_whole_paste(self):
+        with self.assertRaises(AddRowError) as context:
+            self.paste("Lunch\t1\nDinner\t1/0\nSnack\t2\t3\nTea\t\n2024-13-01\tx\t1\n")
+        message = str(context.exception)
+        self.assertTrue(message.startswith("4 of 5 rows could not be added"), message)
+        for number in (2, 3, 4, 5):
+            self.assertIn(f"Row {number}:", message)
+        self.assertNotIn("Row 1:", message)
+
+    def test_first_row_width(self):
+        self.assertRaises(AddRowError, self.paste, "Lunch")
+        self.assertRaises(AddRowError, self.paste, "a\tb\tc\td\te\tf")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+import os
+import glob
+import random
+import shutil
+import tempfile
+import unittest
+from src import file_manager
+from src.columns import HEADER, ColumnTable, prepare_columns
+from src.file_manager import csv_path, journal_batches, journal_path, load_from_csv, read_month_rows, save_to_csv, write_csv
+
+TAB_NAME = "Expenses"
+DATE = "2024-03-01"
+
+class NullLog:
+    def append(self, message, **fields):
+        pass
+
+def month_rows(count, rng):
+    return [[f"2024-03-{rng.randint(1, 28):02d}", rng.choice(["Food", "Rent", "Food, Rent"]), rng.choice(["Cash", "Card"]), f"entry {i}", str(rng.randint(-100, 100000))] for i in range(count)]
+
+def table_rows(table):
+    return [table.row_values(row) for row in range(table.rowCount())]
+
+class MonthFileTest(unittest.TestCase):
+    # Month files are written under Result/ of the working directory
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.directory.name)
+        self.path = csv_path(TAB_NAME, DATE)
+        os.makedirs(os.path.dirname(self.path))
+        self.log = NullLog()
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.directory.cleanup()
+
+    def load(self):
+        table = ColumnTable()
+        table.set_columns(prepare_columns(read_month_rows(self.path)))
+        table.mark_clean(self.path)
+        return table
+
+    def write_month(self, rows):
+        write_csv(self.path, [HEADER] + rows)
+
+class JournalTest(MonthFileTest):
+    def test_random_round_trip(self):
+        # Random edits, deletes and appends, saved as journal batches and read back after every save
+        rng = random.Random(7)
+        self.write_month(month_rows(50, rng))
+        for save in range(30):
+            table = self.load() if save % 3 == 0 else table
+            for _ in range(rng.randint(1, 15)):
+                operation = rng.random()
+                if operation < 0.4 and table.rowCount():
+                    row = rng.randrange(table.rowCount())
+                    col = rng.choice([table.CATEGORY, table.METHOD, table.DESCRIPTION, table.AMOUNT])
+                    value = str(rng.randint(0, 999)) if col == table.AMOUNT else rng.choice(["Food", "Cash", "x", "a, b", "long description"])
+                    table.set_value(row, col, value)
+                elif operation < 0.7 and table.rowCount():
+                    table.remove_rows(rng.randrange(table.rowCount()), 1)
+                else:
+                    table.append_rows(month_rows(rng.randint(1, 3), rng))
+            expected = table_rows(table)
+            save_to_csv(TAB_NAME, DATE, table, self.log)
+            self.assertEqual(read_month_rows(self.path)[1:], expected)
+        self.assertEqual(table_rows(self.load()), expected)
+
+    def test_nothing_to_save(self):
+        self.write_month(month_rows(3, random.Random(1)))
+        self.assertFalse(save_to_csv(TAB_NAME, DATE, self.load(), self.log))
+        self.assertFalse(os.path.exists(journal_path(self.path)))
+
+    def test_uncommitted_and_torn_records_are_ignored(self):
+        rows = month_rows(3, random.Random(2))
+        self.write_month(rows)
+        table = self.load()
+        table.set_value(0, table.DESCRIPTION, "saved")
+        save_to_csv(TAB_NAME, DATE, table, self.log)
+
+        # A batch without its C record and a line cut off by a crash
+        with open(journal_path(self.path), "a", encoding="utf-8") as file:
+            file.write("D,1\nU,2,3,torn")
+        self.assertEqual(read_month_rows(self.path)[1:], [[*rows[0][:3], "saved", rows[0][4]]] + rows[1:])
+
+    def test_stale_journal_of_same_size_file_is_ignored(self):
+        # A crash between the rename of a compacted file and the removal of its journal
+        rows = month_rows(3, random.Random(3))
+        self.write_month(rows)
+        table = self.load()
+        table.remove_rows(0, 1)
+        table.append_rows([rows[0]])
+        save_to_csv(TAB_NAME, DATE, table, self.log)
+        compacted = read_month_rows(self.path)
+        size = os.path.getsize(self.path)
+
+        write_csv(self.path, compacted)
+        self.assertEqual(os.path.getsize(self.path), size)
+        self.assertTrue(os.path.exists(journal_path(self.path)))
+        self.assertIsNone(journal_batches(self.path, journal_path(self.path)))
+        self.assertEqual(read_month_rows(self.path), compacted)
+
+        # Loading keeps the stale journal aside instead of applying or deleting it
+        self.assertEqual(load_from_csv(TAB_NAME, DATE, self.log), compacted)
+        self.assertFalse(os.path.exists(journal_path(self.path)))
+        self.assertEqual(len(glob.glob(journal_path(self.path) + ".*.stale")), 1)
+
+    def test_journal_survives_a_copy_of_the_tree(self):
+        rows = month_rows(3, random.Random(4))
+        self.write_month(rows)
+        table = self.load()
+        table.set_value(1, table.DESCRIPTION, "saved in the journal")
+        save_to_csv(TAB_NAME, DATE, table, self.log)
+
+        # Copies get new inodes and mtimes, but the same contents
+        shutil.copytree("Result", "Copy")
+        shutil.rmtree("Result")
+        shutil.copytree("Copy", "Result")
+        self.assertEqual(load_from_csv(TAB_NAME, DATE, self.log)[1:], table_rows(table))
+        self.assertFalse(os.path.exists(journal_path(self.path)))
+        self.assertEqual(read_month_rows(self.path)[1:], table_rows(table))
+
+    def test_large_journal_is_compacted_by_a_full_save(self):
+        rng = random.Random(6)
+        self.write_month(month_rows(20, rng))
+        table = self.load()
+        minimum = file_manager.JOURNAL_MIN_COMPACT_SIZE
+        file_manager.JOURNAL_MIN_COMPACT_SIZE = 0
+        try:
+            # The first save starts a journal, a later one finds it too big and rewrites the file
+            for i in range(10):
+                table.set_value(i, table.DESCRIPTION, "edited " * 50)
+                save_to_csv(TAB_NAME, DATE, table, self.log)
+                if not os.path.exists(journal_path(self.path)):
+                    break
+        finally:
+            file_manager.JOURNAL_MIN_COMPACT_SIZE = minimum
+        self.assertFalse(os.path.exists(journal_path(self.path)))
+        self.assertEqual(read_month_rows(self.path)[1:], table_rows(table))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+from PyQt5.QtCore import Qt
+from src.columns import ColumnTable
+from src.model import SortFilterModel, TableModel
+from tests.qt import application
+
+ROWS = [
+    ["2024-03-03", "Food", "Cash", "Lunch", "9"],
+    ["2024-03-01", "rent", "Card", "March rent", "100"],
+    ["2024-03-02", "Food, Rent", "Card", "Shared LUNCH", "-5"],
+    ["2024-03-04", "Bills", "Cash", "Electricity", "10"],
+]
+
+class SortFilterModelTest(unittest.TestCase):
+    def setUp(self):
+        application()
+        self.model = TableModel(ColumnTable.HEADER)
+        self.model.set_rows(ROWS)
+        self.proxy = SortFilterModel()
+        self.proxy.setSourceModel(self.model)
+
+    def column(self, col):
+        return [self.proxy.index(row, col).data() for row in range(self.proxy.rowCount())]
+
+    def descriptions(self):
+        return self.column(self.model.DESCRIPTION)
+
+    def test_amounts_sort_as_numbers(self):
+        self.proxy.sort(self.model.AMOUNT)
+        self.assertEqual(self.column(self.model.AMOUNT), ["-5", "9", "10", "100"])
+        self.proxy.sort(self.model.AMOUNT, Qt.DescendingOrder)
+        self.assertEqual(self.column(self.model.AMOUNT), ["100", "10", "9", "-5"])
+
+    def test_text_sorts_ignore_case(self):
+        self.proxy.sort(self.model.CATEGORY)
+        self.assertEqual(self.column(self.model.CATEGORY), ["Bills", "Food", "Food, Rent", "rent"])
+        self.proxy.sort(self.model.DATE)
+        self.assertEqual(self.column(self.model.DATE), sorted(row[0] for row in ROWS))
+
+        # The Delete column does not sort
+        self.proxy.sort(self.model.DELETE)
+        self.assertEqual(self.descriptions(), [row[3] for row in ROWS])
+
+    def test_filters(self):
+        self.proxy.set_filters(category="Food")
+        self.assertEqual(self.descriptions(), ["Lunch", "Shared LUNCH"])
+        self.proxy.set_filters(method="Card", min_amount=0)
+        self.assertEqual(self.descriptions(), ["March rent"])
+        self.proxy.set_filters(min_amount=0, max_amount=10)
+        self.assertEqual(self.descriptions(), ["Lunch", "Electricity"])
+        self.proxy.set_filters(text="lunch", category="")
+        self.assertEqual(self.descriptions(), ["Lunch", "Shared LUNCH"])
+
+        # Filters and sorting combine
+        self.proxy.sort(self.model.AMOUNT)
+        self.assertEqual(self.descriptions(), ["Shared LUNCH", "Lunch"])
+        self.proxy.set_filters()
+        self.assertEqual(len(self.descriptions()), len(ROWS))
+
+    def test_mapping_between_proxy_and_source(self):
+        self.proxy.sort(self.model.AMOUNT)
+        self.proxy.set_filters(max_amount=50)
+        self.assertEqual(self.proxy.mapToSource(self.proxy.index(0, 0)).row(), 2)
+        self.assertEqual(self.proxy.mapFromSource(self.model.index(3, 0)).row(), 2)
+        self.assertFalse(self.proxy.mapFromSource(self.model.index(1, 0)).isValid())
+
+    def test_changes_to_the_source(self):
+        self.proxy.sort(self.model.AMOUNT)
+        self.assertEqual(self.descriptions()[0], "Shared LUNCH")
+
+        # An edited row keeps its place until the next sort
+        self.model.setData(self.model.index(2, self.model.AMOUNT), "500")
+        self.assertEqual(self.descriptions()[0], "Shared LUNCH")
+        self.assertEqual(self.column(self.model.AMOUNT)[0], "500")
+        self.proxy.sort(self.model.AMOUNT)
+        self.assertEqual(self.descriptions(), ["Lunch", "Electricity", "March rent", "Shared LUNCH"])
+
+        # Added and removed rows are placed by the current sort
+        self.model.append_rows([["2024-03-05", "Food", "Cash", "Snack", "1"]])
+        self.assertEqual(self.descriptions()[0], "Snack")
+        self.model.remove_rows(0, 1)
+        self.assertEqual(self.descriptions(), ["Snack", "Electricity", "March rent", "Shared LUNCH"])
+
+    def test_unsorted_view_follows_the_source(self):
+        self.model.append_rows([["2024-03-05", "Food", "Cash", "Snack", "1"]])
+        self.model.remove_rows(0, 1)
+        self.assertEqual(self.descriptions(), [row[3] for row in ROWS[1:]] + ["Snack"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import os
+import unittest
+from src.search import SearchIndex
+from tests.test_journal import DATE, TAB_NAME, MonthFileTest
+
+ROWS = [
+    ["2024-03-01", "Food", "Cash", "Lunch at the market", "12000"],
+    ["2024-03-02", "Home", "Card", "Electrician", "80000"],
+    ["2024-03-03", "Food", "Card", "Market groceries", "35000"],
+]
+
+def descriptions(results):
+    return [row[3] for year, month, tab_name, row in results]
+
+class SearchIndexTest(MonthFileTest):
+    def test_queries_use_the_index_until_refreshed(self):
+        self.write_month(ROWS)
+        index = SearchIndex()
+        self.assertEqual(index.search("market"), [])
+        index.refresh()
+        self.assertEqual(descriptions(index.search("market")), ["Market groceries", "Lunch at the market"])
+        self.assertEqual(descriptions(index.search("mar food")), ["Market groceries", "Lunch at the market"])
+        self.assertEqual(descriptions(index.search("elec")), ["Electrician"])
+        self.assertEqual(index.search("market", tabs={"Income"}), [])
+
+        # Queries answer from what was indexed until the next refresh, without reading the changed file
+        self.write_month(ROWS[2:] + ROWS[:1])
+        self.assertEqual(descriptions(index.search("electrician")), ["Electrician"])
+        index.refresh()
+        self.assertEqual(index.search("electrician"), [])
+        self.assertEqual(descriptions(index.search("market")), ["Lunch at the market", "Market groceries"])
+
+    def test_saved_month_and_parts_on_disk(self):
+        self.write_month(ROWS)
+        index = SearchIndex()
+        index.refresh()
+        self.write_month(ROWS[:1])
+        index.update_file(self.path, ROWS[:1])
+        self.assertEqual(descriptions(index.search("market")), ["Lunch at the market"])
+
+        # A new index reads the parts written by the first one
+        self.assertEqual(descriptions(SearchIndex().search("lunch")), ["Lunch at the market"])
+
+        os.remove(self.path)
+        index.refresh()
+        self.assertEqual(index.search("lunch"), [])
+        self.assertEqual(os.listdir(index.directory), [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import tempfile
+import unittest
+from src.columns import HEADER, ColumnTable, prepare_columns
+from src.file_manager import file_generation, journal_path, save_to_csv, write_csv
+from src.sidecar import SIDECAR_HEADER, column_rows, load_columns_from_csv, read_month_columns, read_month_values, read_sidecar, sidecar_path, write_sidecar
+from tests.test_journal import DATE, TAB_NAME, MonthFileTest
+
+ROWS = [
+    ["2024-03-01", "Food", "Cash", "Lunch", "12000"],
+    ["2024-03-02", "Food, Rent", "Card", "Café ☕ 점심", "-5"],
+    ["2024-03-02", "Rent", "Card", "", str(2 ** 63 - 1)],
+    ["2024-03-31", "Food", "Cash", "quote \" and, comma\nnew line", str(-2 ** 63)],
+]
+
+class SidecarTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "03_Expenses.csv")
+        write_csv(self.path, [HEADER] + ROWS)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        write_sidecar(self.path, prepare_columns([HEADER] + ROWS))
+        columns = read_sidecar(self.path)
+        self.assertIsNotNone(columns)
+        self.assertEqual(column_rows(columns), ROWS)
+        self.assertEqual(columns[0].codes, {value: code for code, value in enumerate(columns[0].values)})
+
+    def test_empty_month(self):
+        write_csv(self.path, [HEADER])
+        write_sidecar(self.path, prepare_columns([HEADER]))
+        self.assertEqual(column_rows(read_sidecar(self.path)), [])
+
+    def test_read_month_columns_writes_the_sidecar(self):
+        self.assertFalse(os.path.exists(sidecar_path(self.path)))
+        self.assertEqual(column_rows(read_month_columns(self.path)), ROWS)
+        self.assertTrue(os.path.exists(sidecar_path(self.path)))
+        self.assertEqual(column_rows(read_sidecar(self.path)), ROWS)
+
+    def test_changed_file_is_not_read_from_the_sidecar(self):
+        write_sidecar(self.path, prepare_columns([HEADER] + ROWS))
+        write_csv(self.path, [HEADER] + ROWS[:1])
+        self.assertIsNone(read_sidecar(self.path))
+        self.assertEqual(column_rows(read_month_columns(self.path)), ROWS[:1])
+
+    def test_pending_journal_is_not_read_from_the_sidecar(self):
+        write_sidecar(self.path, prepare_columns([HEADER] + ROWS))
+        with open(journal_path(self.path), "w", encoding="utf-8") as file:
+            file.write(f"S,{','.join(map(str, file_generation(self.path)))}\nD,0\nC\n")
+        self.assertIsNone(read_sidecar(self.path))
+        self.assertEqual(column_rows(read_month_columns(self.path)), ROWS[1:])
+
+    def test_damaged_sidecar_is_ignored(self):
+        write_sidecar(self.path, prepare_columns([HEADER] + ROWS))
+        sidecar = sidecar_path(self.path)
+        with open(sidecar, "rb") as file:
+            data = file.read()
+
+        damaged = {
+            "truncated": data[:-1],
+            "extended": data + b"\0",
+            "short header": data[:SIDECAR_HEADER.size - 1],
+            "bad magic": b"X" + data[1:],
+        }
+        for name, content in damaged.items():
+            with self.subTest(name=name):
+                with open(sidecar, "wb") as file:
+                    file.write(content)
+                self.assertIsNone(read_sidecar(self.path))
+                self.assertEqual(column_rows(read_month_columns(self.path)), ROWS)
+
+class LoadColumnsTest(MonthFileTest):
+    def test_bad_amount_does_not_stop_the_month_from_loading(self):
+        rows = [row[:4] + [amount] for row, amount in zip(ROWS, ["1", "12.5", "", "4"])]
+        self.write_month(rows)
+        columns, amount_texts = load_columns_from_csv(TAB_NAME, DATE, self.log)
+        self.assertEqual(amount_texts, {1: "12.5", 2: ""})
+        self.assertFalse(os.path.exists(sidecar_path(self.path)))
+
+        table = ColumnTable()
+        table.set_columns(columns, amount_texts)
+        table.mark_clean(self.path)
+        table.set_value(0, table.DESCRIPTION, "edited")
+        rows[0][3] = "edited"
+        save_to_csv(TAB_NAME, DATE, table, self.log)
+        self.assertEqual(read_month_values(self.path), rows)
+
+if __name__ == "__main__":
+    unittest.main()
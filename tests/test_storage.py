@@ -0,0 +1,75 @@
+import os
+import random
+import unittest
+from src.columns import HEADER, ColumnTable
+from src.file_manager import csv_path, write_csv
+from src.storage import SqliteStorage
+from src.utils import LoadError
+from tests.test_journal import DATE, TAB_NAME, MonthFileTest, NullLog, month_rows, table_rows
+
+class SqliteStorageTest(MonthFileTest):
+    def open(self):
+        return SqliteStorage("book.db", "Result")
+
+    def load(self, storage, tab_name=TAB_NAME, date=DATE):
+        table = ColumnTable()
+        table.set_columns(*storage.load_columns(tab_name, date, self.log))
+        table.mark_clean(storage.source(tab_name, date))
+        return table
+
+    def test_existing_months_are_migrated_once(self):
+        rows = month_rows(5, random.Random(1))
+        self.write_month(rows)
+        income = csv_path("Income", "2024-04-01")
+        os.makedirs(os.path.dirname(income), exist_ok=True)
+        write_csv(income, [HEADER, ["2024-04-25", "Salary", "Bank", "April", "3000000"]])
+
+        storage = self.open()
+        self.assertEqual(table_rows(self.load(storage)), rows)
+        self.assertEqual(storage.load_month("Income", "2024-04-01", self.log)[1:], [["2024-04-25", "Salary", "Bank", "April", "3000000"]])
+
+        # Later changes to the CSV files are not imported again
+        self.write_month(rows[:1])
+        self.assertEqual(table_rows(self.load(self.open())), rows)
+
+    def test_saves_write_only_the_changes(self):
+        rng = random.Random(2)
+        storage = self.open()
+        table = ColumnTable()
+        table.append_rows(month_rows(6, rng))
+        storage.save_month(TAB_NAME, DATE, table, self.log)
+        self.assertFalse(table.is_dirty())
+
+        for save in range(10):
+            table = self.load(storage)
+            table.set_value(rng.randrange(table.rowCount()), table.AMOUNT, str(rng.randint(-50, 50)))
+            table.remove_rows(rng.randrange(table.rowCount()), 1)
+            table.append_rows(month_rows(2, rng))
+            expected = table_rows(table)
+            storage.save_month(TAB_NAME, DATE, table, self.log)
+            self.assertEqual(table_rows(self.load(storage)), expected)
+        self.assertEqual(storage.load_month(TAB_NAME, "2024-04-01", NullLog()), [])
+
+    def test_month_changed_since_loading_is_rewritten(self):
+        storage = self.open()
+        table = ColumnTable()
+        table.append_rows(month_rows(3, random.Random(3)))
+        storage.save_month(TAB_NAME, DATE, table, self.log)
+
+        first, second = self.load(storage), self.load(storage)
+        first.remove_rows(0, 1)
+        storage.save_month(TAB_NAME, DATE, first, self.log)
+        second.set_value(0, second.DESCRIPTION, "edited")
+        storage.save_month(TAB_NAME, DATE, second, self.log)
+        self.assertEqual(table_rows(self.load(storage)), table_rows(second))
+
+    def test_failed_migration_is_retried(self):
+        self.write_month([["2024-03-01", "Food", "Cash", "Lunch", "12.5"]])
+        self.assertRaises(LoadError, self.open)
+        self.assertFalse(os.path.exists("book.db"))
+
+        self.write_month([["2024-03-01", "Food", "Cash", "Lunch", "12"]])
+        self.assertEqual(table_rows(self.load(self.open())), [["2024-03-01", "Food", "Cash", "Lunch", "12"]])
+
+if __name__ == "__main__":
+    unittest.main()
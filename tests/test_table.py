@@ -0,0 +1,59 @@
+import unittest
+from PyQt5.QtWidgets import QStyleOptionViewItem, QTableView
+from PyQt5.QtGui import QMouseEvent
+from PyQt5.QtCore import Qt, QEvent, QPoint, QRect
+from src.columns import ColumnTable
+from src.model import SortFilterModel, TableModel
+from src.table import Table
+from tests.qt import application
+
+ROWS = [["2024-03-01", "Food", "Cash", f"entry {i}", str(amount)] for i, amount in enumerate([30, 10, 20])]
+
+class Parent:
+    def check_button_enable(self):
+        pass
+
+class DeleteColumnTest(unittest.TestCase):
+    def setUp(self):
+        application()
+        self.model = TableModel(ColumnTable.HEADER)
+        self.proxy = SortFilterModel()
+        self.proxy.setSourceModel(self.model)
+        self.view = QTableView()
+        self.view.setModel(self.proxy)
+        self.table = Table(Parent(), self.view)
+        self.model.set_rows(ROWS)
+        self.model.mark_clean("source")
+
+    def click(self, row, release=QPoint(5, 5)):
+        # A press inside the cell and a release, as the view delivers them to the delegate
+        index = self.proxy.index(row, self.model.DELETE)
+        option = QStyleOptionViewItem()
+        option.rect = QRect(0, 0, 40, 20)
+        for event_type, position in ((QEvent.MouseButtonPress, QPoint(5, 5)), (QEvent.MouseButtonRelease, release)):
+            event = QMouseEvent(event_type, position, Qt.LeftButton, Qt.LeftButton, Qt.NoModifier)
+            self.assertTrue(self.table.delete_delegate.editorEvent(event, self.proxy, option, index))
+
+    def descriptions(self):
+        return [self.model.value(row, self.model.DESCRIPTION) for row in range(self.model.rowCount())]
+
+    def test_click_deletes_the_source_row_of_a_sorted_view(self):
+        self.proxy.sort(self.model.AMOUNT)
+        self.click(0)
+        self.assertEqual(self.descriptions(), ["entry 0", "entry 2"])
+
+        # The row under the click is looked up again after every delete
+        self.click(0)
+        self.assertEqual(self.descriptions(), ["entry 0"])
+
+        self.table.undo()
+        self.table.undo()
+        self.assertEqual(self.descriptions(), ["entry 0", "entry 1", "entry 2"])
+        self.assertFalse(self.model.is_dirty())
+
+    def test_release_outside_the_cell_does_nothing(self):
+        self.click(0, release=QPoint(80, 5))
+        self.assertEqual(self.model.rowCount(), 3)
+
+if __name__ == "__main__":
+    unittest.main()
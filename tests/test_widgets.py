@@ -0,0 +1,73 @@
+import unittest
+from PyQt5.QtCore import Qt
+from src.widgets import CheckListModel, MultiSelectComboBox
+from tests.qt import application
+
+ITEMS = ["Food", "Rent", "Fuel (car)", "Gifts/Donations", "food court"]
+
+class CheckListModelTest(unittest.TestCase):
+    def setUp(self):
+        application()
+        self.model = CheckListModel()
+        self.model.add_items(ITEMS)
+
+    def shown(self):
+        return [self.model.index(row).data() for row in range(self.model.rowCount())]
+
+    def test_filter_matches_word_prefixes(self):
+        self.model.set_filter("fo")
+        self.assertEqual(self.shown(), ["Food", "food court"])
+        self.model.set_filter("car")
+        self.assertEqual(self.shown(), ["Fuel (car)"])
+        self.model.set_filter("don")
+        self.assertEqual(self.shown(), ["Gifts/Donations"])
+        self.model.set_filter("x")
+        self.assertEqual(self.shown(), [])
+        self.model.set_filter("")
+        self.assertEqual(self.shown(), ITEMS)
+
+    def test_check_states_survive_filtering(self):
+        self.model.set_filter("fo")
+        self.model.toggle(1)
+        self.model.set_filter("")
+        self.model.toggle(1)
+        self.assertEqual(self.model.selected_items(), ["Rent", "food court"])
+        self.assertEqual(self.model.index(4).data(Qt.CheckStateRole), Qt.Checked)
+
+        self.model.set_filter("re")
+        self.model.clear_selection()
+        self.assertEqual(self.model.selected_items(), [])
+        self.model.set_filter("")
+        self.assertEqual(self.model.index(4).data(Qt.CheckStateRole), Qt.Unchecked)
+
+class MultiSelectComboBoxTest(unittest.TestCase):
+    def setUp(self):
+        application()
+        self.combo = MultiSelectComboBox()
+        self.combo.add_items(ITEMS[:2])
+
+    def test_edit_text_shows_the_selection(self):
+        self.combo.add_item("Fuel (car)")
+        self.combo.check_model.toggle(2)
+        self.combo.check_model.toggle(0)
+        self.assertEqual(self.combo.selected_items, ["Food", "Fuel (car)"])
+        self.assertEqual(self.combo.currentText(), "Food, Fuel (car)")
+
+        # The typed filter is shown while the popup is open
+        self.combo.set_filter("re")
+        self.assertEqual(self.combo.currentText(), "re")
+        self.combo.hidePopup()
+        self.assertEqual(self.combo.currentText(), "Food, Fuel (car)")
+
+        self.combo.clear_selection()
+        self.assertEqual(self.combo.selected_items, [])
+        self.assertEqual(self.combo.currentText(), "")
+
+    def test_clear(self):
+        self.combo.check_model.toggle(0)
+        self.combo.clear()
+        self.assertEqual(self.combo.selected_items, [])
+        self.assertEqual(self.combo.check_model.rowCount(), 0)
+
+if __name__ == "__main__":
+    unittest.main()